@@ -32,7 +32,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     # WhiteNoise injected below if enabled
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "core.middleware.RequestProfilingMiddleware",  # Server-Timing + log de requests lentos
+    "core.middleware.SlidingSessionMiddleware",  # SessionMiddleware com gravação espaçada
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -61,7 +62,8 @@ ROOT_URLCONF = "FeedbackApp.urls"
 # --- Templates ---
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # DjangoTemplates que mede o render para o Server-Timing (core.profiling)
+        "BACKEND": "core.profiling.ProfiledDjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],  # includes templates/registration/login.html
         "APP_DIRS": True,
         "OPTIONS": {
@@ -70,6 +72,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "core.context_processors.exports",
             ],
         },
     },
@@ -78,11 +81,28 @@ TEMPLATES = [
 WSGI_APPLICATION = "FeedbackApp.wsgi.application"
 
 # --- Database (SQLite) ---
+# WAL: leitores (listas, exports) não bloqueiam quem grava e vice-versa. É
+# persistente no arquivo, então é ligado uma vez pela migração core 0011, não aqui;
+# synchronous=NORMAL é seguro com WAL (só perde a última transação num crash do SO).
+# Aqui ficam só os PRAGMAs que valem por conexão.
+SQLITE_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL;"
+    "PRAGMA cache_size=-20000;"      # ~20 MB de page cache por conexão
+    "PRAGMA mmap_size=134217728;"    # 128 MB lidos via mmap
+    "PRAGMA temp_store=MEMORY;"
+)
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
-        "OPTIONS": {"timeout": 20},  # tolerate "database is locked" a bit more
+        "OPTIONS": {
+            "timeout": 20,  # tolerate "database is locked" a bit more
+            "init_command": SQLITE_PRAGMAS,
+            # sem "transaction_mode": as transações de escrita das views usam
+            # core.db.immediate_atomic (BEGIN IMMEDIATE); as demais ficam DEFERRED
+        },
+        "CONN_MAX_AGE": 600,          # reaproveita a conexão (e os PRAGMAs) entre requests
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
@@ -110,27 +130,72 @@ if USE_WHITENOISE:
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Download de anexos (core.delivery): o Django só autoriza, o servidor da frente transfere.
+#   "sendfile" → X-Sendfile com o caminho absoluto (Apache mod_xsendfile, lighttpd, Caddy)
+#   "accel"    → X-Accel-Redirect para ATTACHMENT_ACCEL_PREFIX (nginx, location `internal`
+#                com alias para o MEDIA_ROOT)
+#   ""         → o próprio Django serve (com Range/ETag)
+ATTACHMENT_OFFLOAD = os.getenv("ATTACHMENT_OFFLOAD", "")
+ATTACHMENT_ACCEL_PREFIX = "/protected-media/"
+ATTACHMENT_MAX_AGE = 60 * 60              # cache privado no navegador (s)
+
+# --- Feedback list ---
+FEEDBACK_LIST_COUNT_TTL = 60              # total de resultados por filtro fica em cache (s)
+
+# --- Background exports (python manage.py exportworker) ---
+EXPORT_ROOT = BASE_DIR / "exports"        # artefatos prontos (fora do MEDIA_ROOT)
+EXPORT_JOB_TTL = 24 * 60 * 60             # apaga jobs/arquivos concluídos após 24h
+EXPORT_JOB_TIMEOUT = 30 * 60              # "running" há mais que isso = worker morreu
+EXPORT_WORKER_PROCESSES = 2
+# botões XLSX/PDF via fila de jobs; sem um exportworker rodando, ficariam na fila para sempre
+EXPORT_JOBS_ENABLED = os.getenv("EXPORT_JOBS_ENABLED") == "1"
+EXPORT_CACHE_MAX_BYTES = 512 * 1024 * 1024  # cache de exports em EXPORT_ROOT/cache (LRU, core.export_cache)
+
+# --- Change feed (api/changes/, python manage.py changes) ---
+CHANGE_FEED_TOMBSTONE_DAYS = 90           # exclusões guardadas; tokens mais velhos pedem carga completa
+# o feed só entrega o que mudou há mais que isto: maior que a transação de escrita mais longa
+CHANGE_FEED_SETTLE_SECONDS = int(os.getenv("CHANGE_FEED_SETTLE_SECONDS", "60"))
+
 # --- Auth / Session ---
 LOGIN_URL = "login"
 LOGIN_REDIRECT_URL = "feedback_list"
 LOGOUT_REDIRECT_URL = "login"
 
+SUPPORT_CACHE_TTL = 5 * 60            # cache da checagem do grupo "Suporte" (core.decorators)
+
+CACHES = {
+    # por processo: contagens da lista, pertinência ao grupo Suporte
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    # visto por todos os workers (arquivos): geração que invalida a checagem do grupo Suporte
+    "shared": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("SHARED_CACHE_DIR", str(BASE_DIR / "cache")),
+    },
+}
+
 SESSION_COOKIE_AGE = 60 * 60          # 60 minutes
-SESSION_SAVE_EVERY_REQUEST = True     # sliding expiration
+SESSION_SAVE_EVERY_REQUEST = False    # sliding expiration fica a cargo do SlidingSessionMiddleware,
+SESSION_TOUCH_INTERVAL = 5 * 60       # que só regrava a sessão a cada 5 min (ou se os dados mudarem)
 SESSION_COOKIE_SAMESITE = "Lax"
 SESSION_COOKIE_HTTPONLY = True
 CSRF_COOKIE_HTTPONLY = True
 
 # --- Logging ---
-LOG_DIR = BASE_DIR / "logs"
-LOG_DIR.mkdir(exist_ok=True)
+LOG_DIR = Path(os.getenv("LOG_DIR", BASE_DIR / "logs"))  # criado na primeira linha de log (core.log)
+
+# --- Request profiling (core.middleware.RequestProfilingMiddleware) ---
+PROFILING_SERVER_TIMING = True            # Server-Timing (sql, render, exports, view, total) p/ staff/DEBUG
+PROFILING_SLOW_MS = int(os.getenv("PROFILING_SLOW_MS", "1000"))  # acima disso vai para o log
+PROFILING_SLOW_SAMPLE = 1.0               # fração dos requests lentos que entram no log
+PROFILING_DUMP_DIR = LOG_DIR / "profiles"  # .prof do ?_profile=1 (só staff)
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
     "handlers": {
         "file": {
             "level": "INFO",
-            "class": "logging.FileHandler",
+            "class": "core.log.FileHandler",
             "filename": str(LOG_DIR / "feedbackapp.log"),
         },
         "console": {"class": "logging.StreamHandler"},
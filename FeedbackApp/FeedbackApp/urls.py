@@ -24,17 +24,28 @@ urlpatterns = [
     # --- Feedbacks ---
     path("feedbacks/", core_views.feedback_list, name="feedback_list"),
     path("feedbacks/novo/", core_views.feedback_create, name="feedback_create"),
+    path("feedbacks/status/", core_views.feedback_bulk_status, name="feedback_bulk_status"),
     path("feedbacks/<int:pk>/", core_views.feedback_detail, name="feedback_detail"),
     path("attachments/<int:pk>/", core_views.attachment_download, name="attachment_download"),
+    path("attachments/<int:pk>/<str:kind>/", core_views.attachment_derivative, name="attachment_derivative"),
 
     # --- Exports ---
     path("export/csv/", core_views.export_csv, name="export_csv"),
     path("export/xlsx/", core_views.export_excel, name="export_excel"),
     path("export/pdf/", core_views.export_pdf, name="export_pdf"),
+    path("export/jobs/", core_views.export_job_create, name="export_job_create"),
+    path("export/jobs/<int:pk>/", core_views.export_job_status, name="export_job_status"),
+    path("export/jobs/<int:pk>/download/", core_views.export_job_download, name="export_job_download"),
+
+    # --- Read-only JSON API ---
+    path("api/feedbacks/", core_views.api_feedbacks, name="api_feedbacks"),
+    path("api/feedbacks/<int:pk>/", core_views.api_feedback, name="api_feedback"),
+    path("api/changes/", core_views.api_changes, name="api_changes"),
 
     # --- Stats / dashboard ---
     path("stats/summary/", core_views.stats_summary, name="stats_summary"),
     path("stats/breakdown/", core_views.stats_breakdown, name="stats_breakdown"),
+    path("stats/dashboard/", core_views.stats_dashboard, name="stats_dashboard"),
     path("dashboard/", core_views.dashboard, name="dashboard"),
 
     # --- Health ---
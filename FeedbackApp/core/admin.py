@@ -1,11 +1,16 @@
 from django.contrib import admin
-from .models import Feedback, FeedbackAttachment, FeedbackComment
+from .models import ExportJob, Feedback, FeedbackAttachment, FeedbackComment, FeedbackImport, Tombstone
+from .search import search
 
 @admin.register(Feedback)
 class FeedbackAdmin(admin.ModelAdmin):
     list_display = ('id','student_name','type','subject','course_name','class_name','status','created_at')
     list_filter = ('type','subject','status','course_name','class_name','created_at')
-    search_fields = ('student_name','operator_name','description')
+    search_fields = ('student_name','operator_name','course_name','class_name','description')
+
+    def get_search_results(self, request, queryset, search_term):
+        # usa o índice FTS (core.search) em vez de LIKE em cada coluna
+        return search(queryset, search_term), False
 
 @admin.register(FeedbackAttachment)
 class FeedbackAttachmentAdmin(admin.ModelAdmin):
@@ -17,3 +22,18 @@ class FeedbackCommentAdmin(admin.ModelAdmin):
     list_display = ('id','feedback','author_name','created_at')
     search_fields = ('author_name','comment_text')
     list_filter = ('created_at',)
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('id','kind','status','requested_by','created_at','finished_at')
+    list_filter = ('kind','status','created_at')
+
+@admin.register(FeedbackImport)
+class FeedbackImportAdmin(admin.ModelAdmin):
+    list_display = ('id','source','status','rows_read','imported','rejected','created_at','updated_at')
+    list_filter = ('status','created_at')
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ('id','kind','object_id','feedback_id','deleted_at')
+    list_filter = ('kind','deleted_at')
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# core/api.py
+"""
+Serialização da API JSON somente leitura (views api_feedbacks / api_feedback).
+`?fields=` escolhe os campos: só as colunas pedidas saem do banco (.only) e
+anexos/comentários só são buscados quando pedidos (1 query cada por página).
+"""
+from django.db.models import Prefetch
+from django.urls import reverse
+
+from .models import FeedbackAttachment, FeedbackComment
+
+# campo da API → colunas do Feedback que ele lê
+FIELDS = {
+    "id": ("id",),
+    "created_at": ("created_at",),
+    "updated_at": ("updated_at",),
+    "student_name": ("student_name",),
+    "operator_name": ("operator_name",),
+    "type": ("type",),
+    "subject": ("subject",),
+    "course_name": ("course_name",),
+    "class_name": ("class_name",),
+    "status": ("status",),
+    "resolved_at": ("resolved_at",),
+    "description": ("description",),
+    "attachments": (),
+    "comments": (),
+}
+# relações: só vêm quando pedidas
+DEFAULT_FIELDS = [f for f in FIELDS if f not in ("attachments", "comments")]
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def parse_fields(value):
+    """'id,status' → ['id', 'status'] (vazio = DEFAULT_FIELDS). ValueError com os campos desconhecidos."""
+    fields = [f.strip() for f in (value or "").split(",") if f.strip()]
+    unknown = [f for f in fields if f not in FIELDS]
+    if unknown:
+        raise ValueError(f"Campos desconhecidos: {', '.join(unknown)}")
+    return list(dict.fromkeys(fields)) or DEFAULT_FIELDS
+
+
+def parse_limit(value):
+    """Tamanho da página, entre 1 e MAX_PAGE_SIZE. ValueError se não for número."""
+    if not value:
+        return PAGE_SIZE
+    return max(1, min(int(value), MAX_PAGE_SIZE))
+
+
+def select(qs, fields):
+    """Restringe `qs` às colunas de `fields` (+ as do cursor) e pré-carrega as relações pedidas."""
+    columns = {"id", "created_at"}  # o cursor (core.pagination) usa os dois
+    for f in fields:
+        columns.update(FIELDS[f])
+    qs = qs.only(*columns)
+    if "attachments" in fields:
+        qs = qs.prefetch_related(
+            Prefetch(
+                "attachments",
+                queryset=FeedbackAttachment.objects.order_by("id").only(
+                    "id", "feedback_id", "file", "original_name", "mime_type", "file_size",
+                    "duration_seconds", "created_at", "updated_at",
+                ),
+            )
+        )
+    if "comments" in fields:
+        qs = qs.prefetch_related(
+            Prefetch("comments", queryset=FeedbackComment.objects.order_by("created_at", "id"))
+        )
+    return qs
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def serialize_attachment(att):
+    return {
+        "id": att.id,
+        "feedback_id": att.feedback_id,
+        "name": att.original_name or att.file.name.rsplit("/", 1)[-1],
+        "mime_type": att.mime_type,
+        "size": att.file_size,
+        "duration_seconds": att.duration_seconds,
+        "created_at": _iso(att.created_at),
+        "updated_at": _iso(att.updated_at),
+        "url": reverse("attachment_download", args=[att.id]),
+    }
+
+
+def serialize_comment(c):
+    return {
+        "id": c.id,
+        "feedback_id": c.feedback_id,
+        "author_name": c.author_name,
+        "text": c.comment_text,
+        "created_at": _iso(c.created_at),
+        "updated_at": _iso(c.updated_at),
+    }
+
+
+def serialize(fb, fields):
+    data = {}
+    for f in fields:
+        if f == "attachments":
+            data[f] = [serialize_attachment(a) for a in fb.attachments.all()]
+        elif f == "comments":
+            data[f] = [serialize_comment(c) for c in fb.comments.all()]
+        elif f.endswith("_at"):
+            data[f] = _iso(getattr(fb, f))
+        else:
+            data[f] = getattr(fb, f)
+    return data
@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+# core/audio.py
+"""
+Metadados de áudio/vídeo (duração, taxa de amostragem, canais, bitrate)
+lidos só dos cabeçalhos dos containers, em Python puro e sem ler o arquivo
+inteiro: no máximo o começo, o fim (Ogg) ou o átomo moov (MP4).
+
+Formatos: MP3 (Xing/Info/VBRI ou CBR), WAV, FLAC, Ogg (Vorbis/Opus),
+MP4/M4A e Matroska/WebM. O formato vem dos bytes, não do mime_type.
+"""
+import os
+import struct
+
+HEAD_SIZE = 64 * 1024
+TAIL_SIZE = 64 * 1024
+MAX_MOOV_SIZE = 16 * 1024 * 1024
+
+MEDIA_PREFIXES = ("audio/", "video/")
+
+
+def is_media(att):
+    return (att.mime_type or "").startswith(MEDIA_PREFIXES)
+
+
+def probe(f):
+    """
+    {'format', 'duration' (s, float), 'sample_rate', 'channels', 'bitrate' (bps), 'codec'}
+    com as chaves que o container informar. ValueError se o formato não for reconhecido.
+    `f`: arquivo binário com seek().
+    """
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    f.seek(0)
+    head = f.read(HEAD_SIZE)
+
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        info = _wav(f, size)
+    elif head[:4] == b"OggS":
+        info = _ogg(f, size, head)
+    elif head[4:8] == b"ftyp":
+        info = _mp4(f, size)
+    elif head[:4] == b"\x1a\x45\xdf\xa3":
+        info = _matroska(head)
+    else:
+        start = _id3v2_size(head)
+        if head[start : start + 4] == b"fLaC" or (start >= len(head) and _peek(f, start, 4) == b"fLaC"):
+            info = _flac(f, start + 4)
+        else:
+            info = _mp3(f, size, start)
+
+    info = {k: v for k, v in info.items() if v is not None}
+    if info.get("duration") is not None:
+        info["duration"] = round(info["duration"], 3)
+    if "bitrate" not in info and info.get("duration"):
+        info["bitrate"] = int(size * 8 / info["duration"])
+    return info
+
+
+def _peek(f, offset, n):
+    f.seek(offset)
+    return f.read(n)
+
+
+def _id3v2_size(head):
+    """Tamanho da tag ID3v2 no início (0 se não houver)."""
+    if head[:3] != b"ID3" or len(head) < 10:
+        return 0
+    b = head[6:10]
+    size = (b[0] << 21) | (b[1] << 14) | (b[2] << 7) | b[3]
+    footer = 10 if head[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+# ---- WAV ----
+def _wav(f, size):
+    pos, fmt, data_size = 12, None, None
+    while pos + 8 <= size and (fmt is None or data_size is None):
+        header = _peek(f, pos, 8)
+        if len(header) < 8:
+            break
+        chunk_id, chunk_size = header[:4], struct.unpack("<I", header[4:])[0]
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack("<HHIIHH", f.read(16))
+        elif chunk_id == b"data":
+            data_size = min(chunk_size, size - pos - 8)
+        pos += 8 + chunk_size + (chunk_size & 1)
+    if fmt is None:
+        raise ValueError("WAV sem chunk fmt")
+    _, channels, rate, byte_rate, _, bits = fmt
+    return {
+        "format": "wav",
+        "codec": "pcm" if fmt[0] == 1 else f"wav-{fmt[0]}",
+        "sample_rate": rate,
+        "channels": channels,
+        "bitrate": byte_rate * 8,
+        "duration": data_size / byte_rate if data_size is not None and byte_rate else None,
+    }
+
+
+# ---- FLAC ----
+def _flac(f, pos):
+    header = _peek(f, pos, 4 + 34)
+    if len(header) < 38 or header[0] & 0x7F != 0:
+        raise ValueError("FLAC sem STREAMINFO")
+    v = struct.unpack(">Q", header[4 + 10 : 4 + 18])[0]
+    rate = v >> 44
+    total = v & 0xFFFFFFFFF
+    return {
+        "format": "flac",
+        "codec": "flac",
+        "sample_rate": rate,
+        "channels": ((v >> 41) & 0x7) + 1,
+        "duration": total / rate if rate and total else None,
+    }
+
+
+# ---- Ogg (Vorbis / Opus) ----
+def _ogg(f, size, head):
+    nsegs = head[26]
+    packet = head[27 + nsegs :]
+    serial = head[14:18]
+    if packet[:7] == b"\x01vorbis":
+        channels, rate, _, nominal = struct.unpack("<BIiI", packet[11:24])
+        codec, pre_skip, granule_rate = "vorbis", 0, rate
+        bitrate = nominal or None
+    elif packet[:8] == b"OpusHead":
+        channels, pre_skip, rate = struct.unpack("<BHI", packet[9:16])
+        codec, granule_rate, bitrate = "opus", 48000, None  # granule do Opus é sempre em 48 kHz
+    else:
+        raise ValueError("Ogg com codec desconhecido")
+
+    # última página do stream: a granule position dela é o total de amostras
+    tail_start = max(0, size - TAIL_SIZE)
+    tail = _peek(f, tail_start, TAIL_SIZE)
+    granule = None
+    i = tail.rfind(b"OggS")
+    while i != -1:
+        if tail[i + 14 : i + 18] == serial:
+            granule = struct.unpack("<q", tail[i + 6 : i + 14])[0]
+            break
+        i = tail.rfind(b"OggS", 0, i)
+    duration = (granule - pre_skip) / granule_rate if granule and granule > 0 else None
+    return {
+        "format": "ogg",
+        "codec": codec,
+        "sample_rate": rate or None,
+        "channels": channels,
+        "bitrate": bitrate,
+        "duration": duration,
+    }
+
+
+# ---- MP4 / M4A ----
+MP4_CONTAINERS = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+
+def _boxes(data, start=0, end=None):
+    """(tipo, início do conteúdo, fim) das caixas em data[start:end]."""
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack(">I4s", data[pos : pos + 8])
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", data[pos + 8 : pos + 16])[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return
+        yield kind, pos + header, min(pos + size, end)
+        pos += size
+
+
+def _mp4(f, size):
+    # acha o moov entre as caixas do topo sem ler o mdat (pode estar no fim)
+    pos, moov = 0, None
+    while pos + 8 <= size:
+        header = _peek(f, pos, 16)
+        box_size, kind = struct.unpack(">I4s", header[:8])
+        hlen = 8
+        if box_size == 1:
+            box_size, hlen = struct.unpack(">Q", header[8:16])[0], 16
+        elif box_size == 0:
+            box_size = size - pos
+        if box_size < hlen:
+            break
+        if kind == b"moov":
+            if box_size > MAX_MOOV_SIZE:
+                raise ValueError("moov grande demais")
+            moov = _peek(f, pos + hlen, box_size - hlen)
+            break
+        pos += box_size
+    if moov is None:
+        raise ValueError("MP4 sem moov")
+
+    info = {"format": "mp4"}
+    for kind, start, end in _boxes(moov):
+        if kind == b"mvhd":
+            version = moov[start]
+            if version == 1:
+                timescale, duration = struct.unpack(">IQ", moov[start + 20 : start + 32])
+            else:
+                timescale, duration = struct.unpack(">II", moov[start + 12 : start + 20])
+            if timescale:
+                info["duration"] = duration / timescale
+    info.update(_mp4_audio(moov, 0, len(moov)))
+    return info
+
+
+def _mp4_audio(data, start, end):
+    """Codec/canais/taxa da primeira entrada de áudio do stsd (mp4a, alac, ...)."""
+    for kind, s, e in _boxes(data, start, end):
+        if kind in MP4_CONTAINERS:
+            found = _mp4_audio(data, s, e)
+            if found:
+                return found
+        elif kind == b"stsd":
+            for entry, es, ee in _boxes(data, s + 8, e):  # versão/flags + contagem
+                if entry in (b"mp4a", b"alac", b"Opus", b"fLaC", b"ac-3", b"ec-3") and ee - es >= 28:
+                    channels, _, _, _, rate = struct.unpack(">HHHHI", data[es + 16 : es + 28])
+                    return {"codec": entry.decode().strip().lower(), "channels": channels, "sample_rate": rate >> 16}
+    return {}
+
+
+# ---- Matroska / WebM ----
+MKV_SEGMENT, MKV_INFO, MKV_TRACKS = 0x18538067, 0x1549A966, 0x1654AE6B
+MKV_TRACK_ENTRY, MKV_AUDIO, MKV_CODEC_ID = 0xAE, 0xE1, 0x86
+MKV_TIMECODE_SCALE, MKV_DURATION = 0x2AD7B1, 0x4489
+MKV_SAMPLING_FREQ, MKV_CHANNELS = 0xB5, 0x9F
+
+
+def _vint(data, pos, keep_marker):
+    first = data[pos]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8 or pos + length > len(data):
+        raise ValueError("EBML inválido")
+    value = first if keep_marker else first & (0xFF >> length)
+    for b in data[pos + 1 : pos + length]:
+        value = (value << 8) | b
+    unknown = not keep_marker and value == (1 << (7 * length)) - 1
+    return value, pos + length, unknown
+
+
+def _ebml(data, start, end):
+    """(id, início do conteúdo, fim) dos elementos em data[start:end] (tamanho desconhecido → até end)."""
+    pos = start
+    while pos < end:
+        eid, pos, _ = _vint(data, pos, keep_marker=True)
+        size, pos, unknown = _vint(data, pos, keep_marker=False)
+        stop = end if unknown else min(pos + size, end)
+        yield eid, pos, stop
+        pos = stop
+
+
+def _ebml_float(raw):
+    return struct.unpack(">f" if len(raw) == 4 else ">d", raw)[0] if len(raw) in (4, 8) else None
+
+
+def _matroska(head):
+    info = {"format": "webm" if b"webm" in head[:64] else "matroska"}
+    scale, duration = 1_000_000, None
+    try:
+        for eid, s, e in _ebml(head, 0, len(head)):
+            if eid != MKV_SEGMENT:
+                continue
+            for sid, ss, se in _ebml(head, s, e):
+                if sid == MKV_INFO:
+                    for iid, is_, ie in _ebml(head, ss, se):
+                        if iid == MKV_TIMECODE_SCALE:
+                            scale = int.from_bytes(head[is_:ie], "big")
+                        elif iid == MKV_DURATION:
+                            duration = _ebml_float(head[is_:ie])
+                elif sid == MKV_TRACKS:
+                    info.update(_mkv_audio(head, ss, se))
+                    break
+            break
+    except (ValueError, IndexError):
+        pass  # cabeçalho maior que HEAD_SIZE: fica com o que deu para ler
+    if duration:
+        info["duration"] = duration * scale / 1e9
+    return info
+
+
+def _mkv_audio(data, start, end):
+    for tid, ts, te in _ebml(data, start, end):
+        if tid != MKV_TRACK_ENTRY:
+            continue
+        codec, audio = None, {}
+        for eid, s, e in _ebml(data, ts, te):
+            if eid == MKV_CODEC_ID:
+                codec = data[s:e].decode("ascii", "replace")
+            elif eid == MKV_AUDIO:
+                for aid, as_, ae in _ebml(data, s, e):
+                    if aid == MKV_SAMPLING_FREQ:
+                        audio["sample_rate"] = int(_ebml_float(data[as_:ae]) or 0) or None
+                    elif aid == MKV_CHANNELS:
+                        audio["channels"] = int.from_bytes(data[as_:ae], "big")
+        if audio:
+            audio["codec"] = (codec or "").replace("A_", "").lower() or None
+            return audio
+    return {}
+
+
+# ---- MP3 ----
+MP3_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_BITRATES[(2, 3)] = MP3_BITRATES[(2, 2)]
+MP3_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 2.5: (11025, 12000, 8000)}
+
+
+def _mp3_frame(b):
+    """Cabeçalho de frame MPEG (4 bytes) → (versão, layer, bitrate bps, taxa, canais) ou None."""
+    if b[0] != 0xFF or b[1] & 0xE0 != 0xE0:
+        return None
+    version = {3: 1, 2: 2, 0: 2.5}.get((b[1] >> 3) & 3)
+    layer = {3: 1, 2: 2, 1: 3}.get((b[1] >> 1) & 3)
+    br_idx, sr_idx = b[2] >> 4, (b[2] >> 2) & 3
+    if version is None or layer is None or br_idx in (0, 15) or sr_idx == 3:
+        return None
+    bitrate = MP3_BITRATES[(1 if version == 1 else 2, layer)][br_idx] * 1000
+    rate = MP3_SAMPLE_RATES[version][sr_idx]
+    channels = 1 if (b[3] >> 6) == 3 else 2
+    return version, layer, bitrate, rate, channels
+
+
+def _mp3_frame_length(b, version, layer, bitrate, rate):
+    padding = (b[2] >> 1) & 1
+    if layer == 1:
+        return (12 * bitrate // rate + padding) * 4
+    per_frame = 72 if (layer == 3 and version != 1) else 144
+    return per_frame * bitrate // rate + padding
+
+
+def _mp3_chain(data, pos, frame, at_eof, needed=3):
+    """
+    Um 0xFFE solto em dados quaisquer não basta: os próximos frames têm que
+    começar onde o anterior termina, com a mesma versão/layer/taxa.
+    """
+    for _ in range(needed):
+        pos += _mp3_frame_length(data[pos : pos + 4], *frame[:4])
+        if pos + 4 > len(data):
+            return at_eof  # arquivo curto: o que deu para conferir bateu
+        nxt = _mp3_frame(data[pos : pos + 4])
+        if not nxt or (nxt[0], nxt[1], nxt[3]) != (frame[0], frame[1], frame[3]):
+            return False
+    return True
+
+
+def _mp3(f, size, start):
+    data = _peek(f, start, HEAD_SIZE)
+    frame = None
+    for i in range(max(0, len(data) - 4)):
+        if data[i] != 0xFF:
+            continue
+        frame = _mp3_frame(data[i : i + 4])
+        if frame and _mp3_chain(data, i, frame, at_eof=start + len(data) >= size):
+            break
+        frame = None
+    if frame is None:
+        raise ValueError("Formato de áudio não reconhecido")
+    version, layer, bitrate, rate, channels = frame
+    samples = 384 if layer == 1 else 1152 if (layer == 2 or version == 1) else 576
+
+    # Xing/Info (VBR e LAME CBR) ou VBRI (Fraunhofer) trazem o total de frames
+    side = (32 if channels == 2 else 17) if version == 1 else (17 if channels == 2 else 9)
+    frames = None
+    xing = data[i + 4 + side : i + 4 + side + 12]
+    if xing[:4] in (b"Xing", b"Info") and struct.unpack(">I", xing[4:8])[0] & 1:
+        frames = struct.unpack(">I", xing[8:12])[0]
+    elif data[i + 36 : i + 40] == b"VBRI":
+        frames = struct.unpack(">I", data[i + 50 : i + 54])[0]
+
+    audio_bytes = size - start - i
+    if _peek(f, size - 128, 3) == b"TAG":  # ID3v1 no fim
+        audio_bytes -= 128
+    if frames:
+        duration = frames * samples / rate
+        bitrate = int(audio_bytes * 8 / duration) if duration else bitrate
+    else:
+        duration = audio_bytes * 8 / bitrate  # CBR sem cabeçalho: estimativa pelo tamanho
+    return {
+        "format": "mp3",
+        "codec": "mp3" if layer == 3 else f"mp{layer}",
+        "sample_rate": rate,
+        "channels": channels,
+        "bitrate": bitrate,
+        "duration": duration,
+    }
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+# core/benchmark.py
+"""
+Benchmark ponta a ponta das views de core.views (`python manage.py benchmark`):
+cada caso é um request de verdade pelo test Client (middlewares, sessão,
+templates), repetido N vezes sobre os dados do banco atual, normalmente
+gerados com `manage.py seed_feedbacks`. O relatório em JSON guarda, por
+caso, latências (primeira execução e percentis), queries, bytes e o
+Server-Timing (core.profiling), para comparar execuções.
+
+Views que gravam dados (troca de status em lote, criação de job de export,
+logout) ficam de fora e aparecem em "skipped".
+"""
+import platform
+import statistics
+import subprocess
+import time
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+
+from . import export_cache, thumbnails
+from .models import ExportJob, Feedback, FeedbackAttachment, FeedbackComment
+
+REPEATS = 5
+
+SKIPPED = {
+    "feedback_bulk_status": "grava dados (troca de status)",
+    "export_job_create": "grava dados (cria job de export)",
+    "logout": "encerra a sessão do benchmark",
+}
+
+
+def _percentile(values, pct):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def view_names():
+    """Nomes de URL de todas as views de core.views."""
+    return {
+        p.name for p in get_resolver().url_patterns
+        if getattr(p, "callback", None) and p.callback.__module__ == "core.views"
+    }
+
+
+def benchmark_user(username="benchmark"):
+    """
+    Usuário do grupo Suporte usado nos requests (criado na primeira vez, sem
+    senha). É staff para receber o Server-Timing.
+    """
+    user, created = User.objects.get_or_create(username=username, defaults={"is_staff": True})
+    if created:
+        user.set_unusable_password()
+        user.save()
+    elif not user.is_staff:
+        user.is_staff = True
+        user.save(update_fields=["is_staff"])
+    user.groups.add(Group.objects.get_or_create(name="Suporte")[0])
+    return user
+
+
+def cases():
+    """[(nome, url_name, args, params)] para os dados do banco; casos sem dado que os sustente ficam de fora."""
+    today = timezone.localdate()
+    month = today.strftime("%Y-%m")
+    out = [
+        ("home", "home", [], {}),
+        ("feedback_list", "feedback_list", [], {}),
+        ("feedback_list?q", "feedback_list", [], {"q": "silva"}),
+        ("feedback_list?aluno", "feedback_list", [], {"aluno": "ana"}),
+        ("feedback_list?operador", "feedback_list", [], {"operador": "aline"}),
+        ("feedback_list?curso", "feedback_list", [], {"curso": "rca360"}),
+        ("feedback_list?tipo", "feedback_list", [], {"tipo": "reclamacao"}),
+        ("feedback_list?assunto", "feedback_list", [], {"assunto": "plataforma"}),
+        ("feedback_list?status", "feedback_list", [], {"status": "pendente"}),
+        ("feedback_list?de&ate", "feedback_list", [], {"de": f"{today - timedelta(days=30)}", "ate": f"{today}"}),
+        ("feedback_create", "feedback_create", [], {}),
+        ("export_csv", "export_csv", [], {}),
+        ("export_excel", "export_excel", [], {}),
+        ("export_pdf", "export_pdf", [], {"month": month}),
+        ("api_feedbacks", "api_feedbacks", [], {}),
+        ("api_feedbacks?relations", "api_feedbacks", [], {"fields": "id,status,attachments,comments"}),
+        ("api_changes", "api_changes", [], {}),
+        ("stats_summary", "stats_summary", [], {"month": month}),
+        ("stats_breakdown", "stats_breakdown", [], {"month": month}),
+        ("stats_dashboard", "stats_dashboard", [], {"month": month}),
+        ("dashboard", "dashboard", [], {}),
+        ("ping", "ping", [], {}),
+    ]
+
+    fb = Feedback.objects.annotate(n=Count("comments")).filter(n__gt=0).order_by("-created_at").first()
+    fb = fb or Feedback.objects.order_by("-created_at").first()
+    if fb:
+        out += [
+            ("feedback_detail", "feedback_detail", [fb.pk], {}),
+            ("api_feedback", "api_feedback", [fb.pk], {"fields": "id,status,attachments,comments"}),
+        ]
+    att = FeedbackAttachment.objects.order_by("-id").first()
+    if att:
+        out.append(("attachment_download", "attachment_download", [att.pk], {}))
+    images = FeedbackAttachment.objects.filter(mime_type__startswith="image/").order_by("-id")[:20]
+    img = next((a for a in images if thumbnails.is_image(a)), None)
+    if img:
+        out.append(("attachment_derivative", "attachment_derivative", [img.pk, "thumb"], {}))
+    job = ExportJob.objects.filter(status="done").order_by("-id").first()
+    if job:
+        out += [
+            ("export_job_status", "export_job_status", [job.pk], {}),
+            ("export_job_download", "export_job_download", [job.pk], {}),
+        ]
+    return out
+
+
+def _server_timing(header):
+    """'sql;dur=1.2;desc="3 queries", total;dur=9' → ({"sql": 1.2, "total": 9.0}, 3)."""
+    timings, queries = {}, None
+    for metric in filter(None, (m.strip() for m in (header or "").split(","))):
+        name, *params = metric.split(";")
+        for p in params:
+            if p.startswith("dur="):
+                timings[name] = float(p[4:])
+            elif name == "sql" and p.startswith("desc="):
+                queries = int(p[5:].strip('"').split()[0])
+    return timings, queries
+
+
+def _fetch(client, url, params):
+    started = time.perf_counter()
+    resp = client.get(url, params)
+    size = len(b"".join(resp.streaming_content)) if resp.streaming else len(resp.content)
+    elapsed = time.perf_counter() - started
+    resp.close()
+    return resp, elapsed, size
+
+
+def run_case(client, case, repeats=REPEATS):
+    name, url_name, args, params = case
+    url = reverse(url_name, args=args)
+    resp, first, size = _fetch(client, url, params)
+    # queries e tempos por etapa vêm do Server-Timing da primeira execução (core.profiling)
+    timings, queries = _server_timing(resp.get("Server-Timing"))
+    times = [first]
+    for _ in range(repeats - 1):
+        resp, elapsed, _ = _fetch(client, url, params)
+        times.append(elapsed)
+    return {
+        "name": name,
+        "url": url,
+        "params": params,
+        "status": resp.status_code,
+        "runs": len(times),
+        "first_ms": _ms(first),
+        "min_ms": _ms(min(times)),
+        "p50_ms": _ms(_percentile(times, 50)),
+        "p95_ms": _ms(_percentile(times, 95)),
+        "max_ms": _ms(max(times)),
+        "queries": queries,
+        "bytes": size,
+        "server_timing_ms": timings,
+    }
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run(repeats=REPEATS, username="benchmark", only=None, on_result=None):
+    """
+    Roda todos os casos (ou os de nome em `only`) e devolve o relatório.
+    Os exports começam com o cache em disco vazio: "first_ms" é a geração
+    do arquivo e os percentis refletem, na maior parte, hits do cache.
+    """
+    client = Client(SERVER_NAME="localhost", raise_request_exception=False)
+    client.force_login(benchmark_user(username))
+    export_cache.evict(max_bytes=0)
+
+    available = cases()
+    selected = [c for c in available if not only or c[0] in only]
+    results = []
+    for case in selected:
+        result = run_case(client, case, repeats)
+        results.append(result)
+        if on_result:
+            on_result(result)
+
+    covered = {c[1] for c in available} | set(SKIPPED)
+    return {
+        "created_at": timezone.now().isoformat(),
+        "repeats": repeats,
+        "environment": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "git_commit": _git_commit(),
+        },
+        "data": {
+            "feedbacks": Feedback.objects.count(),
+            "comments": FeedbackComment.objects.count(),
+            "attachments": FeedbackAttachment.objects.count(),
+        },
+        "results": results,
+        "skipped": {**SKIPPED, **{n: "sem dados para montar o request" for n in sorted(view_names() - covered)}},
+    }
+
+
+def compare(old, new):
+    """[(caso, p50 antes, p50 agora, variação %)] dos casos presentes nos dois relatórios."""
+    before = {r["name"]: r for r in old["results"]}
+    rows = []
+    for r in new["results"]:
+        if r["name"] in before:
+            a, b = before[r["name"]]["p50_ms"], r["p50_ms"]
+            rows.append((r["name"], a, b, round((b - a) / a * 100, 1) if a else None))
+    return rows
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# core/blobs.py
+"""
+Contagem de referências dos blobs de anexos (AttachmentBlob). Cada
+FeedbackAttachment que aponta para cas/.../<sha256> vale 1 em `refs`.
+Um blob que chega a 0 não é apagado na hora: um upload idêntico pode estar
+em andamento (o arquivo já existe no disco, a linha ainda não). O `gc`
+remove os que estão sem referência há mais de GC_GRACE.
+"""
+import os
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from . import thumbnails
+from .models import AttachmentBlob, FeedbackAttachment
+from .storage import blob_name, blob_sha
+
+GC_GRACE = timedelta(hours=1)
+
+
+def _storage():
+    return FeedbackAttachment._meta.get_field("file").storage
+
+
+def acquire(name, n=1):
+    """+n referências ao blob `name` (cria a linha na primeira). Ignora arquivos fora do CAS."""
+    sha = blob_sha(name)
+    if sha is None:
+        return
+    rows = AttachmentBlob.objects.filter(sha256=sha)
+    with transaction.atomic():
+        if rows.update(refs=F("refs") + n, updated_at=timezone.now()):
+            return
+        try:
+            with transaction.atomic():
+                AttachmentBlob.objects.create(sha256=sha, size=_storage().size(name), refs=n)
+        except IntegrityError:
+            # outro processo criou a linha entre o UPDATE e o INSERT
+            rows.update(refs=F("refs") + n, updated_at=timezone.now())
+
+
+def release(name, n=1):
+    """-n referências ao blob `name`."""
+    sha = blob_sha(name)
+    if sha is None:
+        return
+    AttachmentBlob.objects.filter(sha256=sha).update(refs=F("refs") - n, updated_at=timezone.now())
+
+
+def discard(name):
+    """Apaga um arquivo recém-gravado que não chegou a ser referenciado (upload abortado)."""
+    sha = blob_sha(name)
+    if sha is not None and AttachmentBlob.objects.filter(sha256=sha, refs__gt=0).exists():
+        return
+    _storage().delete(name)
+
+
+def adopt(old_name):
+    """
+    Move um arquivo antigo (fora do CAS) para o storage deduplicado e repointa
+    todos os anexos que o usam. Retorna (novo nome, anexos atualizados).
+    """
+    storage = _storage()
+    with storage.open(old_name) as f:
+        new_name = storage.save(old_name, f)
+
+    rows = FeedbackAttachment.objects.filter(file=old_name)
+    with transaction.atomic():
+        now = timezone.now()
+        rows.filter(original_name="").update(original_name=os.path.basename(old_name)[:255], updated_at=now)
+        n = rows.update(file=new_name, updated_at=now)  # update() não dispara signals: conta aqui
+        acquire(new_name, n)
+    transaction.on_commit(lambda: storage.delete(old_name))
+    return new_name, n
+
+
+def recount():
+    """Recalcula `refs` a partir dos anexos (cria linhas que faltam). Retorna quantas linhas mudaram."""
+    actual = {}
+    for r in FeedbackAttachment.objects.filter(file__startswith="cas/").values("file").annotate(n=Count("id")):
+        sha = blob_sha(r["file"])
+        if sha:
+            actual[sha] = r["n"]
+
+    changed = 0
+    with transaction.atomic():
+        for blob in AttachmentBlob.objects.all():
+            n = actual.pop(blob.sha256, 0)
+            if blob.refs != n:
+                AttachmentBlob.objects.filter(pk=blob.pk).update(refs=n, updated_at=timezone.now())
+                changed += 1
+        storage = _storage()
+        for sha, n in actual.items():
+            AttachmentBlob.objects.create(sha256=sha, size=storage.size(blob_name(sha)), refs=n)
+            changed += 1
+    return changed
+
+
+def gc(now=None):
+    """Apaga blobs sem referência há mais de GC_GRACE (linha + arquivo). Retorna (blobs, bytes)."""
+    cutoff = (now or timezone.now()) - GC_GRACE
+    storage = _storage()
+    removed = freed = 0
+    for blob in AttachmentBlob.objects.filter(refs__lte=0, updated_at__lt=cutoff):
+        # DELETE condicional: se alguém voltou a referenciar, não apaga
+        if AttachmentBlob.objects.filter(pk=blob.pk, refs__lte=0, updated_at__lt=cutoff).delete()[0]:
+            storage.delete(blob_name(blob.sha256))
+            thumbnails.delete(blob_name(blob.sha256))
+            removed += 1
+            freed += blob.size
+    return removed, freed
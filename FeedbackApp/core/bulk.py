@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# core/bulk.py
+"""
+Troca de status em lote (ação em massa da lista de feedbacks): um UPDATE por
+conjunto no lugar de buscar e salvar linha a linha. Segue a mesma regra de
+resolved_at do feedback_detail e mantém o rollup diário, já que update() não
+dispara os signals de core.signals.
+
+Também aqui o bulk_create com datas vindas de fora (core.imports, core.seed).
+"""
+from collections import Counter
+
+from django.db.models import Count, DateTimeField, F, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from . import rollups
+from .db import immediate_atomic
+from .models import Feedback
+
+IDS_CHUNK = 500  # ids por UPDATE (limite de parâmetros do SQLite)
+
+
+def _set_status(qs, status, now):
+    target = qs.exclude(status=status).order_by()
+
+    # cada linha que muda sai de (dia, 'status', antigo) e entra em (dia, 'status', novo);
+    # TruncDate usa o fuso atual, como rollups.contributions
+    deltas = Counter()
+    for r in target.annotate(day=TruncDate("created_at")).values("day", "status").annotate(n=Count("id")):
+        deltas[(r["day"], "status", r["status"])] -= r["n"]
+        deltas[(r["day"], "status", status)] += r["n"]
+
+    resolved_at = (
+        Coalesce(F("resolved_at"), Value(now, output_field=DateTimeField())) if status == "resolvido" else None
+    )
+    # update() não passa pelo auto_now: updated_at explícito (versão dos dados, cache de exports)
+    n = target.update(status=status, resolved_at=resolved_at, updated_at=now)
+    rollups.apply_deltas(deltas)
+    return n
+
+
+def set_status(status, qs=None, ids=None):
+    """
+    Aplica `status` aos feedbacks de `qs` (ex.: core.filters.filter_feedbacks)
+    ou de `ids`, numa transação. Retorna quantos feedbacks mudaram de status.
+    """
+    now = timezone.now()
+    with immediate_atomic():  # lê (deltas do rollup) e depois grava
+        if qs is not None:
+            return _set_status(qs, status, now)
+        ids = sorted(set(ids or ()))
+        return sum(
+            _set_status(Feedback.objects.filter(pk__in=ids[i : i + IDS_CHUNK]), status, now)
+            for i in range(0, len(ids), IDS_CHUNK)
+        )
+
+
+def create_with_timestamps(model, objs):
+    """
+    bulk_create de `objs` com os created_at/updated_at já preenchidos, num
+    INSERT só: durante o bulk_create os campos auto_now/auto_now_add do
+    modelo ficam desligados (o pre_save trocaria as datas pelas de agora) e
+    voltam como estavam logo depois. Campos deixados em None recebem o agora.
+    Feito para os comandos (import_feedbacks, seed_feedbacks): num processo
+    com threads servindo requests, um save() concorrente do mesmo modelo
+    ficaria sem o auto_now nesse intervalo. Retorna `objs`.
+    """
+    fields = [
+        f for f in model._meta.concrete_fields
+        if getattr(f, "auto_now", False) or getattr(f, "auto_now_add", False)
+    ]
+    now = timezone.now()
+    for obj in objs:
+        for f in fields:
+            if getattr(obj, f.attname) is None:
+                setattr(obj, f.attname, now)
+
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    try:
+        for f in fields:
+            f.auto_now = f.auto_now_add = False
+        model.objects.bulk_create(objs)
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+    return objs
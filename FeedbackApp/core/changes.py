@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+# core/changes.py
+"""
+Feed de mudanças incremental (view api_changes e `manage.py changes`):
+feedbacks, comentários e anexos alterados desde um token, mais as exclusões
+(Tombstone), numa ordem estável (updated_at, tipo, id). Cada página devolve
+o token para continuar de onde parou; uma sincronização diária baixa só o
+que mudou, não a tabela inteira.
+
+Cada fonte é lida pelo índice de updated_at a partir do token (keyset, como
+core.pagination) e as quatro são intercaladas em memória. Linhas alteradas
+há menos de CHANGE_FEED_SETTLE_SECONDS ficam para a próxima chamada: o
+updated_at é gravado antes do COMMIT, e uma transação ainda aberta poderia
+aparecer depois com um updated_at já "ultrapassado" pelo token. Por isso a
+janela precisa ser maior que a transação de escrita mais longa (um lote de
+core.imports, uma troca de status em massa).
+"""
+import base64
+import binascii
+import heapq
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from . import api
+from .models import Feedback, FeedbackAttachment, FeedbackComment, Tombstone
+
+PAGE_SIZE = 500
+MAX_PAGE_SIZE = 2000
+
+
+class TokenError(ValueError):
+    """Token ilegível."""
+
+
+class TokenExpired(TokenError):
+    """Token mais antigo que a retenção dos tombstones: exclusões podem ter se perdido."""
+
+
+# kind → (posição no desempate, campo de data); a posição entra no token
+Stream = namedtuple("Stream", "kind rank field")
+STREAMS = [
+    Stream("feedback", 0, "updated_at"),
+    Stream("comment", 1, "updated_at"),
+    Stream("attachment", 2, "updated_at"),
+    Stream("tombstone", 3, "deleted_at"),
+]
+
+
+def retention():
+    return timedelta(days=settings.CHANGE_FEED_TOMBSTONE_DAYS)
+
+
+def settle():
+    return timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+
+
+def encode_token(at, rank, pk):
+    raw = f"{at.isoformat()}|{rank}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_token(token, now=None):
+    """Token → (data, posição, id); None se vazio. TokenError/TokenExpired se inválido/velho demais."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        ts, rank, pk = raw.split("|")
+        at, rank, pk = datetime.fromisoformat(ts), int(rank), int(pk)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise TokenError("Token inválido.")
+    if timezone.is_naive(at):
+        raise TokenError("Token inválido.")
+    if at < (now or timezone.now()) - retention():
+        raise TokenExpired(
+            f"Token anterior a {settings.CHANGE_FEED_TOMBSTONE_DAYS} dias: refaça a carga completa."
+        )
+    return at, rank, pk
+
+
+def parse_limit(value):
+    """Itens por página, entre 1 e MAX_PAGE_SIZE. ValueError se não for número."""
+    if not value:
+        return PAGE_SIZE
+    return max(1, min(int(value), MAX_PAGE_SIZE))
+
+
+def _queryset(stream):
+    if stream.kind == "feedback":
+        return api.select(Feedback.objects.all(), api.DEFAULT_FIELDS)
+    if stream.kind == "comment":
+        return FeedbackComment.objects.all()
+    if stream.kind == "attachment":
+        return FeedbackAttachment.objects.defer("media_info")
+    return Tombstone.objects.all()
+
+
+def _after(stream, token):
+    """Filtro "depois do token" para uma fonte: só desempata pelo id na própria posição."""
+    if token is None:
+        return Q()
+    at, rank, pk = token
+    f = stream.field
+    if stream.rank > rank:
+        return Q(**{f"{f}__gte": at})
+    if stream.rank < rank:
+        return Q(**{f"{f}__gt": at})
+    return Q(**{f"{f}__gte": at}) & (Q(**{f"{f}__gt": at}) | Q(id__gt=pk))
+
+
+def _entry(stream, obj):
+    at = getattr(obj, stream.field)
+    if stream.kind == "tombstone":
+        data = {"kind": obj.kind, "id": obj.object_id, "feedback_id": obj.feedback_id, "deleted": True}
+    elif stream.kind == "feedback":
+        data = {"kind": "feedback", "id": obj.id, "data": api.serialize(obj, api.DEFAULT_FIELDS)}
+    elif stream.kind == "comment":
+        data = {"kind": "comment", "id": obj.id, "data": api.serialize_comment(obj)}
+    else:
+        data = {"kind": "attachment", "id": obj.id, "data": api.serialize_attachment(obj)}
+    return {**data, "at": at.isoformat()}
+
+
+def _key(stream, obj):
+    return getattr(obj, stream.field), stream.rank, obj.id
+
+
+def page(token=None, limit=PAGE_SIZE, now=None):
+    """
+    Mudanças depois de `token` (string; None = desde o começo), no máximo
+    `limit`. Devolve (entradas, próximo token, has_more).
+    """
+    now = now or timezone.now()
+    after = decode_token(token, now)
+    until = now - settle()
+
+    rows = []
+    for stream in STREAMS:
+        qs = (
+            _queryset(stream)
+            .filter(_after(stream, after), **{f"{stream.field}__lte": until})
+            .order_by(stream.field, "id")
+        )
+        rows.append([(_key(stream, obj), stream, obj) for obj in qs[: limit + 1]])
+
+    merged = list(heapq.merge(*rows, key=lambda r: r[0]))
+    has_more = len(merged) > limit
+    merged = merged[:limit]
+    # tudo até `until` já foi visto: o token avança até lá (e não envelhece sem mudanças)
+    last = merged[-1][0] if has_more else max((until, len(STREAMS), 0), after or ())
+    return [_entry(stream, obj) for _, stream, obj in merged], encode_token(*last), has_more
+
+
+def purge(now=None):
+    """Apaga tombstones mais velhos que a retenção. Retorna quantos."""
+    cutoff = (now or timezone.now()) - retention()
+    return Tombstone.objects.filter(deleted_at__lt=cutoff).delete()[0]
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# core/checks.py
+"""
+System checks do core. Os de banco (Tags.database) só rodam quando pedidos:
+`manage.py check --database default` e no `migrate`.
+"""
+from django.core.checks import Error, Tags, register
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+
+from . import search
+
+INDEX_MIGRATION = "0004_feedback_search_index"
+
+
+@register(Tags.database)
+def check_search_index(app_configs=None, databases=None, **kwargs):
+    """Índice FTS sem tabela ou sem triggers fica desatualizado em silêncio."""
+    errors = []
+    for alias in databases or []:
+        conn = connections[alias]
+        recorder = MigrationRecorder(conn)
+        # o migrate roda este check antes de migrar: banco sem a 0004 ainda vai ganhar o índice
+        if not recorder.has_table() or not recorder.migration_qs.filter(app="core", name=INDEX_MIGRATION).exists():
+            continue
+        names = search.missing(conn)
+        if names:
+            errors.append(Error(
+                f"Índice de busca incompleto no banco '{alias}': faltam {', '.join(names)}.",
+                hint="Rode `python manage.py search_index` para recriar os triggers e reindexar.",
+                id="core.E001",
+            ))
+    return errors
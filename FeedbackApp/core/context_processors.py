@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+# core/context_processors.py
+from django.conf import settings
+
+
+def exports(request):
+    """export_jobs: os botões XLSX/PDF do cabeçalho usam a fila de jobs (só com o exportworker rodando)."""
+    return {"export_jobs": settings.EXPORT_JOBS_ENABLED}
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# core/db.py
+"""
+Transações de escrita no SQLite. Um BEGIN comum (DEFERRED) só pede o lock
+de escrita na primeira gravação; se outra conexão escreveu nesse meio-tempo,
+a promoção falha na hora com "database is locked", sem esperar o timeout.
+`immediate_atomic()` começa com BEGIN IMMEDIATE: o lock é pedido (e
+esperado, até o timeout) logo no início. As demais transações, inclusive
+as só de leitura, continuam DEFERRED e não disputam esse lock.
+"""
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+@contextmanager
+def immediate_atomic(using=None):
+    """transaction.atomic() que, no SQLite e fora de outra transação, começa com BEGIN IMMEDIATE."""
+    conn = transaction.get_connection(using)
+    if conn.vendor != "sqlite" or conn.in_atomic_block:
+        # aninhado vira savepoint: o modo vale só para o BEGIN de fora
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    conn.ensure_connection()  # conectar relê transaction_mode das OPTIONS
+    mode, conn.transaction_mode = conn.transaction_mode, "IMMEDIATE"
+    try:
+        with transaction.atomic(using=using):
+            conn.transaction_mode = mode  # só este BEGIN: o resto da conexão segue como estava
+            yield
+    finally:
+        conn.transaction_mode = mode
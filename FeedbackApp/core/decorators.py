@@ -1,6 +1,58 @@
-﻿from django.contrib.auth.decorators import user_passes_test
+﻿import logging
+
+from django.conf import settings
+from django.contrib.auth.decorators import user_passes_test
+from django.core.cache import cache, caches
+
+logger = logging.getLogger(__name__)
+
+SUPPORT_GROUP = "Suporte"
+_GEN_KEY = "support:gen"
+
+# contadores do processo (ver support_cache_stats)
+_stats = {"hits": 0, "misses": 0}
+
+
+def _cache_key(user_id):
+    # a pertinência fica no cache local do processo; a geração, no cache "shared"
+    # (settings.CACHES), que todos os workers enxergam: revogar vale para todos
+    return f"support:{caches['shared'].get_or_set(_GEN_KEY, 0, None)}:{user_id}"
+
+
+def invalidate_support_cache():
+    """Invalida a pertinência de todos os usuários, em todos os processos (chamado pelos signals de grupo)."""
+    shared = caches["shared"]
+    try:
+        shared.incr(_GEN_KEY)  # dois incr simultâneos podem virar um só: a geração muda do mesmo jeito
+    except ValueError:
+        shared.set(_GEN_KEY, 1, None)
+
+
+def support_cache_stats():
+    total = _stats["hits"] + _stats["misses"]
+    return {**_stats, "hit_rate": round(_stats["hits"] / total, 3) if total else 0.0}
+
 
 def _in_support(user):
-    return user.is_authenticated and (user.is_superuser or user.groups.filter(name="Suporte").exists())
+    """Usuário ativo E (superuser OU no grupo 'Suporte'). Pertinência ao grupo fica em cache."""
+    if not user.is_authenticated:
+        return False
+    if user.is_superuser:
+        return True
+
+    key = _cache_key(user.pk)
+    member = cache.get(key)
+    if member is None:
+        _stats["misses"] += 1
+        member = user.groups.filter(name=SUPPORT_GROUP).exists()
+        cache.set(key, member, settings.SUPPORT_CACHE_TTL)
+    else:
+        _stats["hits"] += 1
+
+    total = _stats["hits"] + _stats["misses"]
+    if total % 1000 == 0:
+        logger.info("support auth cache: %s", support_cache_stats())
+    return member
+
 
 support_required = user_passes_test(_in_support, login_url="login")
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# core/delivery.py
+"""
+Entrega de arquivos já autorizados pela view (anexos).
+
+Com settings.ATTACHMENT_OFFLOAD a resposta sai vazia e com X-Sendfile /
+X-Accel-Redirect: o servidor da frente transfere o arquivo (e trata Range),
+sem ocupar o worker WSGI. Sem offload o Django serve sozinho, com suporte a
+um intervalo de bytes (206/416), ETag/If-None-Match, Last-Modified e If-Range.
+"""
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    'bytes=a-b' / 'bytes=a-' / 'bytes=-n' → (início, fim inclusive).
+    None = servir o arquivo inteiro (sem Range, sintaxe inválida ou vários intervalos).
+    RangeNotSatisfiable = 416.
+    """
+    m = RANGE_RE.match((header or "").replace(" ", ""))
+    if not m or m.group(1) == m.group(2) == "":
+        return None
+    first, last = m.groups()
+    if first == "":
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    end = int(last) if last else size - 1
+    return start, min(end, size - 1)
+
+
+def _read_range(path, start, length):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _if_range_matches(request, etag, mtime):
+    """If-Range ausente, ou igual ao ETag / Last-Modified atual → o Range vale."""
+    value = request.headers.get("If-Range")
+    if not value:
+        return True
+    if value.startswith(('"', "W/")):
+        return value == etag
+    since = parse_http_date_safe(value)
+    return since is not None and int(mtime) <= since
+
+
+def serve_file(request, storage, name, content_type=None, filename=None):
+    """Resposta para o arquivo `name` de `storage` (no MEDIA_ROOT); FileNotFoundError se não existir."""
+    path = storage.path(name)
+    st = os.stat(path)
+    etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+    filename = filename or os.path.basename(name)
+
+    headers = {
+        "Content-Type": content_type or "application/octet-stream",
+        "Content-Disposition": content_disposition_header(False, filename),
+        "ETag": etag,
+        "Last-Modified": http_date(st.st_mtime),
+        "Cache-Control": f"private, max-age={settings.ATTACHMENT_MAX_AGE}",
+    }
+    # 304/412 saem daqui mesmo, sem tocar no arquivo nem no servidor da frente
+    probe = HttpResponse(headers=headers)
+    response = get_conditional_response(request, etag=etag, last_modified=int(st.st_mtime), response=probe)
+    if response is not probe:
+        return response
+
+    mode = settings.ATTACHMENT_OFFLOAD
+    if mode == "sendfile":
+        return HttpResponse(headers={**headers, "X-Sendfile": path})
+    if mode == "accel":
+        location = settings.ATTACHMENT_ACCEL_PREFIX.rstrip("/") + "/" + quote(name)
+        return HttpResponse(headers={**headers, "X-Accel-Redirect": location})
+
+    headers["Accept-Ranges"] = "bytes"
+    try:
+        byte_range = parse_range(request.headers.get("Range"), st.st_size)
+    except RangeNotSatisfiable:
+        # o corpo vazio não é o anexo: sem isso o Django mandaria text/html
+        headers["Content-Type"] = "text/plain"
+        return HttpResponse(status=416, headers={**headers, "Content-Range": f"bytes */{st.st_size}"})
+
+    if byte_range is None or not _if_range_matches(request, etag, st.st_mtime):
+        response = FileResponse(open(path, "rb"), content_type=headers["Content-Type"], filename=filename)
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    start, end = byte_range
+    length = end - start + 1
+    return StreamingHttpResponse(
+        _read_range(path, start, length),
+        status=206,
+        headers={
+            **headers,
+            "Content-Range": f"bytes {start}-{end}/{st.st_size}",
+            "Content-Length": str(length),
+        },
+    )
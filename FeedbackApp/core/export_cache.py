@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+# core/export_cache.py
+"""
+Cache em disco dos arquivos exportados (EXPORT_ROOT/cache/). A chave é o
+recorte (filtros normalizados ou mês) + a versão dos dados desse recorte
+(último updated_at + quantidades): qualquer create/edit/delete dentro dele
+gera outro arquivo, e o mesmo export pedido de novo vira leitura de arquivo.
+
+O tamanho total é limitado por EXPORT_CACHE_MAX_BYTES: cada hit "toca" o
+arquivo (mtime) e, ao gravar um novo, os menos usados recentemente saem.
+
+Hits, misses e remoções são contados no cache "shared" (settings.CACHES),
+somando todos os workers; `manage.py export_cache_stats` mostra os números.
+"""
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max
+from django.utils.text import compress_sequence
+
+from . import profiling
+from .exports import iter_csv, write_pdf, write_xlsx
+from .filters import filter_feedbacks, month_bounds, normalize_filters
+from .models import Feedback, export_storage
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = "cache"
+
+STATS = ("hits", "misses", "evictions")
+LOG_EVERY = 100  # loga os contadores a cada tantos hits (ou misses)
+
+
+def _write_csv(qs, path):
+    with open(path, "wb") as fh:
+        for chunk in iter_csv(qs):
+            fh.write(chunk)
+
+
+def _write_csv_gz(qs, path):
+    with gzip.open(path, "wb") as fh:
+        for chunk in iter_csv(qs):
+            fh.write(chunk)
+
+
+# formato → (extensão, writer(qs, caminho)); os CSVs pedidos pela view vêm de stream_export
+FORMATS = {
+    "csv": ("csv", _write_csv),
+    "csv.gz": ("csv.gz", _write_csv_gz),
+    "xlsx": ("xlsx", write_xlsx),
+}
+
+
+def _count(name, n=1):
+    # incr do cache em arquivo não é atômico entre processos: sob concorrência
+    # alguma contagem pode se perder, o que basta para acompanhar a taxa de acerto
+    shared, key = caches["shared"], f"export_cache:{name}"
+    shared.add(key, 0, None)
+    try:
+        value = shared.incr(key, n)
+    except ValueError:  # apagado entre o add e o incr
+        value = n
+        shared.set(key, value, None)
+    if name != "evictions" and value % LOG_EVERY == 0:
+        logger.info("export cache: %s", export_cache_stats())
+
+
+def export_cache_stats():
+    """Contadores de todos os workers (desde o último reset) + ocupação atual do cache em disco."""
+    counts = caches["shared"].get_many([f"export_cache:{name}" for name in STATS])
+    stats = {name: counts.get(f"export_cache:{name}", 0) for name in STATS}
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+
+    sizes = []
+    for path in glob.glob(os.path.join(export_storage().path(CACHE_DIR), "*", "*")):
+        if not path.endswith(".tmp"):
+            try:
+                sizes.append(os.path.getsize(path))
+            except FileNotFoundError:
+                pass
+    stats.update(files=len(sizes), bytes=sum(sizes), max_bytes=settings.EXPORT_CACHE_MAX_BYTES)
+    return stats
+
+
+def reset_stats():
+    caches["shared"].delete_many([f"export_cache:{name}" for name in STATS])
+
+
+def queryset_version(qs, attachments=False):
+    """Versão dos dados de `qs`: muda a cada create/edit/delete de um feedback do recorte."""
+    agg = {"last": Max("updated_at"), "n": Count("id", distinct=attachments)}
+    if attachments:
+        # a qtd de anexos sai no CSV/Excel, e anexar não mexe no updated_at do feedback
+        agg.update(att_n=Count("attachments"), att_last=Max("attachments__id"))
+    v = qs.order_by().aggregate(**agg)
+    v["last"] = v["last"].timestamp() if v["last"] else 0
+    return ":".join(f"{k}={v[k]}" for k in sorted(v))
+
+
+def month_version(month):
+    """Versão dos feedbacks criados no mês (ValueError se `month` não for 'YYYY-MM')."""
+    start, end = month_bounds(month)
+    return queryset_version(Feedback.objects.filter(created_at__gte=start, created_at__lt=end))
+
+
+def _digest(value):
+    return hashlib.md5(value.encode()).hexdigest()[:16]
+
+
+def _render(path, write):
+    """Gera o arquivo via temporário + rename: leitores nunca veem um export pela metade."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass  # já apagado por outro processo (ou ainda aberto, no Windows)
+
+
+def evict(max_bytes=None, keep=()):
+    """Apaga os arquivos menos usados até o cache caber em `max_bytes`. Retorna (arquivos, bytes)."""
+    if max_bytes is None:
+        max_bytes = settings.EXPORT_CACHE_MAX_BYTES
+    entries = []
+    for path in glob.glob(os.path.join(export_storage().path(CACHE_DIR), "*", "*")):
+        if path.endswith(".tmp"):
+            continue  # em gravação
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = freed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path in keep:
+            continue
+        _remove(path)
+        total -= size
+        removed += 1
+        freed += size
+    if removed:
+        _count("evictions", removed)
+    return removed, freed
+
+
+def _path(kind, prefix, version, ext):
+    return export_storage().path(f"{CACHE_DIR}/{kind}/{prefix}-{_digest(version)}.{ext}")
+
+
+def _open_hit(path):
+    """Arquivo em cache aberto (binário), ou None se ainda não existe."""
+    try:
+        fh = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    _count("hits")
+    try:
+        os.utime(path)  # LRU: usado agora
+    except OSError:
+        pass
+    return fh
+
+
+def _stored(path, prefix, ext):
+    """`path` acabou de entrar no cache: apaga as versões anteriores do recorte e respeita o limite."""
+    for old in glob.glob(os.path.join(os.path.dirname(path), f"{prefix}-*.{ext}")):
+        if old != path:
+            _remove(old)
+    evict(keep={path})
+
+
+def _open(kind, prefix, version, ext, write):
+    """
+    Arquivo em cache (aberto, binário) para (`prefix`, `version`); `write(caminho)`
+    gera em caso de miss. Devolve (arquivo, hit).
+    """
+    path = _path(kind, prefix, version, ext)
+    fh = _open_hit(path)
+    if fh is not None:
+        return fh, True
+
+    _count("misses")
+    with profiling.span(kind):  # Server-Timing: tempo do csv/openpyxl/ReportLab, sem o SQL
+        _render(path, write)
+    fh = open(path, "rb")  # aberto antes de qualquer limpeza: continua legível
+    _stored(path, prefix, ext)
+    return fh, False
+
+
+def _tee(path, prefix, ext, chunks):
+    """
+    Repassa `chunks` e grava uma cópia num temporário, que só entra no cache
+    se o gerador chegar ao fim (cliente que desiste no meio não deixa arquivo).
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp, "wb") as out:
+            for chunk in chunks:
+                out.write(chunk)
+                yield chunk
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    _stored(path, prefix, ext)
+
+
+def stream_export(fmt, params):
+    """
+    CSV ('csv' ou 'csv.gz') dos feedbacks filtrados por `params`. Num hit,
+    (arquivo do cache, True); num miss, (gerador de blocos de bytes, False):
+    o primeiro bloco sai antes da query, como sem cache, e o arquivo é
+    gravado no cache enquanto a resposta é enviada.
+    """
+    filters = normalize_filters(params)
+    qs = filter_feedbacks(filters).order_by("-created_at")
+    prefix = _digest(json.dumps(filters, sort_keys=True))
+    ext = FORMATS[fmt][0]
+    path = _path("csv", prefix, queryset_version(qs, attachments=True), ext)
+    fh = _open_hit(path)
+    if fh is not None:
+        return fh, True
+
+    _count("misses")
+    chunks = iter_csv(qs)
+    if fmt == "csv.gz":
+        chunks = compress_sequence(chunks)
+    return _tee(path, prefix, ext, chunks), False
+
+
+def open_export(fmt, params):
+    """CSV ('csv' ou 'csv.gz') ou Excel ('xlsx') dos feedbacks filtrados por `params`."""
+    ext, writer = FORMATS[fmt]
+    filters = normalize_filters(params)
+    qs = filter_feedbacks(filters).order_by("-created_at")
+    prefix = _digest(json.dumps(filters, sort_keys=True))
+    version = queryset_version(qs, attachments=True)
+    return _open(fmt.split(".")[0], prefix, version, ext, lambda path: writer(qs, path))
+
+
+def open_pdf(month):
+    """PDF do mês (core.exports.write_pdf). ValueError se `month` não for 'YYYY-MM'."""
+    return _open("pdf", month, month_version(month), "pdf", lambda path: write_pdf(month, path))
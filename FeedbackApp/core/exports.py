@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+# core/exports.py
+"""
+Geração das exportações (CSV / Excel / PDF), separada das views para poder ser
+reaproveitada fora do ciclo request/response.
+"""
+import csv
+
+from django.db.models import Max
+from django.db.models.functions import Length
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from .filters import month_bounds
+from .models import Feedback
+from .stats import month_summary
+
+CSV_HEADERS = [
+    "id",
+    "data",
+    "aluno",
+    "operador",
+    "tipo",
+    "assunto",
+    "curso",
+    "turma",
+    "status",
+    "descricao",
+    "anexos_qtd",
+]
+
+# linhas lidas por vez do cursor / linhas por bloco enviado ao cliente
+CSV_CHUNK_SIZE = 2000
+CSV_FLUSH_ROWS = 500
+
+
+class _Echo:
+    """Pseudo-buffer: o csv.writer devolve a linha formatada em vez de guardá-la."""
+
+    def write(self, value):
+        return value
+
+
+def csv_row(f):
+    """Uma linha do CSV. Espera o queryset anotado com `with_attachment_count()`."""
+    return [
+        f.id,
+        f.created_at.strftime("%Y-%m-%d %H:%M"),
+        f.student_name or "",
+        f.operator_name or "",
+        f.type,
+        f.subject,
+        f.course_name or "",
+        f.class_name or "",
+        f.status,
+        (f.description or "").replace("\n", " ").strip()[:500],
+        f.anexos_qtd,
+    ]
+
+
+def iter_csv(qs):
+    """
+    Gera o CSV em blocos de bytes (UTF-8), lendo o queryset com um iterador
+    em chunks — memória constante, e o cabeçalho sai antes da primeira query.
+    """
+    w = csv.writer(_Echo(), delimiter=";")
+    yield w.writerow(CSV_HEADERS).encode("utf-8")
+
+    buf = []
+    for f in qs.with_attachment_count().iterator(chunk_size=CSV_CHUNK_SIZE):
+        buf.append(w.writerow(csv_row(f)))
+        if len(buf) >= CSV_FLUSH_ROWS:
+            yield "".join(buf).encode("utf-8")
+            buf = []
+    if buf:
+        yield "".join(buf).encode("utf-8")
+
+
+# ============ Excel ============
+XLSX_HEADERS = [
+    "ID",
+    "Data",
+    "Aluno",
+    "Operador",
+    "Tipo",
+    "Assunto",
+    "Curso",
+    "Turma",
+    "Status",
+    "Descrição",
+    "Anexos (qtd)",
+]
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+XLSX_MAX_WIDTH = 60
+
+
+def _xlsx_widths(qs):
+    """
+    Larguras das colunas. Na planilha write-only o <cols> é gravado antes das
+    linhas, então as larguras saem de um único agregado no banco em vez de
+    percorrer as células depois.
+    """
+    agg = qs.order_by().aggregate(
+        id=Max("id"),
+        aluno=Max(Length("student_name")),
+        operador=Max(Length("operator_name")),
+        curso=Max(Length("course_name")),
+        turma=Max(Length("class_name")),
+        descricao=Max(Length("description")),
+    )
+
+    def longest(choices):
+        return max(len(label) for _, label in choices)
+
+    content = [
+        len(str(agg["id"] or "")),
+        len("YYYY-MM-DD HH:MM"),
+        agg["aluno"] or 0,
+        agg["operador"] or 0,
+        longest(Feedback.TIPO_CHOICES),
+        longest(Feedback.ASSUNTO_CHOICES),
+        agg["curso"] or 0,
+        agg["turma"] or 0,
+        longest(Feedback.STATUS_CHOICES),
+        agg["descricao"] or 0,
+        0,
+    ]
+    return [min(max(len(h), n) + 2, XLSX_MAX_WIDTH) for h, n in zip(XLSX_HEADERS, content)]
+
+
+def write_xlsx(qs, out):
+    """
+    Grava o .xlsx em `out` (caminho ou arquivo binário) sem limite de linhas:
+    workbook write-only (as linhas vão para arquivo temporário, não para a
+    memória) alimentado por um iterador em chunks.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Feedbacks")
+
+    for col_idx, width in enumerate(_xlsx_widths(qs), 1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = width
+
+    bold = Font(bold=True)
+    header = []
+    for h in XLSX_HEADERS:
+        cell = WriteOnlyCell(ws, value=h)
+        cell.font = bold
+        header.append(cell)
+    ws.append(header)
+
+    tipo_map = dict(Feedback.TIPO_CHOICES)
+    assunto_map = dict(Feedback.ASSUNTO_CHOICES)
+    status_map = dict(Feedback.STATUS_CHOICES)
+
+    for f in qs.with_attachment_count().iterator(chunk_size=CSV_CHUNK_SIZE):
+        ws.append(
+            [
+                f.id,
+                f.created_at.strftime("%Y-%m-%d %H:%M"),
+                f.student_name or "",
+                f.operator_name or "",
+                tipo_map.get(f.type, f.type),
+                assunto_map.get(f.subject, f.subject),
+                f.course_name or "",
+                f.class_name or "",
+                status_map.get(f.status, f.status),
+                (f.description or "").replace("\n", " ").strip(),
+                f.anexos_qtd,
+            ]
+        )
+
+    wb.save(out)
+
+
+# ============ PDF ============
+PDF_HEADERS = ["ID", "Data", "Aluno", "Tipo", "Assunto", "Curso", "Turma", "Status"]
+# larguras fixas (somam a largura útil do A4 com margens de 24pt): o reportlab
+# não precisa medir todas as linhas para descobrir a largura das colunas
+PDF_COL_WIDTHS = [36, 66, 116, 54, 62, 101, 60, 52]
+PDF_FONT_SIZE = 8
+# a tabela de detalhes sai em blocos de ~1 página; uma Table única com
+# milhares de linhas fica quadrática ao ser quebrada em páginas
+PDF_ROWS_PER_TABLE = 45
+
+PDF_TABLE_STYLE = TableStyle(
+    [
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+        ("FONTSIZE", (0, 0), (-1, -1), PDF_FONT_SIZE),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.whitesmoke, colors.white]),
+    ]
+)
+
+
+def _fit(text, width):
+    """Corta o texto para caber na coluna (as células não quebram linha)."""
+    text = str(text or "")
+    width -= 6  # padding da célula
+    if stringWidth(text, "Helvetica", PDF_FONT_SIZE) <= width:
+        return text
+    while text and stringWidth(text + "…", "Helvetica", PDF_FONT_SIZE) > width:
+        text = text[:-1]
+    return text + "…"
+
+
+def pdf_rows(month):
+    """Linhas da tabela de detalhes: todos os feedbacks do mês, do mais novo ao mais antigo."""
+    start, end = month_bounds(month)
+    qs = (
+        Feedback.objects.filter(created_at__gte=start, created_at__lt=end)
+        .order_by("-created_at", "-id")
+        .values_list("id", "created_at", "student_name", "type", "subject", "course_name", "class_name", "status")
+    )
+    tipo_map = dict(Feedback.TIPO_CHOICES)
+    assunto_map = dict(Feedback.ASSUNTO_CHOICES)
+    status_map = dict(Feedback.STATUS_CHOICES)
+    w = PDF_COL_WIDTHS
+
+    for pk, created_at, aluno, tipo, assunto, curso, turma, status in qs.iterator(chunk_size=CSV_CHUNK_SIZE):
+        yield [
+            pk,
+            created_at.strftime("%Y-%m-%d %H:%M"),
+            _fit(aluno, w[2]),
+            tipo_map.get(tipo, tipo),
+            assunto_map.get(assunto, assunto),
+            _fit(curso, w[5]),
+            _fit(turma, w[6]),
+            status_map.get(status, status),
+        ]
+
+
+def _detail_table(rows):
+    return Table([PDF_HEADERS] + rows, colWidths=PDF_COL_WIDTHS, repeatRows=1, style=PDF_TABLE_STYLE)
+
+
+def _page_footer(month):
+    def draw(canvas, doc):
+        canvas.saveState()
+        canvas.setFont("Helvetica", 7)
+        canvas.drawRightString(A4[0] - 24, 12, f"Feedbacks {month} · página {doc.page}")
+        canvas.restoreState()
+
+    return draw
+
+
+def write_pdf(month, out):
+    """Relatório mensal (resumo + todos os feedbacks do mês) em `out` (caminho ou arquivo binário)."""
+    summary = month_summary(month)
+    resumo = {
+        "Total": summary["total"],
+        "Elogios": summary["elogios"],
+        "Reclamações": summary["reclamacoes"],
+        "Sugestões": summary["sugestoes"],
+        "Resolvidos": summary["resolvidos"],
+    }
+
+    doc = SimpleDocTemplate(
+        out, pagesize=A4, rightMargin=24, leftMargin=24, topMargin=24, bottomMargin=24
+    )
+    styles = getSampleStyleSheet()
+    story = []
+
+    story.append(Paragraph("Relatório de Feedbacks", styles["Title"]))
+    story.append(Paragraph(f"Mês: {month}", styles["Normal"]))
+    story.append(Spacer(1, 10))
+
+    data_resumo = [["Métrica", "Valor"]] + [[k, v] for k, v in resumo.items()]
+    t1 = Table(data_resumo, colWidths=[220, 120])
+    t1.setStyle(
+        TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+                ("ALIGN", (1, 1), (-1, -1), "RIGHT"),
+                ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
+            ]
+        )
+    )
+    story.append(t1)
+    story.append(Spacer(1, 12))
+
+    story.append(Paragraph(f"Detalhes ({summary['total']} feedbacks)", styles["Heading3"]))
+    chunk, tables = [], 0
+    for row in pdf_rows(month):
+        chunk.append(row)
+        if len(chunk) == PDF_ROWS_PER_TABLE:
+            story.append(_detail_table(chunk))
+            chunk, tables = [], tables + 1
+    if chunk or not tables:  # mês vazio: só o cabeçalho
+        story.append(_detail_table(chunk))
+
+    footer = _page_footer(month)
+    doc.build(story, onFirstPage=footer, onLaterPages=footer)
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# core/filters.py
+"""
+Filtros da listagem/exportações, independentes do request: recebem qualquer
+mapeamento (request.GET, dict salvo num job, ...).
+"""
+from datetime import datetime
+
+from django.utils import timezone
+
+from .models import Feedback
+from .search import search
+
+FILTER_KEYS = ("q", "aluno", "operador", "curso", "tipo", "assunto", "status", "de", "ate")
+
+
+def normalize_filters(params):
+    """Só os filtros conhecidos e preenchidos, já sem espaços, em ordem fixa."""
+    out = {}
+    for key in FILTER_KEYS:
+        value = (params.get(key) or "").strip()
+        if value:
+            out[key] = value
+    return out
+
+
+def filter_feedbacks(params):
+    """
+    Filtros:
+      q (busca em nomes, curso, turma e descrição), aluno, operador, curso,
+      tipo, assunto, status, de (YYYY-MM-DD), ate (YYYY-MM-DD)
+    Os campos de texto usam o índice de busca (core.search): sem acento,
+    sem maiúsculas, por prefixo.
+    """
+    qs = Feedback.objects.all()
+    f = normalize_filters(params)
+
+    if "q" in f:
+        qs = search(qs, f["q"])
+    if "aluno" in f:
+        qs = search(qs, f["aluno"], ["student_name"])
+    if "operador" in f:
+        qs = search(qs, f["operador"], ["operator_name"])
+    if "curso" in f:
+        qs = search(qs, f["curso"], ["course_name"])
+    if "tipo" in f:
+        qs = qs.filter(type=f["tipo"])
+    if "assunto" in f:
+        qs = qs.filter(subject=f["assunto"])
+    if "status" in f:
+        qs = qs.filter(status=f["status"])
+
+    fmt = "%Y-%m-%d"
+    if "de" in f:
+        try:
+            start_naive = datetime.strptime(f["de"], fmt)
+            start = timezone.make_aware(start_naive)
+            qs = qs.filter(created_at__gte=start)
+        except ValueError:
+            pass
+    if "ate" in f:
+        try:
+            d = datetime.strptime(f["ate"], fmt)
+            end = timezone.make_aware(datetime(d.year, d.month, d.day, 23, 59, 59, 999999))
+            qs = qs.filter(created_at__lte=end)
+        except ValueError:
+            pass
+
+    return qs
+
+
+def month_bounds(ym: str):
+    """ym: 'YYYY-MM' → timezone-aware [start, end) do mês."""
+    y, m = map(int, ym.split("-"))
+    start_naive = datetime(y, m, 1)
+    end_naive = datetime(y + 1, 1, 1) if m == 12 else datetime(y, m + 1, 1)
+    start = timezone.make_aware(start_naive)
+    end = timezone.make_aware(end_naive)
+    return start, end
@@ -60,3 +60,15 @@ class StatusForm(forms.ModelForm):
         fields = ["status"]
         labels = {"status": "Status"}
         widgets = {"status": forms.Select(attrs={"class": "form-control"})}
+
+
+class BulkStatusForm(forms.Form):
+    """Ação em massa da lista: novo status para os selecionados ou para todos os filtrados."""
+    SCOPE_CHOICES = [
+        ("selected", "Selecionados"),
+        ("filtered", "Todos os filtrados"),
+    ]
+
+    # "status" já é o nome do filtro, que vem junto no mesmo POST
+    new_status = forms.ChoiceField(label="Status", choices=Feedback.STATUS_CHOICES)
+    scope = forms.ChoiceField(choices=SCOPE_CHOICES)
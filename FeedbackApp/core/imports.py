@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+# core/imports.py
+"""
+Importação em lote de feedbacks a partir de planilhas no layout das
+exportações: o CSV do export_csv (também .csv.gz) e o .xlsx do export_excel.
+Usado pelo comando `python manage.py import_feedbacks`.
+
+As linhas entram com bulk_create em lotes, um por transação, junto com o
+ponto de retomada (FeedbackImport.rows_read) e os deltas do rollup diário
+(bulk_create não dispara os signals de core.signals). O índice de busca
+acompanha sozinho (triggers, ver core.search).
+"""
+import csv
+import gzip
+import hashlib
+import io
+import itertools
+import time
+from collections import Counter
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import transaction
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from . import rollups
+from .bulk import create_with_timestamps
+from .exports import CSV_HEADERS, XLSX_HEADERS
+from .models import Feedback, FeedbackImport
+
+BATCH_SIZE = 2000
+
+# coluna das exportações → campo do Feedback (id e anexos_qtd são ignorados:
+# os feedbacks importados ganham ids novos e não trazem anexos)
+_FIELDS = [
+    None,
+    "created_at",
+    "student_name",
+    "operator_name",
+    "type",
+    "subject",
+    "course_name",
+    "class_name",
+    "status",
+    "description",
+    None,
+]
+COLUMNS = {
+    **{h.casefold(): f for h, f in zip(XLSX_HEADERS, _FIELDS)},
+    **{h.casefold(): f for h, f in zip(CSV_HEADERS, _FIELDS)},
+}
+REQUIRED = ("created_at", "student_name", "type", "subject")
+DATE_FORMATS = ("%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%d/%m/%Y %H:%M", "%d/%m/%Y")
+
+
+class ImportFileError(ValueError):
+    """Arquivo que não dá para importar (cabeçalho desconhecido, já importado...)."""
+
+
+class RowError(ValueError):
+    """Linha inválida; a mensagem diz o motivo."""
+
+
+# ============ Leitura ============
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _header(names):
+    fields = [COLUMNS.get(str(n or "").strip().casefold(), False) for n in names]
+    unknown = [n for n, f in zip(names, fields) if f is False]
+    if unknown:
+        raise ImportFileError(f"Colunas desconhecidas: {', '.join(map(str, unknown))}")
+    missing = [f for f in REQUIRED if f not in fields]
+    if missing:
+        raise ImportFileError(f"Colunas obrigatórias ausentes: {', '.join(missing)}")
+    return fields
+
+
+def _csv_rows(path):
+    raw = gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+    with io.TextIOWrapper(raw, encoding="utf-8-sig", newline="") as f:
+        first = f.readline()
+        delimiter = ";" if first.count(";") >= first.count(",") else ","
+        yield next(csv.reader([first], delimiter=delimiter))
+        yield from csv.reader(f, delimiter=delimiter)
+
+
+def _xlsx_rows(path):
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb["Feedbacks"] if "Feedbacks" in wb.sheetnames else wb.active
+        yield from ws.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def read_rows(path, skip=0):
+    """(nº da linha no arquivo, {campo: valor}) de cada linha de dados, pulando as `skip` primeiras."""
+    path = str(path)
+    rows = _xlsx_rows(path) if path.lower().endswith(".xlsx") else _csv_rows(path)
+    try:
+        fields = _header(next(rows))
+    except StopIteration:
+        return
+    for n, values in enumerate(itertools.islice(rows, skip, None), start=skip + 2):
+        yield n, {f: v for f, v in zip(fields, values) if f}
+
+
+# ============ Validação ============
+def _choice(value, choices, label):
+    """Aceita a chave ('reclamacao', como no CSV) ou o rótulo ('Reclamação', como no Excel)."""
+    text = str(value or "").strip()
+    for key, name in choices:
+        if text == key or text.casefold() == name.casefold():
+            return key
+    raise RowError(f"{label} inválido: {text!r}")
+
+
+def _datetime(value):
+    """Data/hora em UTC, como sai nas exportações; células de data do Excel também servem."""
+    if isinstance(value, datetime):
+        dt = value
+    elif isinstance(value, date):
+        dt = datetime(value.year, value.month, value.day)
+    else:
+        text = str(value or "").strip()
+        for fmt in DATE_FORMATS:
+            try:
+                dt = datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            raise RowError(f"data inválida: {text!r}")
+    return dt if timezone.is_aware(dt) else timezone.make_aware(dt, dt_timezone.utc)
+
+
+def _text(row, field, required=False):
+    value = row.get(field)
+    text = "" if value is None else str(value).strip()
+    if required and not text:
+        raise RowError(f"{Feedback._meta.get_field(field).verbose_name} vazio")
+    max_length = Feedback._meta.get_field(field).max_length
+    if max_length and len(text) > max_length:
+        raise RowError(f"{Feedback._meta.get_field(field).verbose_name} com mais de {max_length} caracteres")
+    return text or None
+
+
+def parse_row(row):
+    """Feedback (não salvo) a partir de uma linha; RowError se a linha for inválida."""
+    status = row.get("status")
+    return Feedback(
+        created_at=_datetime(row.get("created_at")),
+        student_name=_text(row, "student_name", required=True),
+        operator_name=_text(row, "operator_name"),
+        type=_choice(row.get("type"), Feedback.TIPO_CHOICES, "tipo"),
+        subject=_choice(row.get("subject"), Feedback.ASSUNTO_CHOICES, "assunto"),
+        course_name=_text(row, "course_name"),
+        class_name=_text(row, "class_name"),
+        status=_choice(status, Feedback.STATUS_CHOICES, "status") if str(status or "").strip() else "pendente",
+        description=_text(row, "description"),
+    )
+
+
+# ============ Importação ============
+def _flush(run, batch, read, rejected):
+    deltas = Counter()
+    for fb in batch:
+        deltas.update(rollups.contributions(fb))
+    with transaction.atomic():
+        create_with_timestamps(Feedback, batch)  # mantém o created_at da planilha
+        rollups.apply_deltas(deltas)
+        run.rows_read = read
+        run.imported += len(batch)
+        run.rejected += rejected
+        run.save(update_fields=["rows_read", "imported", "rejected", "updated_at"])
+
+
+def import_file(path, batch_size=BATCH_SIZE, again=False, dry_run=False, on_reject=None, on_progress=None):
+    """
+    Importa `path` e devolve o FeedbackImport. Um arquivo com importação
+    interrompida continua de onde parou; um já importado só entra de novo
+    com `again=True`. `on_reject(linha, erro)` recebe as linhas inválidas e
+    `on_progress(run, linhas_por_segundo)` é chamado a cada lote.
+    """
+    sha = file_sha256(path)
+    run = FeedbackImport.objects.filter(sha256=sha).first()
+    if run and run.status == "done" and not again:
+        raise ImportFileError(f"Arquivo já importado em {run.created_at:%Y-%m-%d %H:%M} (import {run.pk}).")
+    if dry_run:
+        run = FeedbackImport(source=str(path)[-255:], sha256=sha)
+    elif run is None or run.status == "done":
+        run = FeedbackImport.objects.create(source=str(path)[-255:], sha256=sha)
+    else:
+        run.status, run.error = "running", None
+        run.save(update_fields=["status", "error", "updated_at"])
+
+    started, resumed_at = time.monotonic(), run.rows_read
+    batch, read, rejected = [], run.rows_read, 0
+
+    def commit():
+        nonlocal batch, rejected
+        if dry_run:
+            run.rows_read, run.imported, run.rejected = read, run.imported + len(batch), run.rejected + rejected
+        else:
+            _flush(run, batch, read, rejected)
+        batch, rejected = [], 0
+        if on_progress:
+            on_progress(run, (read - resumed_at) / max(time.monotonic() - started, 1e-6))
+
+    try:
+        for line, row in read_rows(path, skip=run.rows_read):
+            read += 1
+            if any(v not in (None, "") for v in row.values()):  # linha em branco: só pula
+                try:
+                    batch.append(parse_row(row))
+                except RowError as exc:
+                    rejected += 1
+                    if on_reject:
+                        on_reject(line, exc)
+            if read - run.rows_read >= batch_size:
+                commit()
+        if read > run.rows_read:
+            commit()
+    except BaseException as exc:
+        if not dry_run:
+            FeedbackImport.objects.filter(pk=run.pk).update(
+                status="failed", error=str(exc) or exc.__class__.__name__, updated_at=timezone.now()
+            )
+        raise
+
+    if not dry_run:
+        run.status = "done"
+        run.save(update_fields=["status", "updated_at"])
+    return run
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+# core/jobs.py
+"""
+Fila de exportações em segundo plano, guardada no próprio banco (ExportJob).
+O processamento roda no comando `python manage.py exportworker`.
+"""
+import logging
+import os
+import shutil
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .export_cache import open_export, open_pdf
+from .filters import normalize_filters
+from .models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+CLEANUP_EVERY = 60  # segundos entre limpezas dentro do loop do worker
+
+
+def _copy(opened, fh):
+    # o arquivo sai do cache de exports (core.export_cache): gera só se mudou algo
+    src, _ = opened
+    with src:
+        shutil.copyfileobj(src, fh)
+
+
+def _write_csv(params, fh):
+    _copy(open_export("csv", params), fh)
+
+
+def _write_xlsx(params, fh):
+    _copy(open_export("xlsx", params), fh)
+
+
+def _write_pdf(params, fh):
+    _copy(open_pdf(params["month"]), fh)
+
+
+RENDERERS = {
+    "csv": _write_csv,
+    "xlsx": _write_xlsx,
+    "pdf": _write_pdf,
+}
+
+
+def enqueue(kind, params, user=None):
+    """Cria o job na fila. `params`: querystring (filtros, ou `month` para o PDF)."""
+    if kind == "pdf":
+        job_params = {"month": (params.get("month") or timezone.now().strftime("%Y-%m")).strip()}
+    else:
+        job_params = normalize_filters(params)
+    return ExportJob.objects.create(kind=kind, params=job_params, requested_by=user)
+
+
+def claim_next():
+    """Pega o job mais antigo da fila; o UPDATE condicional evita dois workers no mesmo job."""
+    queued = ExportJob.objects.filter(status="queued").order_by("created_at", "id")
+    for pk in queued.values_list("pk", flat=True)[:10]:
+        claimed = ExportJob.objects.filter(pk=pk, status="queued").update(
+            status="running", started_at=timezone.now()
+        )
+        if claimed:
+            return ExportJob.objects.get(pk=pk)
+    return None
+
+
+def run_job(job):
+    storage = job.file.storage
+    name = storage.get_available_name(f"{timezone.now():%Y/%m}/feedbacks-{job.pk}.{job.kind}")
+    path = storage.path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    try:
+        with open(path, "wb") as fh:
+            RENDERERS[job.kind](job.params, fh)
+    except Exception as exc:
+        logger.exception("Export job %s failed", job.pk)
+        if os.path.exists(path):
+            os.remove(path)
+        job.status = "failed"
+        job.error = str(exc) or exc.__class__.__name__
+    else:
+        job.file.name = name
+        job.status = "done"
+
+    job.finished_at = timezone.now()
+    # condicional, como claim_next: cleanup() pode ter dado o job como travado nesse meio-tempo
+    finished = ExportJob.objects.filter(pk=job.pk, status="running").update(
+        status=job.status, file=job.file.name or "", error=job.error, finished_at=job.finished_at
+    )
+    if not finished:
+        logger.warning("Export job %s finished after cleanup() gave up on it", job.pk)
+        if job.status == "done":
+            storage.delete(name)
+        job.refresh_from_db()
+    return job
+
+
+def cleanup(now=None):
+    """Remove jobs (e arquivos) vencidos e marca como falhos os que travaram em 'running'."""
+    now = now or timezone.now()
+
+    stuck = ExportJob.objects.filter(
+        status="running", started_at__lt=now - timedelta(seconds=settings.EXPORT_JOB_TIMEOUT)
+    )
+    stuck.update(status="failed", error="Tempo esgotado", finished_at=now)
+
+    expired = ExportJob.objects.filter(finished_at__lt=now - timedelta(seconds=settings.EXPORT_JOB_TTL))
+    removed = 0
+    for job in expired.iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        removed += 1
+    return removed
+
+
+def work(poll=2.0, once=False):
+    """Loop de um processo worker. `once`: esvazia a fila e sai (útil em cron)."""
+    last_cleanup = 0.0
+    while True:
+        close_old_connections()
+        if time.monotonic() - last_cleanup >= CLEANUP_EVERY:
+            cleanup()
+            last_cleanup = time.monotonic()
+
+        job = claim_next()
+        if job is not None:
+            logger.info("Export job %s (%s) started", job.pk, job.kind)
+            run_job(job)
+            logger.info("Export job %s finished: %s", job.pk, job.status)
+            continue
+
+        if once:
+            return
+        time.sleep(poll)
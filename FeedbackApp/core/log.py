@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+# core/log.py
+import logging
+import os
+
+
+class FileHandler(logging.FileHandler):
+    """
+    logging.FileHandler que cria o diretório do arquivo só quando grava a
+    primeira linha (LOG_DIR pode não existir): carregar o settings não cria
+    nada em disco.
+    """
+
+    def __init__(self, filename, mode="a", encoding="utf-8", delay=True, errors=None):
+        super().__init__(filename, mode, encoding, delay, errors)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark ponta a ponta das views (core.benchmark) sobre os dados do banco
+atual; gere volume antes com `manage.py seed_feedbacks`.
+
+    python manage.py benchmark --repeats 10 --compare logs/benchmarks/anterior.json
+"""
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede a latência de cada view de core.views (lista com cada filtro, exports, stats, API...) "
+        "e grava um relatório JSON para comparar execuções. Esvazia o cache de exports antes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeats", type=int, default=benchmark.REPEATS, help="Requests por caso.")
+        parser.add_argument("--out", help="Relatório JSON (padrão: logs/benchmarks/bench-<data>.json).")
+        parser.add_argument("--only", nargs="+", metavar="CASO", help="Roda só estes casos (ex.: export_pdf).")
+        parser.add_argument("--compare", metavar="JSON", help="Relatório anterior para comparar a mediana.")
+        parser.add_argument("--user", default="benchmark", help="Usuário dos requests (entra no grupo Suporte).")
+
+    def handle(self, *args, **opts):
+        if opts["repeats"] < 1:
+            raise CommandError("--repeats precisa ser maior que zero.")
+        previous = None
+        if opts["compare"]:
+            try:
+                with open(opts["compare"], encoding="utf-8") as f:
+                    previous = json.load(f)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Não foi possível ler {opts['compare']}: {exc}")
+
+        def on_result(r):
+            self.stdout.write(
+                f"{r['name']:<28} {r['status']}  p50 {r['p50_ms']:>9.1f} ms  p95 {r['p95_ms']:>9.1f} ms  "
+                f"1ª {r['first_ms']:>9.1f} ms  {r['queries'] if r['queries'] is not None else '?':>3} queries  {r['bytes']:>10,} bytes"
+            )
+
+        report = benchmark.run(
+            repeats=opts["repeats"], username=opts["user"], only=opts["only"], on_result=on_result
+        )
+        for name, reason in report["skipped"].items():
+            self.stdout.write(f"{name:<28} pulado: {reason}")
+
+        out = opts["out"] or os.path.join(settings.LOG_DIR, "benchmarks", f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+        if previous:
+            self.stdout.write("")
+            for name, before, now, pct in benchmark.compare(previous, report):
+                delta = "—" if pct is None else f"{pct:+.1f}%"
+                self.stdout.write(f"{name:<28} p50 {before:>9.1f} → {now:>9.1f} ms  {delta}")
+
+        errors = [r["name"] for r in report["results"] if r["status"] >= 400]
+        if errors:
+            self.stderr.write(f"Respostas com erro: {', '.join(errors)}")
+        self.stdout.write(self.style.SUCCESS(f"Relatório: {out}"))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import sys
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core import changes
+
+
+def _write_token(path, token):
+    # temporário + rename: um token pela metade faria a próxima sync recomeçar do zero
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(token + "\n")
+    os.replace(tmp, path)
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta o feed de mudanças (feedbacks, comentários, anexos e exclusões) em JSON Lines, "
+        "a partir de um token. Com --token-file, lê o token do arquivo e grava o novo ao terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Token de onde continuar (padrão: desde o começo).")
+        parser.add_argument("--token-file", help="Arquivo com o token; atualizado só se tudo correr bem.")
+        parser.add_argument("--out", help="Arquivo .jsonl de saída (padrão: stdout).")
+        parser.add_argument(
+            "--limit", type=int, default=changes.MAX_PAGE_SIZE, help="Itens por consulta ao banco."
+        )
+        parser.add_argument(
+            "--purge", action="store_true", help="Apaga os tombstones mais velhos que a retenção e sai."
+        )
+
+    def handle(self, *args, **opts):
+        if opts["purge"]:
+            n = changes.purge()
+            self.stdout.write(self.style.SUCCESS(f"{n} tombstone(s) apagado(s)."))
+            return
+        if opts["limit"] < 1:
+            raise CommandError("--limit precisa ser maior que zero.")
+
+        token = opts["since"]
+        if token is None and opts["token_file"] and os.path.exists(opts["token_file"]):
+            with open(opts["token_file"], encoding="utf-8") as f:
+                token = f.read().strip() or None
+
+        out = open(opts["out"], "w", encoding="utf-8") if opts["out"] else sys.stdout
+        total = 0
+        try:
+            while True:
+                try:
+                    results, token, has_more = changes.page(token, opts["limit"])
+                except changes.TokenError as exc:
+                    raise CommandError(str(exc))
+                for entry in results:
+                    out.write(json.dumps(entry, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n")
+                total += len(results)
+                if not has_more:
+                    break
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+        if opts["token_file"]:
+            _write_token(opts["token_file"], token)
+        # stdout pode ser a própria saída JSON Lines
+        self.stderr.write(f"{total} mudança(s). Próximo token: {token}")
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import hashlib
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from core import blobs
+from core.models import AttachmentBlob, FeedbackAttachment
+from core.storage import blob_sha
+
+
+def _size(n):
+    return f"{n / 1024 / 1024:.1f} MB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Migra anexos antigos (feedbacks/%Y/%m/...) para o storage deduplicado, "
+        "recalcula as referências dos blobs e, com --gc, apaga blobs sem uso."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Só calcula quanto seria economizado.")
+        parser.add_argument("--gc", action="store_true", help="Apaga blobs sem referência há mais de 1h.")
+
+    def handle(self, *args, **opts):
+        storage = FeedbackAttachment._meta.get_field("file").storage
+        legacy = (
+            FeedbackAttachment.objects.exclude(file__startswith="cas/")
+            .exclude(file="")
+            .values("file")
+            .annotate(n=Count("id"))
+            .order_by("file")
+        )
+
+        # conteúdo que já está no CAS não ocupa espaço novo
+        seen = set(AttachmentBlob.objects.values_list("sha256", flat=True))
+        unique, before, after, moved, missing = 0, 0, 0, 0, 0
+        for i, row in enumerate(list(legacy), 1):
+            name = row["file"]
+            if not storage.exists(name):
+                missing += 1
+                self.stderr.write(f"Arquivo não encontrado: {name}")
+                continue
+
+            size = storage.size(name)
+            before += size
+            if opts["dry_run"]:
+                with storage.open(name) as f:
+                    sha = _sha256(f)
+            else:
+                new_name, n = blobs.adopt(name)
+                sha = blob_sha(new_name)
+                moved += n
+            if sha not in seen:
+                unique += 1
+                after += size
+                seen.add(sha)
+            if i % 100 == 0:
+                self.stdout.write(f"{i} arquivos processados...")
+
+        verb = "seriam liberados" if opts["dry_run"] else "liberados"
+        self.stdout.write(
+            f"{unique} conteúdos novos no storage; {_size(before - after)} {verb}; "
+            f"{moved} anexos repointados; {missing} arquivos ausentes."
+        )
+        if opts["dry_run"]:
+            return
+
+        fixed = blobs.recount()
+        if fixed:
+            self.stdout.write(f"Referências corrigidas em {fixed} blob(s).")
+        if opts["gc"]:
+            removed, freed = blobs.gc()
+            self.stdout.write(f"GC: {removed} blob(s) sem uso apagados ({_size(freed)}).")
+        self.stdout.write(self.style.SUCCESS("Deduplicação concluída."))
+
+
+def _sha256(f):
+    digest = hashlib.sha256()
+    for chunk in f.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
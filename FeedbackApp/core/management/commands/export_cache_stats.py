@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import json
+
+from django.core.management.base import BaseCommand
+
+from core import export_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Mostra os contadores do cache de exports (hits, misses, remoções e taxa de acerto, somando "
+        "todos os workers) e a ocupação atual em disco. Com --reset, zera os contadores."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+        parser.add_argument("--reset", action="store_true", help="Zera os contadores depois de mostrar.")
+
+    def handle(self, *args, **opts):
+        stats = export_cache.export_cache_stats()
+        if opts["json"]:
+            self.stdout.write(json.dumps(stats))
+        else:
+            self.stdout.write(
+                f"{stats['hits']} hits, {stats['misses']} misses (taxa de acerto {stats['hit_rate']:.1%}), "
+                f"{stats['evictions']} removidos; em disco: {stats['files']} arquivo(s), "
+                f"{stats['bytes'] / 2**20:.1f} de {stats['max_bytes'] / 2**20:.0f} MB"
+            )
+        if opts["reset"]:
+            export_cache.reset_stats()
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import multiprocessing
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+def _worker_process(poll, once):
+    # Sem fork (Windows/spawn) o processo filho precisa configurar o Django sozinho.
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "FeedbackApp.settings")
+    import django
+
+    django.setup()
+    from core.jobs import work
+
+    work(poll=poll, once=once)
+
+
+class Command(BaseCommand):
+    help = "Processa a fila de exportações (ExportJob) com um pool local de processos."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=settings.EXPORT_WORKER_PROCESSES,
+            help="Quantidade de processos worker.",
+        )
+        parser.add_argument("--poll", type=float, default=2.0, help="Intervalo (s) entre consultas à fila.")
+        parser.add_argument("--once", action="store_true", help="Esvazia a fila e sai (para uso em cron).")
+
+    def handle(self, *args, **opts):
+        n = max(1, opts["processes"])
+        if n == 1:
+            from core.jobs import work
+
+            work(poll=opts["poll"], once=opts["once"])
+            return
+
+        # conexões abertas não podem ser herdadas pelos filhos
+        connections.close_all()
+        procs = [
+            multiprocessing.Process(target=_worker_process, args=(opts["poll"], opts["once"]), daemon=True)
+            for _ in range(n)
+        ]
+        for p in procs:
+            p.start()
+        self.stdout.write(f"{n} export workers iniciados.")
+        try:
+            for p in procs:
+                p.join()
+        except KeyboardInterrupt:
+            for p in procs:
+                p.terminate()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand, CommandError
+
+from core.imports import BATCH_SIZE, ImportFileError, import_file
+
+MAX_REPORTED = 50  # linhas rejeitadas listadas uma a uma; o resto só entra na contagem
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa feedbacks de um CSV (.csv/.csv.gz) ou Excel (.xlsx) no layout das exportações. "
+        "Linhas inválidas são listadas e puladas; uma importação interrompida continua de onde "
+        "parou ao rodar o comando de novo com o mesmo arquivo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--batch-size", type=int, default=BATCH_SIZE, help=f"Linhas por transação (padrão {BATCH_SIZE})."
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Só valida o arquivo, sem gravar nada.")
+        parser.add_argument("--again", action="store_true", help="Importa de novo um arquivo já importado.")
+
+    def handle(self, *args, **opts):
+        if opts["batch_size"] < 1:
+            raise CommandError("--batch-size precisa ser maior que zero.")
+        rejected = 0
+
+        def on_reject(line, exc):
+            nonlocal rejected
+            rejected += 1
+            if rejected <= MAX_REPORTED:
+                self.stderr.write(f"linha {line}: {exc}")
+
+        def on_progress(run, rate):
+            self.stdout.write(
+                f"{run.rows_read} linhas: {run.imported} importadas, {run.rejected} rejeitadas ({rate:,.0f} linhas/s)"
+            )
+
+        try:
+            run = import_file(
+                opts["path"],
+                batch_size=opts["batch_size"],
+                again=opts["again"],
+                dry_run=opts["dry_run"],
+                on_reject=on_reject,
+                on_progress=on_progress,
+            )
+        except FileNotFoundError:
+            raise CommandError(f"Arquivo não encontrado: {opts['path']}")
+        except ImportFileError as exc:
+            raise CommandError(str(exc))
+        except Exception:
+            if not opts["dry_run"]:
+                self.stderr.write("Importação interrompida: rode o mesmo comando para continuar de onde parou.")
+            raise
+
+        if rejected > MAX_REPORTED:
+            self.stderr.write(f"... mais {rejected - MAX_REPORTED} linha(s) rejeitada(s).")
+        verb = "válidas" if opts["dry_run"] else "importadas"
+        self.stdout.write(
+            self.style.SUCCESS(f"{run.imported} linhas {verb}, {run.rejected} rejeitadas ({run.rows_read} lidas).")
+        )
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+
+from core.media import PROCESSORS, process
+from core.models import FeedbackAttachment
+
+CHUNK = 100
+
+
+class Command(BaseCommand):
+    help = (
+        "Processa anexos já existentes aqui mesmo, sem worker (derivados de imagem, metadados de áudio). "
+        "Por padrão só os pendentes; --failed tenta de novo os que falharam, --force refaz todos e "
+        "--stage roda uma etapa em todos os anexos a que ela se aplica."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--failed", action="store_true", help="Inclui anexos com falha.")
+        parser.add_argument("--force", action="store_true", help="Reprocessa tudo e regrava os derivados.")
+        parser.add_argument("--stage", choices=sorted(PROCESSORS), help="Só esta etapa (ignora o media_status).")
+
+    def handle(self, *args, **opts):
+        qs = FeedbackAttachment.objects.order_by("id")
+        stages = [opts["stage"]] if opts["stage"] else None
+        if stages:
+            # cada etapa pula sozinha o que já foi feito (derivado existente, media_info preenchido)
+            qs = qs.filter(PROCESSORS[opts["stage"]].candidates)
+        elif not opts["force"]:
+            qs = qs.filter(media_status__in=["pending", "failed"] if opts["failed"] else ["pending"])
+
+        # ids antes: o processamento muda o media_status das linhas que seriam lidas
+        ids = list(qs.values_list("pk", flat=True))
+        counts = {"done": 0, "failed": 0}
+        for start in range(0, len(ids), CHUNK):
+            for att in FeedbackAttachment.objects.filter(pk__in=ids[start : start + CHUNK]).order_by("id"):
+                counts[process(att, force=opts["force"], stages=stages)] += 1
+            self.stdout.write(f"{min(start + CHUNK, len(ids))}/{len(ids)} anexos...")
+
+        self.stdout.write(self.style.SUCCESS(f"{counts['done']} processados, {counts['failed']} com falha."))
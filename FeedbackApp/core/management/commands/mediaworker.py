@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+
+from core.media import work
+
+
+class Command(BaseCommand):
+    help = (
+        "Processa anexos pendentes fora do request: miniaturas e prévias de imagens, duração e "
+        "metadados de áudio/vídeo (etapas em core.media.PROCESSORS)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--poll", type=float, default=2.0, help="Intervalo (s) entre consultas à fila.")
+        parser.add_argument("--once", action="store_true", help="Esvazia a fila e sai (para uso em cron).")
+
+    def handle(self, *args, **opts):
+        work(poll=opts["poll"], once=opts["once"])
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import rollups
+
+
+def _date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Data inválida: {value!r} (use YYYY-MM-DD)")
+
+
+class Command(BaseCommand):
+    help = "Reconstrói ou verifica o rollup diário de feedbacks (FeedbackDailyStat)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["rebuild", "verify"])
+        parser.add_argument("--de", type=_date, help="Primeiro dia (YYYY-MM-DD).")
+        parser.add_argument("--ate", type=_date, help="Último dia, inclusive (YYYY-MM-DD).")
+
+    def handle(self, *args, **opts):
+        start = opts["de"]
+        end = opts["ate"] + timedelta(days=1) if opts["ate"] else None
+
+        if opts["action"] == "rebuild":
+            n = rollups.rebuild(start, end)
+            self.stdout.write(self.style.SUCCESS(f"Rollup reconstruído: {n} linhas."))
+            return
+
+        diffs = rollups.verify(start, end)
+        for (day, dim, key), (expected, current) in sorted(diffs.items()):
+            self.stdout.write(f"{day} {dim}={key or '—'}: esperado {expected}, gravado {current}")
+        if diffs:
+            raise CommandError(f"{len(diffs)} divergência(s). Rode 'manage.py rollups rebuild'.")
+        self.stdout.write(self.style.SUCCESS("Rollup consistente."))
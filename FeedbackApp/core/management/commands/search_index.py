@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Recria triggers e reindexa a busca de feedbacks (FTS5). Rode após migrations "
+        "que recriem a tabela core_feedback, pois o SQLite descarta os triggers junto "
+        "(o system check core.E001 acusa isso no migrate e em `check --database default`)."
+    )
+
+    def handle(self, *args, **opts):
+        if connection.vendor != "sqlite":
+            self.stdout.write("Banco não é SQLite: a busca usa icontains, nada a fazer.")
+            return
+        search.install(connection)
+        self.stdout.write(self.style.SUCCESS("Índice de busca reconstruído."))
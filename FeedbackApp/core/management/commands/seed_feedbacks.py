@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.seed import BATCH_SIZE, generate
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera feedbacks, comentários e anexos sintéticos (nomes em português, cursos reais, datas "
+        "concentradas nos meses recentes) para testes de carga e `manage.py benchmark`. "
+        "Não use no banco de produção."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--feedbacks", type=int, default=10_000, help="Quantos feedbacks (padrão 10.000).")
+        parser.add_argument("--comments", type=float, default=1.5, help="Média de comentários por feedback.")
+        parser.add_argument("--attachments", type=float, default=0.3, help="Média de anexos por feedback.")
+        parser.add_argument("--days", type=int, default=730, help="Espalha as datas pelos últimos N dias.")
+        parser.add_argument("--seed", type=int, help="Semente do gerador (mesma semente, mesmos dados).")
+        parser.add_argument(
+            "--batch-size", type=int, default=BATCH_SIZE, help=f"Feedbacks por transação (padrão {BATCH_SIZE})."
+        )
+
+    def handle(self, *args, **opts):
+        if opts["feedbacks"] < 0 or opts["batch_size"] < 1 or opts["days"] < 1:
+            raise CommandError("--feedbacks precisa ser >= 0; --batch-size e --days, maiores que zero.")
+        if opts["comments"] < 0 or opts["attachments"] < 0:
+            raise CommandError("--comments e --attachments não podem ser negativos.")
+        started = time.monotonic()
+
+        def on_progress(totals):
+            rate = totals["feedbacks"] / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(
+                f"{totals['feedbacks']}/{opts['feedbacks']} feedbacks, {totals['comments']} comentários, "
+                f"{totals['attachments']} anexos ({rate:,.0f} feedbacks/s)"
+            )
+
+        totals = generate(
+            opts["feedbacks"],
+            comments=opts["comments"],
+            attachments=opts["attachments"],
+            days=opts["days"],
+            seed=opts["seed"],
+            batch_size=opts["batch_size"],
+            on_progress=on_progress,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{totals['feedbacks']} feedbacks, {totals['comments']} comentários e {totals['attachments']} anexos "
+                f"criados em {time.monotonic() - started:.1f}s."
+            )
+        )
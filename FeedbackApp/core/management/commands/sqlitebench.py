@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de concorrência no SQLite: N processos gravando feedbacks e M
+processos lendo (página da lista + resumo do mês) ao mesmo tempo, num banco
+descartável. Compara o perfil atual ("tuned": WAL, OPTIONS de
+settings.DATABASES e escritas em core.db.immediate_atomic, como nas views)
+com o "legacy" (journal em DELETE, transaction.atomic() DEFERRED), que era
+o padrão antes do WAL. As escritas alternam criar um feedback e trocar o
+status de um existente (lê e depois grava, com o rollup diário junto): é
+nesse caso que o BEGIN DEFERRED falha ao promover a transação para escrita.
+
+    python manage.py sqlitebench --writers 4 --readers 4 --seconds 10
+"""
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+
+LEGACY_OPTIONS = {"timeout": 20}
+SEED_ROWS = 2000
+
+
+def _profiles():
+    """{perfil: (OPTIONS da conexão, journal_mode do arquivo, escritas com BEGIN IMMEDIATE)}."""
+    return {
+        "legacy": (LEGACY_OPTIONS, "DELETE", False),
+        "tuned": (dict(settings.DATABASES["default"].get("OPTIONS", {})), "WAL", True),  # WAL: migração core 0011
+    }
+
+
+def _use_database(name, options):
+    """Aponta a conexão default para o banco de benchmark (o dict é o mesmo de settings.DATABASES)."""
+    conn = connections["default"]
+    conn.close()
+    conn.settings_dict["NAME"] = name
+    conn.settings_dict["OPTIONS"] = dict(options)
+
+
+def _writer(name, options, immediate, start_at, stop_at, out):
+    from core.db import immediate_atomic
+    from core.models import Feedback
+
+    _use_database(name, options)
+    atomic = immediate_atomic if immediate else transaction.atomic
+    rng = random.Random(os.getpid())
+    ok, errors, lat = 0, 0, []
+    i = 0
+    while time.time() < start_at:
+        time.sleep(0.01)
+    while time.time() < stop_at:
+        i += 1
+        t0 = time.perf_counter()
+        try:
+            with atomic():
+                if i % 2:  # como feedback_create
+                    Feedback.objects.create(
+                        student_name=f"Bench {os.getpid()}-{i}",
+                        course_name="Benchmark",
+                        type="sugestao",
+                        subject="outros",
+                        description="carga de escrita",
+                    )
+                else:  # como a troca de status do feedback_detail: lê o feedback, depois grava
+                    fb = Feedback.objects.get(pk=rng.randint(1, SEED_ROWS))
+                    fb.status = "resolvido" if fb.status != "resolvido" else "pendente"
+                    fb.save()
+            ok += 1
+            lat.append(time.perf_counter() - t0)
+        except OperationalError:
+            errors += 1
+    out.put({"role": "writer", "ok": ok, "errors": errors, "latencies": lat})
+
+
+def _reader(name, options, immediate, start_at, stop_at, out):
+    from core.models import Feedback
+    from core.pagination import keyset_page
+    from core.stats import month_summary
+
+    _use_database(name, options)
+    ym = time.strftime("%Y-%m")
+    ok, errors, lat = 0, 0, []
+    while time.time() < start_at:
+        time.sleep(0.01)
+    while time.time() < stop_at:
+        t0 = time.perf_counter()
+        try:
+            list(keyset_page(Feedback.objects.with_attachment_count(), 25))
+            month_summary(ym)
+            ok += 1
+            lat.append(time.perf_counter() - t0)
+        except OperationalError:
+            errors += 1
+    out.put({"role": "reader", "ok": ok, "errors": errors, "latencies": lat})
+
+
+def _child(target, *args):
+    # Sem fork (Windows/spawn) o processo filho precisa configurar o Django sozinho.
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "FeedbackApp.settings")
+    import django
+
+    django.setup()
+    target(*args)
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+class Command(BaseCommand):
+    help = "Mede vazão de escrita e latência de leitura no SQLite com processos concorrentes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--seconds", type=float, default=10.0)
+        parser.add_argument(
+            "--profile",
+            choices=["legacy", "tuned", "both"],
+            default="both",
+            help="legacy = DELETE/DEFERRED; tuned = WAL, OPTIONS do settings e BEGIN IMMEDIATE nas escritas.",
+        )
+        parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+
+    def handle(self, *args, **opts):
+        if connections["default"].vendor != "sqlite":
+            self.stderr.write("sqlitebench só faz sentido com SQLite.")
+            return
+
+        original = dict(connections["default"].settings_dict)
+        profiles = _profiles()  # antes de _use_database, que troca o OPTIONS do settings
+        names = ["legacy", "tuned"] if opts["profile"] == "both" else [opts["profile"]]
+        results = {}
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                for name in names:
+                    results[name] = self._run(Path(tmp) / f"{name}.sqlite3", *profiles[name], opts)
+        finally:
+            _use_database(original["NAME"], original["OPTIONS"])
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:>6}: escrita {r['writes_per_s']:.1f}/s ({r['write_errors']} erros, "
+                f"p95 {r['write_p95_ms']} ms) | leitura {r['reads_per_s']:.1f}/s "
+                f"(p50 {r['read_p50_ms']} ms, p95 {r['read_p95_ms']} ms, p99 {r['read_p99_ms']} ms)"
+            )
+
+    def _run(self, path, options, journal_mode, immediate, opts):
+        _use_database(str(path), options)
+        call_command("migrate", verbosity=0)
+        with connections["default"].cursor() as cur:
+            cur.execute(f"PRAGMA journal_mode={journal_mode}")
+        self._seed()
+        connections.close_all()  # conexões abertas não podem ser herdadas pelos filhos
+
+        out = multiprocessing.Queue()
+        start_at = time.time() + 1.0  # dá tempo de todos os filhos subirem
+        stop_at = start_at + opts["seconds"]
+        roles = [_writer] * opts["writers"] + [_reader] * opts["readers"]
+        procs = [
+            multiprocessing.Process(target=_child, args=(role, str(path), options, immediate, start_at, stop_at, out))
+            for role in roles
+        ]
+        for p in procs:
+            p.start()
+        parts = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+        w_lat = sorted(x for r in parts if r["role"] == "writer" for x in r["latencies"])
+        r_lat = sorted(x for r in parts if r["role"] == "reader" for x in r["latencies"])
+        secs = opts["seconds"]
+        return {
+            "writers": opts["writers"],
+            "readers": opts["readers"],
+            "seconds": secs,
+            "writes_per_s": len(w_lat) / secs,
+            "write_errors": sum(r["errors"] for r in parts if r["role"] == "writer"),
+            "write_p95_ms": _ms(_percentile(w_lat, 95)),
+            "reads_per_s": len(r_lat) / secs,
+            "read_errors": sum(r["errors"] for r in parts if r["role"] == "reader"),
+            "read_p50_ms": _ms(_percentile(r_lat, 50)),
+            "read_p95_ms": _ms(_percentile(r_lat, 95)),
+            "read_p99_ms": _ms(_percentile(r_lat, 99)),
+        }
+
+    def _seed(self):
+        from core.models import Feedback
+
+        Feedback.objects.bulk_create(
+            (
+                Feedback(
+                    student_name=f"Aluno {i}",
+                    course_name="Benchmark",
+                    type="elogio",
+                    subject="outros",
+                    description="linha inicial",
+                )
+                for i in range(SEED_ROWS)
+            ),
+            batch_size=500,
+        )
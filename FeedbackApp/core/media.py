@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# core/media.py
+"""
+Processamento de anexos fora do request. Todo anexo nasce com
+media_status='pending'; o comando `python manage.py mediaworker` pega os
+pendentes, gera o que se aplica ao arquivo (derivados de imagem em
+core.thumbnails, duração e metadados de áudio/vídeo em core.audio) e marca
+'done' ou 'failed'.
+
+Processar o mesmo anexo duas vezes é inofensivo (os derivados são gravados
+por rename atômico), então não há estado "running" nem lock por anexo.
+"""
+import logging
+import time
+from collections import namedtuple
+
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from . import audio, thumbnails
+from .models import FeedbackAttachment
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 20
+
+
+def extract_audio(att, force=False):
+    """Preenche duration_seconds e media_info lendo só os cabeçalhos do arquivo."""
+    if att.media_info and not force:
+        return
+    with att.file.open("rb") as f:
+        info = audio.probe(f)
+    duration = info.get("duration")
+    att.duration_seconds = round(duration) if duration is not None else None
+    att.media_info = info
+    FeedbackAttachment.objects.filter(pk=att.pk).update(
+        duration_seconds=att.duration_seconds, media_info=info, updated_at=timezone.now()
+    )
+
+
+# applies(anexo) → bool; run(anexo, force); candidates: o mesmo critério como filtro
+# (para o backfill de uma etapa só)
+Stage = namedtuple("Stage", "applies run candidates")
+
+PROCESSORS = {
+    "thumbnails": Stage(thumbnails.is_image, thumbnails.generate, Q(mime_type__startswith="image/")),
+    "audio": Stage(
+        audio.is_media,
+        extract_audio,
+        Q(mime_type__startswith="audio/") | Q(mime_type__startswith="video/"),
+    ),
+}
+
+
+def process(att, force=False, stages=None):
+    """Roda as etapas (todas, ou só `stages`) que se aplicam e grava o media_status. Retorna o status."""
+    status = "done"
+    for name, stage in PROCESSORS.items():
+        if stages and name not in stages or not stage.applies(att):
+            continue
+        try:
+            stage.run(att, force=force)
+        except ValueError as exc:  # arquivo que não é o que diz ser (imagem corrompida etc.)
+            logger.warning("Attachment %s: %s", att.pk, exc)
+            status = "failed"
+        except Exception:
+            logger.exception("Attachment %s: media processing failed", att.pk)
+            status = "failed"
+    # update() não passa pelo auto_now: updated_at explícito (feed de mudanças, cache de exports)
+    FeedbackAttachment.objects.filter(pk=att.pk).update(media_status=status, updated_at=timezone.now())
+    att.media_status = status
+    return status
+
+
+def pending(limit=BATCH_SIZE):
+    return list(FeedbackAttachment.objects.filter(media_status="pending").order_by("id")[:limit])
+
+
+def work(poll=2.0, once=False):
+    """Loop do worker. `once`: esvazia a fila e sai (útil em cron)."""
+    while True:
+        close_old_connections()
+        batch = pending()
+        for att in batch:
+            process(att)
+        if batch:
+            continue
+        if once:
+            return
+        time.sleep(poll)
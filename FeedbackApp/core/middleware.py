@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# core/middleware.py
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+
+from . import profiling
+
+logger = logging.getLogger("core.profiling")
+
+SESSION_TOUCH_KEY = "_touched_at"
+
+
+class SlidingSessionMiddleware(SessionMiddleware):
+    """
+    Expiração deslizante (SESSION_COOKIE_AGE a partir do último uso) sem gravar
+    a sessão em todo request: só salva quando os dados mudam ou quando o último
+    "toque" tem mais de SESSION_TOUCH_INTERVAL segundos. Requests só de leitura
+    dentro do intervalo não escrevem nada no banco.
+
+    Substitui SessionMiddleware; use com SESSION_SAVE_EVERY_REQUEST = False.
+    """
+
+    def process_response(self, request, response):
+        session = getattr(request, "session", None)
+        if session is not None and not session.is_empty():
+            now = int(time.time())
+            if now - session.get(SESSION_TOUCH_KEY, 0) >= settings.SESSION_TOUCH_INTERVAL:
+                # marca a sessão como modificada → salva e renova o cookie
+                session[SESSION_TOUCH_KEY] = now
+        return super().process_response(request, response)
+
+
+class RequestProfilingMiddleware:
+    """
+    Mede cada request (core.profiling): SQL (quantidade e tempo), render de
+    templates (backend core.profiling.ProfiledDjangoTemplates), geração de
+    exports e o resto da view vão no header Server-Timing, enviado só a
+    usuários staff (ou a todos com DEBUG). Requests acima de PROFILING_SLOW_MS entram no log com as
+    queries mais caras (amostrados por PROFILING_SLOW_SAMPLE).
+
+    `?_profile=1` de um usuário staff roda a view sob cProfile e grava o
+    .prof em PROFILING_DUMP_DIR (nome no header X-Profile-Dump).
+
+    Fica logo depois do SecurityMiddleware para medir também sessão e auth.
+    """
+
+    PROFILE_FLAG = "_profile"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with profiling.measure() as profile:
+            response = self.get_response(request)
+            profiler = getattr(request, "_profiler", None)
+            if profiler is not None:
+                response["X-Profile-Dump"] = profiling.dump_profile(profiler, request)
+
+            if settings.PROFILING_SERVER_TIMING and self.show_timing(request):
+                response["Server-Timing"] = profiling.server_timing(profile, response.streaming)
+            if profiling.should_log(profile):
+                logger.warning(
+                    "slow request: %s",
+                    json.dumps(profiling.slow_record(request, response, profile), ensure_ascii=False),
+                )
+        return response
+
+    @staticmethod
+    def show_timing(request):
+        # tempos e quantidade de queries revelam detalhes internos: só staff (ou DEBUG)
+        user = getattr(request, "user", None)
+        return settings.DEBUG or bool(user and user.is_staff)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # o usuário só é conhecido depois do AuthenticationMiddleware: liga aqui, desliga em __call__
+        if request.GET.get(self.PROFILE_FLAG) == "1" and request.user.is_staff:
+            request._profiler = profiling.start_profiler()
+        return None
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:47
+
+import core.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('csv', 'CSV'), ('xlsx', 'Excel'), ('pdf', 'PDF')], max_length=8, verbose_name='Formato')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='Filtros')),
+                ('status', models.CharField(choices=[('queued', 'Na fila'), ('running', 'Processando'), ('done', 'Concluído'), ('failed', 'Falhou')], db_index=True, default='queued', max_length=12, verbose_name='Status')),
+                ('file', models.FileField(blank=True, storage=core.models.export_storage, upload_to='')),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:50
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill(apps, schema_editor):
+    Feedback = apps.get_model('core', 'Feedback')
+    FeedbackDailyStat = apps.get_model('core', 'FeedbackDailyStat')
+    counts = Counter()
+    rows = Feedback.objects.order_by().values_list('created_at', 'type', 'subject', 'course_name', 'status')
+    for created_at, type_, subject, course, status in rows.iterator():
+        day = timezone.localdate(created_at)
+        counts[(day, 'type', type_ or '')] += 1
+        counts[(day, 'subject', subject or '')] += 1
+        counts[(day, 'course', course or '')] += 1
+        counts[(day, 'status', status or '')] += 1
+    FeedbackDailyStat.objects.bulk_create(
+        (FeedbackDailyStat(day=d, dimension=dim, key=k, count=n) for (d, dim, k), n in counts.items()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_exportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('dimension', models.CharField(choices=[('type', 'Tipo'), ('subject', 'Assunto'), ('course', 'Curso'), ('status', 'Status')], max_length=12)),
+                ('key', models.CharField(blank=True, default='', max_length=160)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'dimension', 'key'), name='uniq_daily_stat')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+# SQL congelado aqui (não importa core.search): mudar o módulo depois não pode
+# mudar o que esta migração já fez em bancos existentes.
+COLUMNS = 'student_name, operator_name, course_name, class_name, description'
+NEW = 'new.student_name, new.operator_name, new.course_name, new.class_name, new.description'
+OLD = 'old.student_name, old.operator_name, old.course_name, old.class_name, old.description'
+
+INSTALL_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS core_feedback_fts USING fts5(
+        {COLUMNS},
+        content='core_feedback', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_feedback_fts_ai AFTER INSERT ON core_feedback BEGIN
+        INSERT INTO core_feedback_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_feedback_fts_ad AFTER DELETE ON core_feedback BEGIN
+        INSERT INTO core_feedback_fts(core_feedback_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_feedback_fts_au AFTER UPDATE OF {COLUMNS} ON core_feedback BEGIN
+        INSERT INTO core_feedback_fts(core_feedback_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD});
+        INSERT INTO core_feedback_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW});
+    END""",
+    "INSERT INTO core_feedback_fts(core_feedback_fts) VALUES ('rebuild')",
+]
+
+UNINSTALL_SQL = [
+    'DROP TRIGGER IF EXISTS core_feedback_fts_ai',
+    'DROP TRIGGER IF EXISTS core_feedback_fts_ad',
+    'DROP TRIGGER IF EXISTS core_feedback_fts_au',
+    'DROP TABLE IF EXISTS core_feedback_fts',
+]
+
+
+def run(statements):
+    def apply(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return  # em outros bancos a busca usa icontains
+        for sql in statements:
+            schema_editor.execute(sql)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_feedbackdailystat'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(INSTALL_SQL), run(UNINSTALL_SQL)),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_feedback_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['created_at'], name='feedback_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['status', 'created_at'], name='feedback_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['type', 'created_at'], name='feedback_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['subject', 'created_at'], name='feedback_subject_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['updated_at'], name='feedback_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_attachment_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedbackattachment',
+            name='media_status',
+            field=models.CharField(choices=[('pending', 'Pendente'), ('done', 'Processado'), ('failed', 'Falhou')], db_index=True, default='pending', max_length=10),
+        ),
+    ]
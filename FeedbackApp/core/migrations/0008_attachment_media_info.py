@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:11
+
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def requeue_media(apps, schema_editor):
+    # áudios/vídeos já processados antes desta etapa existir voltam para a fila do mediaworker
+    FeedbackAttachment = apps.get_model('core', 'FeedbackAttachment')
+    FeedbackAttachment.objects.filter(
+        Q(mime_type__startswith='audio/') | Q(mime_type__startswith='video/'),
+        media_status='done',
+    ).update(media_status='pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_attachment_media_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedbackattachment',
+            name='media_info',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(requeue_media, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_attachment_media_info'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, verbose_name='Arquivo')),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('status', models.CharField(choices=[('running', 'Importando'), ('done', 'Concluído'), ('failed', 'Falhou')], default='running', max_length=12, verbose_name='Status')),
+                ('rows_read', models.IntegerField(default=0)),
+                ('imported', models.IntegerField(default=0)),
+                ('rejected', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
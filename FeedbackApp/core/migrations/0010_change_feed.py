@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:26
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    # linhas antigas: a última mudança conhecida é a criação
+    for model in ('FeedbackAttachment', 'FeedbackComment'):
+        apps.get_model('core', model).objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_feedbackimport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('feedback', 'Feedback'), ('comment', 'Comentário'), ('attachment', 'Anexo')], max_length=12)),
+                ('object_id', models.IntegerField()),
+                ('feedback_id', models.IntegerField(blank=True, null=True)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='feedbackattachment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='feedbackcomment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def set_journal_mode(mode):
+    def run(apps, schema_editor):
+        # o modo WAL fica gravado no arquivo do banco: basta ligar uma vez
+        if schema_editor.connection.vendor == 'sqlite':
+            schema_editor.execute(f'PRAGMA journal_mode={mode}')
+    return run
+
+
+class Migration(migrations.Migration):
+    # PRAGMA journal_mode não pode rodar dentro de uma transação
+    atomic = False
+
+    dependencies = [
+        ('core', '0010_change_feed'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_journal_mode('WAL'), set_journal_mode('DELETE')),
+    ]
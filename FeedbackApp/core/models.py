@@ -1,4 +1,26 @@
-﻿from django.db import models
+﻿from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .storage import ContentAddressedStorage
+
+
+class FeedbackQuerySet(models.QuerySet):
+    def with_attachment_count(self):
+        """Anota `anexos_qtd` numa subconsulta correlata (sem 1 query por linha, sem GROUP BY)."""
+        counts = (
+            FeedbackAttachment.objects.filter(feedback=OuterRef("pk"))
+            .order_by()
+            .values("feedback")
+            .annotate(n=Count("id"))
+            .values("n")
+        )
+        return self.annotate(
+            anexos_qtd=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+        )
+
 
 class Feedback(models.Model):
     TIPO_CHOICES = [
@@ -36,28 +58,185 @@ class Feedback(models.Model):
     created_at  = models.DateTimeField(auto_now_add=True)
     updated_at  = models.DateTimeField(auto_now=True)
 
+    objects = FeedbackQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        # Filtros de igualdade da listagem/exportações + ordenação por data
+        # (core.filters), e updated_at para a versão dos dados do dashboard.
+        # Conferidos com EXPLAIN QUERY PLAN em core.tests.QueryPlanTests.
+        indexes = [
+            models.Index(fields=['created_at'], name='feedback_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='feedback_status_created_idx'),
+            models.Index(fields=['type', 'created_at'], name='feedback_type_created_idx'),
+            models.Index(fields=['subject', 'created_at'], name='feedback_subject_created_idx'),
+            models.Index(fields=['updated_at'], name='feedback_updated_idx'),
+        ]
 
     def __str__(self):
         return f'#{self.id} - {self.student_name} - {self.type}'
 
+def attachment_storage():
+    """Anexos deduplicados por conteúdo (core.storage); uploads antigos seguem no mesmo MEDIA_ROOT."""
+    return ContentAddressedStorage()
+
+
 class FeedbackAttachment(models.Model):
+    # processamento fora do request (core.media): derivados de imagem, metadados de áudio
+    MEDIA_STATUS_CHOICES = [
+        ('pending', 'Pendente'),
+        ('done', 'Processado'),
+        ('failed', 'Falhou'),
+    ]
+
     feedback   = models.ForeignKey(Feedback, on_delete=models.CASCADE, related_name='attachments')
-    file       = models.FileField(upload_to='feedbacks/%Y/%m/')
+    file       = models.FileField(upload_to='feedbacks/%Y/%m/', storage=attachment_storage)
+    original_name = models.CharField(max_length=255, blank=True, default='')  # nome do upload (o blob não tem)
     mime_type  = models.CharField(max_length=120, blank=True, null=True)
     file_size  = models.IntegerField(blank=True, null=True)
-    duration_seconds = models.IntegerField(blank=True, null=True)  # opcional p/ áudios
+    duration_seconds = models.IntegerField(blank=True, null=True)  # áudio/vídeo, preenchido por core.media
+    media_info = models.JSONField(default=dict, blank=True)  # formato, codec, taxa, canais, bitrate (core.audio)
+    media_status = models.CharField(max_length=10, choices=MEDIA_STATUS_CHOICES, default='pending', db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # feed de mudanças (core.changes)
 
     def __str__(self):
         return f'Attachment {self.id} of #{self.feedback_id}'
 
+class AttachmentBlob(models.Model):
+    """
+    Um conteúdo único no storage de anexos (cas/ab/cd/<sha256>) e quantos
+    FeedbackAttachment apontam para ele. Mantido por core.signals; blobs
+    com refs=0 são apagados por `manage.py dedupe_attachments --gc`.
+    """
+    sha256     = models.CharField(max_length=64, unique=True)
+    size       = models.BigIntegerField(default=0)
+    refs       = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.sha256[:12]} ({self.refs} refs)'
+
 class FeedbackComment(models.Model):
     feedback     = models.ForeignKey(Feedback, on_delete=models.CASCADE, related_name='comments')
     author_name  = models.CharField('Autor', max_length=160, blank=True, null=True)
     comment_text = models.TextField('Comentário')
     created_at   = models.DateTimeField(auto_now_add=True)
+    updated_at   = models.DateTimeField(auto_now=True, db_index=True)  # feed de mudanças (core.changes)
 
     def __str__(self):
         return f'Comment {self.id} of #{self.feedback_id}'
+
+
+class FeedbackDailyStat(models.Model):
+    """
+    Contagem diária (dia local) de feedbacks por dimensão — mantida pelos
+    signals de core.signals e reconstruível com `manage.py rollups`.
+    """
+    DIMENSION_CHOICES = [
+        ('type', 'Tipo'),
+        ('subject', 'Assunto'),
+        ('course', 'Curso'),
+        ('status', 'Status'),
+    ]
+
+    day       = models.DateField()
+    dimension = models.CharField(max_length=12, choices=DIMENSION_CHOICES)
+    key       = models.CharField(max_length=160, blank=True, default='')  # '' = sem curso
+    count     = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'dimension', 'key'], name='uniq_daily_stat'),
+        ]
+
+    def __str__(self):
+        return f'{self.day} {self.dimension}={self.key}: {self.count}'
+
+
+def export_storage():
+    """Artefatos de exportação ficam fora do MEDIA_ROOT (só saem pelo download protegido)."""
+    return FileSystemStorage(location=settings.EXPORT_ROOT)
+
+
+class ExportJob(models.Model):
+    KIND_CHOICES = [
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel'),
+        ('pdf', 'PDF'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Na fila'),
+        ('running', 'Processando'),
+        ('done', 'Concluído'),
+        ('failed', 'Falhou'),
+    ]
+
+    kind         = models.CharField('Formato', max_length=8, choices=KIND_CHOICES)
+    params       = models.JSONField('Filtros', default=dict, blank=True)
+    status       = models.CharField('Status', max_length=12, choices=STATUS_CHOICES, default='queued', db_index=True)
+    file         = models.FileField(storage=export_storage, blank=True)
+    error        = models.TextField(blank=True, null=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True, related_name='export_jobs'
+    )
+    created_at   = models.DateTimeField(auto_now_add=True)
+    started_at   = models.DateTimeField(blank=True, null=True)
+    finished_at  = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'Export {self.id} ({self.kind}) - {self.status}'
+
+
+class FeedbackImport(models.Model):
+    """
+    Uma importação em lote (`manage.py import_feedbacks`). `rows_read` é
+    gravado na mesma transação de cada lote: é o ponto de retomada depois
+    de uma falha. O arquivo é identificado pelo SHA-256 do conteúdo.
+    """
+    STATUS_CHOICES = [
+        ('running', 'Importando'),
+        ('done', 'Concluído'),
+        ('failed', 'Falhou'),
+    ]
+
+    source     = models.CharField('Arquivo', max_length=255)
+    sha256     = models.CharField(max_length=64, db_index=True)
+    status     = models.CharField('Status', max_length=12, choices=STATUS_CHOICES, default='running')
+    rows_read  = models.IntegerField(default=0)  # linhas de dados já processadas (importadas ou rejeitadas)
+    imported   = models.IntegerField(default=0)
+    rejected   = models.IntegerField(default=0)
+    error      = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'Import {self.id} ({self.source}) - {self.status}'
+
+
+class Tombstone(models.Model):
+    """
+    Exclusão de um feedback, comentário ou anexo, para o feed de mudanças
+    (core.changes): quem sincroniza pelo feed fica sabendo que a linha sumiu.
+    Gravado por core.signals; `manage.py changes --purge` apaga os antigos.
+    """
+    KIND_CHOICES = [
+        ('feedback', 'Feedback'),
+        ('comment', 'Comentário'),
+        ('attachment', 'Anexo'),
+    ]
+
+    kind        = models.CharField(max_length=12, choices=KIND_CHOICES)
+    object_id   = models.IntegerField()
+    feedback_id = models.IntegerField(blank=True, null=True)  # sem FK: o feedback também pode ter sumido
+    deleted_at  = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id} apagado em {self.deleted_at:%Y-%m-%d %H:%M}'
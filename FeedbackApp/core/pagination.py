@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# core/pagination.py
+"""
+Paginação por cursor (keyset) em (created_at, id), do mais novo para o
+mais antigo. Não usa COUNT nem OFFSET: a página N custa o mesmo que a 1.
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+
+
+def encode_cursor(obj):
+    raw = f"{obj.created_at.isoformat()}|{obj.pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Cursor → (created_at, id); None se ausente/inválido."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, pk = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(pk)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        return None
+
+
+class KeysetPage:
+    def __init__(self, items, has_next, has_previous):
+        self.object_list = items
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = encode_cursor(items[-1]) if items and has_next else None
+        self.previous_cursor = encode_cursor(items[0]) if items and has_previous else None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def seek(qs, cursor=None, backwards=False):
+    """
+    `qs` ordenado a partir do cursor (created_at, id), exclusive.
+    Para frente: (-created_at, -id), itens mais antigos que o cursor.
+    backwards:   (created_at, id), itens mais novos que o cursor.
+    O limite em created_at usa o índice; o OR só desempata pelo id.
+    """
+    if backwards:
+        if cursor:
+            ts, pk = cursor
+            qs = qs.filter(Q(created_at__gte=ts) & (Q(created_at__gt=ts) | Q(id__gt=pk)))
+        return qs.order_by("created_at", "id")
+
+    if cursor:
+        ts, pk = cursor
+        qs = qs.filter(Q(created_at__lte=ts) & (Q(created_at__lt=ts) | Q(id__lt=pk)))
+    return qs.order_by("-created_at", "-id")
+
+
+def keyset_page(qs, per_page, after=None, before=None):
+    """
+    Uma página de `qs` em ordem (-created_at, -id).
+    after:  cursor do último item da página anterior (avança)
+    before: cursor do primeiro item da página seguinte (volta)
+    """
+    after, before = decode_cursor(after), decode_cursor(before)
+
+    if before:
+        rows = list(seek(qs, before, backwards=True)[: per_page + 1])
+        items = rows[:per_page][::-1]
+        return KeysetPage(items, has_next=True, has_previous=len(rows) > per_page)
+
+    rows = list(seek(qs, after)[: per_page + 1])
+    return KeysetPage(rows[:per_page], has_next=len(rows) > per_page, has_previous=bool(after))
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+# core/profiling.py
+"""
+Medição por request (RequestProfilingMiddleware): quantidade e tempo das
+queries, tempo de renderização de templates, trechos marcados com `span()`
+(geração de CSV/Excel/PDF em core.export_cache) e o resto da view. Sai no
+header Server-Timing (para staff, ou para todos com DEBUG); requests acima
+de PROFILING_SLOW_MS vão para o log (LOG_DIR/feedbackapp.log) com as
+queries mais caras.
+
+Cada métrica é exclusiva: o tempo de SQL dentro de um template conta em
+"sql", não em "render", e "view" é o que sobra do total. Em respostas
+streaming a medição termina nos headers: o header ganha a métrica "stream"
+e o log, "streaming": true.
+"""
+import cProfile
+import contextvars
+import os
+import random
+import re
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+TOP_QUERIES = 5
+
+_current = contextvars.ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.queries = defaultdict(lambda: [0, 0.0])  # sql (sem parâmetros) → [vezes, segundos]
+        self.spans = Counter()
+        self._open = set()
+
+    def record_query(self, sql, elapsed):
+        self.sql_count += 1
+        self.sql_time += elapsed
+        entry = self.queries[sql]
+        entry[0] += 1
+        entry[1] += elapsed
+
+    def top_queries(self, n=TOP_QUERIES):
+        ranked = sorted(self.queries.items(), key=lambda kv: kv[1][1], reverse=True)[:n]
+        return [{"sql": re.sub(r"\s+", " ", sql)[:500], "count": c, "ms": round(t * 1000, 1)} for sql, (c, t) in ranked]
+
+    def timings(self):
+        """[(métrica, segundos, descrição)], na ordem do Server-Timing."""
+        total = time.perf_counter() - self.started
+        view = max(total - self.sql_time - sum(self.spans.values()), 0.0)
+        rows = [("sql", self.sql_time, f"{self.sql_count} queries")]
+        rows += [(name, t, name) for name, t in self.spans.items()]
+        rows += [("view", view, "view"), ("total", total, "total")]
+        return rows
+
+
+@contextmanager
+def span(name):
+    """Mede um trecho como a métrica `name` do request atual (sem request medido, não faz nada)."""
+    profile = _current.get()
+    if profile is None or name in profile._open:  # aninhado: o trecho de fora já conta
+        yield
+        return
+    profile._open.add(name)
+    started, sql_before = time.perf_counter(), profile.sql_time
+    try:
+        yield
+    finally:
+        profile._open.discard(name)
+        profile.spans[name] += (time.perf_counter() - started) - (profile.sql_time - sql_before)
+
+
+def _query_timer(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record_query(sql, time.perf_counter() - started)
+
+
+class ProfiledDjangoTemplates(DjangoTemplates):
+    """
+    Backend de templates do Django (TEMPLATES em settings) cujos templates
+    medem o render como "render". Só os templates deste backend são
+    medidos; nada do Django é alterado no processo.
+    """
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return ProfiledTemplate(super().get_template(template_name))
+
+
+class ProfiledTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):  # origin, backend...
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        with span("render"):
+            return self.template.render(context, request)
+
+
+def server_timing(profile, streaming=False):
+    metrics = [f'{name};dur={t * 1000:.1f};desc="{desc}"' for name, t, desc in profile.timings()]
+    if streaming:
+        # StreamingHttpResponse/FileResponse: o corpo (e o SQL dele, no CSV) sai depois do header
+        metrics.append('stream;desc="corpo enviado depois destes tempos, fora da medição"')
+    return ", ".join(metrics)
+
+
+def slow_record(request, response, profile):
+    """Registro de um request lento para o log."""
+    return {
+        "method": request.method,
+        "path": request.path,
+        "status": response.status_code,
+        "streaming": response.streaming,  # tempos só até os headers: o corpo não entra
+        "timings_ms": {name: round(t * 1000, 1) for name, t, _ in profile.timings()},
+        "queries": profile.sql_count,
+        "top_queries": profile.top_queries(),
+    }
+
+
+def should_log(profile):
+    total_ms = (time.perf_counter() - profile.started) * 1000
+    return total_ms >= settings.PROFILING_SLOW_MS and random.random() < settings.PROFILING_SLOW_SAMPLE
+
+
+@contextmanager
+def measure():
+    """Mede o bloco (normalmente um request inteiro); devolve o RequestProfile."""
+    profile = RequestProfile()
+    token = _current.set(profile)
+    try:
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(_query_timer))
+            yield profile
+    finally:
+        _current.reset(token)
+
+
+def start_profiler():
+    """cProfile ligado para o resto do request, ou None se outro perfilador já estiver ativo."""
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return None
+    return profiler
+
+
+def dump_profile(profiler, request):
+    """Desliga `profiler` e grava o .prof em PROFILING_DUMP_DIR. Retorna o nome do arquivo."""
+    profiler.disable()
+    os.makedirs(settings.PROFILING_DUMP_DIR, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", request.path).strip("-") or "root"
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{slug[:60]}-{uuid.uuid4().hex[:6]}.prof"
+    profiler.dump_stats(os.path.join(settings.PROFILING_DUMP_DIR, name))
+    return name
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# core/rollups.py
+"""
+Rollup diário de feedbacks (FeedbackDailyStat): cada feedback conta 1 em
+(dia, 'type', tipo), (dia, 'subject', assunto), (dia, 'course', curso) e
+(dia, 'status', status), sendo `dia` a data local de `created_at`.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Feedback, FeedbackDailyStat
+
+# dimensão do rollup → campo do Feedback
+DIMENSIONS = {
+    "type": "type",
+    "subject": "subject",
+    "course": "course_name",
+    "status": "status",
+}
+ROLLUP_FIELDS = ("created_at",) + tuple(DIMENSIONS.values())
+
+
+def contributions(row):
+    """Counter {(dia, dimensão, chave): 1} de um feedback (objeto ou dict com ROLLUP_FIELDS)."""
+    get = row.get if isinstance(row, dict) else lambda name: getattr(row, name)
+    day = timezone.localdate(get("created_at"))
+    return Counter({(day, dim, get(field) or ""): 1 for dim, field in DIMENSIONS.items()})
+
+
+def apply_deltas(deltas):
+    """Soma os deltas na tabela (UPDATE ... count = count + n; INSERT se a linha ainda não existe)."""
+    with transaction.atomic():
+        for (day, dim, key), n in sorted(deltas.items()):
+            if not n:
+                continue
+            rows = FeedbackDailyStat.objects.filter(day=day, dimension=dim, key=key)
+            if rows.update(count=F("count") + n):
+                continue
+            try:
+                with transaction.atomic():
+                    FeedbackDailyStat.objects.create(day=day, dimension=dim, key=key, count=n)
+            except IntegrityError:
+                # outro processo criou a linha entre o UPDATE e o INSERT
+                rows.update(count=F("count") + n)
+
+
+def record_change(old, new):
+    """Aplica a diferença entre o estado antigo e o novo de um feedback (qualquer um pode ser None)."""
+    deltas = Counter()
+    if new is not None:
+        deltas.update(contributions(new))
+    if old is not None:
+        deltas.subtract(contributions(old))
+    apply_deltas(deltas)
+
+
+def compute(start=None, end=None):
+    """Contagens esperadas a partir da tabela Feedback, no intervalo de dias [start, end)."""
+    qs = Feedback.objects.order_by().annotate(day=TruncDate("created_at"))
+    if start:
+        qs = qs.filter(day__gte=start)
+    if end:
+        qs = qs.filter(day__lt=end)
+
+    expected = Counter()
+    for dim, field in DIMENSIONS.items():
+        for r in qs.values("day", field).annotate(n=Count("id")):
+            expected[(r["day"], dim, r[field] or "")] += r["n"]
+    return expected
+
+
+def stored(start=None, end=None):
+    qs = FeedbackDailyStat.objects.exclude(count=0)
+    if start:
+        qs = qs.filter(day__gte=start)
+    if end:
+        qs = qs.filter(day__lt=end)
+    return Counter({(r.day, r.dimension, r.key): r.count for r in qs.iterator()})
+
+
+def rebuild(start=None, end=None):
+    """Recalcula o rollup do intervalo do zero. Retorna a quantidade de linhas gravadas."""
+    expected = compute(start, end)
+    with transaction.atomic():
+        old = FeedbackDailyStat.objects.all()
+        if start:
+            old = old.filter(day__gte=start)
+        if end:
+            old = old.filter(day__lt=end)
+        old.delete()
+        FeedbackDailyStat.objects.bulk_create(
+            (FeedbackDailyStat(day=day, dimension=dim, key=key, count=n) for (day, dim, key), n in expected.items()),
+            batch_size=1000,
+        )
+    return len(expected)
+
+
+def verify(start=None, end=None):
+    """Divergências {(dia, dimensão, chave): (esperado, gravado)}; vazio = consistente."""
+    expected, current = compute(start, end), stored(start, end)
+    return {
+        k: (expected.get(k, 0), current.get(k, 0))
+        for k in expected.keys() | current.keys()
+        if expected.get(k, 0) != current.get(k, 0)
+    }
+
+
+def breakdown(start, end):
+    """{dimensão: [(chave, n), ...]} somando os dias [start, end) — custo proporcional a dias, não a linhas."""
+    rows = (
+        FeedbackDailyStat.objects.filter(day__gte=start, day__lt=end)
+        .values("dimension", "key")
+        .annotate(n=Sum("count"))
+        .order_by("dimension", "key")
+    )
+    out = {dim: [] for dim in DIMENSIONS}
+    for r in rows:
+        if r["n"]:
+            out[r["dimension"]].append((r["key"], r["n"]))
+    return out
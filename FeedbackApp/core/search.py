@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# core/search.py
+"""
+Busca textual de feedbacks num índice SQLite FTS5 (core_feedback_fts),
+sem distinção de acentos/maiúsculas e com casamento por prefixo
+("joao sil" encontra "João Silva"). O índice é mantido por triggers no
+próprio banco, então acompanha também update()/bulk_create().
+Em outros bancos cai no icontains.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "core_feedback_fts"
+FTS_COLUMNS = ("student_name", "operator_name", "course_name", "class_name", "description")
+
+_cols = ", ".join(FTS_COLUMNS)
+_new = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+_old = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+
+INSTALL_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {_cols},
+        content='core_feedback', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON core_feedback BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {_cols}) VALUES (new.id, {_new});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON core_feedback BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_cols}) VALUES ('delete', old.id, {_old});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {_cols} ON core_feedback BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_cols}) VALUES ('delete', old.id, {_old});
+        INSERT INTO {FTS_TABLE}(rowid, {_cols}) VALUES (new.id, {_new});
+    END""",
+]
+
+UNINSTALL_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def install(conn=connection):
+    """Cria tabela + triggers (idempotente) e reindexa tudo. Só no SQLite."""
+    if conn.vendor != "sqlite":
+        return
+    with conn.cursor() as cur:
+        for sql in INSTALL_SQL:
+            cur.execute(sql)
+        cur.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall(conn=connection):
+    if conn.vendor != "sqlite":
+        return
+    with conn.cursor() as cur:
+        for sql in UNINSTALL_SQL:
+            cur.execute(sql)
+
+
+def missing(conn=connection):
+    """Nomes da tabela/triggers do índice que faltam no banco ([] fora do SQLite).
+
+    Recriar core_feedback (o "remake" do SQLite num AlterField) apaga os
+    triggers sem aviso, e o índice para de acompanhar a tabela.
+    """
+    if conn.vendor != "sqlite":
+        return []
+    expected = [FTS_TABLE] + [f"{FTS_TABLE}_{s}" for s in ("ai", "ad", "au")]
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE %s",
+            [f"{FTS_TABLE}%"],
+        )
+        found = {row[0] for row in cur.fetchall()}
+    return [name for name in expected if name not in found]
+
+
+def match_expression(text, columns=None):
+    """'joão sil' → '{colunas} : ("joão"* AND "sil"*)'; None se não houver termos."""
+    tokens = re.findall(r"\w+", text or "")
+    if not tokens:
+        return None
+    expr = " AND ".join(f'"{t}"*' for t in tokens)
+    if columns:
+        expr = "{%s} : (%s)" % (" ".join(columns), expr)
+    return expr
+
+
+def search(qs, text, columns=None):
+    """Filtra um queryset de Feedback pelo texto, nas colunas dadas (padrão: todas)."""
+    columns = tuple(columns or FTS_COLUMNS)
+    expr = match_expression(text, columns)
+    if expr is None:
+        return qs
+
+    if connection.vendor != "sqlite":
+        cond = Q()
+        for c in columns:
+            cond |= Q(**{f"{c}__icontains": text.strip()})
+        return qs.filter(cond)
+
+    ids = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [expr])
+    return qs.filter(id__in=ids)
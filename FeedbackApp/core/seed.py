@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+# core/seed.py
+"""
+Dados sintéticos para testes de carga (`python manage.py seed_feedbacks`):
+feedbacks com nomes em português, cursos de COURSE_CHOICES (poucos cursos
+concentram a maior parte), datas puxadas para o presente em horário
+comercial e status que dependem da idade do feedback; comentários e
+anexos em volume configurável.
+
+Entra tudo com bulk_create em lotes, como core.imports, mas sem os signals:
+as referências dos blobs (core.blobs) são contadas a cada lote e o rollup
+diário é reconstruído uma vez no fim (datas espalhadas por anos tocariam
+milhares de linhas do rollup a cada lote). Os anexos apontam para um
+punhado de blobs pequenos, então milhões de linhas não viram milhões de
+arquivos.
+"""
+import io
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from . import blobs, rollups
+from .bulk import create_with_timestamps
+from .forms import COURSE_CHOICES
+from .models import Feedback, FeedbackAttachment, FeedbackComment, attachment_storage
+
+BATCH_SIZE = 5000
+
+FIRST_NAMES = [
+    "Ana", "Beatriz", "Bruna", "Camila", "Carla", "Carolina", "Daniela", "Fernanda", "Gabriela", "Isabela",
+    "Juliana", "Larissa", "Letícia", "Luana", "Mariana", "Natália", "Patrícia", "Renata", "Tatiane", "Vanessa",
+    "Aline", "Amanda", "Bianca", "Débora", "Elaine", "Jéssica", "Priscila", "Raquel", "Simone", "Thaís",
+    "André", "Bruno", "Carlos", "Daniel", "Diego", "Eduardo", "Felipe", "Gustavo", "Henrique", "Igor",
+    "João", "José", "Leonardo", "Lucas", "Marcelo", "Matheus", "Paulo", "Rafael", "Rodrigo", "Thiago",
+    "Vinícius", "Alexandre", "Caio", "Fábio", "Guilherme", "Júlio", "Márcio", "Otávio", "Renan", "Sérgio",
+]
+SURNAMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+    "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa",
+    "Rocha", "Dias", "Nascimento", "Andrade", "Moreira", "Nunes", "Marques", "Machado", "Mendes", "Freitas",
+    "Cardoso", "Ramos", "Gonçalves", "Santana", "Teixeira", "Araújo", "Monteiro", "Moura", "Correia", "Pinto",
+]
+OPERATORS = ["Aline Suporte", "Bruno Atendimento", "Carla Mendes", "Diego Rocha", "Equipe Financeiro", "Fernanda Lima"]
+
+# peso de cada opção (as chaves seguem os *_CHOICES do Feedback)
+TYPE_WEIGHTS = {"reclamacao": 5, "sugestao": 3, "elogio": 2}
+SUBJECT_WEIGHTS = {"plataforma": 30, "atendimento": 20, "financeiro": 20, "conteudo": 15, "eventos": 5, "outros": 10}
+# cursos em lei de Zipf: o 1º da lista recebe o dobro do 2º, o triplo do 3º...
+COURSES = [key for key, _ in COURSE_CHOICES if key]
+COURSE_WEIGHTS = [1 / (i + 1) for i in range(len(COURSES))]
+HOUR_WEIGHTS = {h: w for h, w in zip(range(7, 23), [1, 4, 7, 8, 8, 5, 6, 8, 8, 7, 6, 4, 3, 2, 2, 1])}
+# idade máxima (dias) → pesos de (pendente, em_analise, resolvido)
+STATUS_BY_AGE = [(7, (60, 25, 15)), (30, (30, 20, 50)), (None, (10, 5, 85))]
+
+DESCRIPTIONS = {
+    "reclamacao": [
+        "Não consigo acessar as aulas do módulo {n}.",
+        "O boleto da parcela {n} veio com valor diferente do combinado.",
+        "Esperei mais de {n} dias por uma resposta do suporte.",
+        "O certificado ainda não foi liberado.",
+        "O vídeo da aula {n} trava no meio.",
+    ],
+    "sugestao": [
+        "Seria ótimo ter legendas nas aulas.",
+        "Poderiam disponibilizar o material em PDF.",
+        "Sugiro um grupo de dúvidas por turma.",
+        "Mais encontros ao vivo por mês ajudariam muito.",
+    ],
+    "elogio": [
+        "Aula {n} excelente, parabéns ao professor!",
+        "Atendimento rápido e muito atencioso.",
+        "O conteúdo superou as expectativas.",
+        "Evento muito bem organizado.",
+    ],
+}
+COMMENTS = [
+    "Entramos em contato com o aluno.",
+    "Encaminhado para o time responsável.",
+    "Aguardando retorno do aluno.",
+    "Acesso liberado, aluno confirmou.",
+    "Reembolso solicitado ao financeiro.",
+    "Problema resolvido.",
+]
+
+
+def _png(color):
+    buf = io.BytesIO()
+    Image.new("RGB", (32, 32), color).save(buf, "PNG")
+    return buf.getvalue()
+
+
+# (nome original, mime, conteúdo) dos blobs que os anexos sintéticos compartilham
+SAMPLE_FILES = [
+    *((f"print_{i}.png", "image/png", _png((40 * i, 120, 200 - 20 * i))) for i in range(6)),
+    ("comprovante.pdf", "application/pdf", b"%PDF-1.4\n% comprovante sintetico\n%%EOF\n"),
+    ("relato.txt", "text/plain", "Relato do aluno (dados sintéticos).\n".encode()),
+]
+
+
+def _weighted(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _amount(rng, mean):
+    """Quantidade aleatória com média ~`mean` (a maioria fica perto de zero, poucos têm muitos)."""
+    return round(rng.expovariate(1 / mean)) if mean > 0 else 0
+
+
+def _created_at(rng, now, days):
+    # u² puxa as datas para o presente (o volume cresce com o tempo); fim de semana tem menos movimento
+    while True:
+        day = (now - timedelta(days=days * rng.random() ** 2)).date()
+        if day.weekday() < 5 or rng.random() < 0.3:
+            break
+    hour = _weighted(rng, HOUR_WEIGHTS)
+    at = datetime(day.year, day.month, day.day, hour, rng.randrange(60), rng.randrange(60))
+    return min(timezone.make_aware(at), now)
+
+
+def _status(rng, age_days):
+    for max_age, weights in STATUS_BY_AGE:
+        if max_age is None or age_days <= max_age:
+            return rng.choices(["pendente", "em_analise", "resolvido"], weights=weights)[0]
+
+
+def make_feedback(rng, now, days):
+    created = _created_at(rng, now, days)
+    kind = _weighted(rng, TYPE_WEIGHTS)
+    status = _status(rng, (now - created).days)
+    resolved = min(created + timedelta(hours=rng.uniform(1, 240)), now) if status == "resolvido" else None
+    surnames = rng.sample(SURNAMES, rng.choice((1, 2, 2)))
+    return Feedback(
+        student_name=" ".join([rng.choice(FIRST_NAMES), *surnames]),
+        operator_name=rng.choice(OPERATORS) if rng.random() < 0.7 else None,
+        type=kind,
+        subject=_weighted(rng, SUBJECT_WEIGHTS),
+        course_name=rng.choices(COURSES, weights=COURSE_WEIGHTS)[0],
+        class_name=f"Turma {created.year}.{1 if created.month <= 6 else 2}{rng.choice('ABC')}",
+        description=rng.choice(DESCRIPTIONS[kind]).format(n=rng.randint(1, 12)),
+        status=status,
+        resolved_at=resolved,
+        created_at=created,
+        updated_at=resolved or created,
+    )
+
+
+def sample_blobs():
+    """[(nome no storage, nome original, mime, tamanho)] dos arquivos de exemplo (gravados uma vez só, CAS)."""
+    storage = attachment_storage()
+    return [
+        (storage.save(f"feedbacks/seed/{name}", ContentFile(data)), name, mime, len(data))
+        for name, mime, data in SAMPLE_FILES
+    ]
+
+
+def _flush(rng, now, batch, comments, attachments, samples):
+    with transaction.atomic():
+        create_with_timestamps(Feedback, batch)
+        rows = []
+        for fb in batch:
+            for _ in range(_amount(rng, comments)):
+                at = min(fb.created_at + timedelta(hours=rng.uniform(0.5, 72)), now)
+                rows.append(
+                    FeedbackComment(
+                        feedback_id=fb.pk, author_name=rng.choice(OPERATORS),
+                        comment_text=rng.choice(COMMENTS), created_at=at, updated_at=at,
+                    )
+                )
+        create_with_timestamps(FeedbackComment, rows)
+        n_comments = len(rows)
+
+        rows, refs = [], Counter()
+        for fb in batch:
+            for _ in range(_amount(rng, attachments)):
+                name, original, mime, size = rng.choice(samples)
+                refs[name] += 1
+                rows.append(
+                    FeedbackAttachment(
+                        feedback_id=fb.pk, file=name, original_name=original, mime_type=mime,
+                        file_size=size, media_status="done", created_at=fb.created_at,
+                        updated_at=fb.created_at,
+                    )
+                )
+        create_with_timestamps(FeedbackAttachment, rows)
+        for name, n in refs.items():
+            blobs.acquire(name, n)
+    return Counter(feedbacks=len(batch), comments=n_comments, attachments=len(rows))
+
+
+def generate(feedbacks, comments=1.0, attachments=0.3, days=365, seed=None, batch_size=BATCH_SIZE, on_progress=None):
+    """
+    Cria `feedbacks` feedbacks espalhados pelos últimos `days` dias, com em
+    média `comments` comentários e `attachments` anexos cada. Com o mesmo
+    `seed` os dados saem iguais. `on_progress(totais)` é chamado a cada lote.
+    Retorna Counter(feedbacks=, comments=, attachments=).
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    samples = sample_blobs() if attachments > 0 else []
+    totals = Counter(feedbacks=0, comments=0, attachments=0)
+    try:
+        for start in range(0, feedbacks, batch_size):
+            batch = [make_feedback(rng, now, days) for _ in range(min(batch_size, feedbacks - start))]
+            totals.update(_flush(rng, now, batch, comments, attachments, samples))
+            if on_progress:
+                on_progress(totals)
+    finally:
+        if totals["feedbacks"]:
+            # também se interrompido: os lotes já gravados entram no rollup
+            first = timezone.localdate(now - timedelta(days=days + 1))
+            rollups.rebuild(first, timezone.localdate(now) + timedelta(days=1))
+    return totals
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# core/signals.py
+"""
+- Mantém o rollup diário (core.rollups) em dia a cada create/edit/delete de Feedback.
+- Conta as referências dos blobs de anexos (core.blobs).
+- Grava um Tombstone a cada exclusão de feedback/comentário/anexo (feed de mudanças, core.changes).
+- Invalida o cache de permissão (core.decorators) quando grupos/pertinência mudam.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import blobs, rollups
+from .decorators import invalidate_support_cache
+from .models import Feedback, FeedbackAttachment, FeedbackComment, Tombstone
+
+
+@receiver(pre_save, sender=Feedback)
+def _remember_rollup_state(sender, instance, raw=False, **kwargs):
+    instance._rollup_old = None
+    if raw or instance.pk is None:
+        return
+    instance._rollup_old = (
+        Feedback.objects.filter(pk=instance.pk).values(*rollups.ROLLUP_FIELDS).first()
+    )
+
+
+@receiver(post_save, sender=Feedback)
+def _update_rollup_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    rollups.record_change(getattr(instance, "_rollup_old", None), instance)
+
+
+@receiver(pre_delete, sender=Feedback)
+def _remember_rollup_state_on_delete(sender, instance, **kwargs):
+    # a instância em memória pode estar desatualizada; vale o que está no banco
+    instance._rollup_old = (
+        Feedback.objects.filter(pk=instance.pk).values(*rollups.ROLLUP_FIELDS).first()
+    )
+
+
+@receiver(post_delete, sender=Feedback)
+def _update_rollup_on_delete(sender, instance, **kwargs):
+    rollups.record_change(getattr(instance, "_rollup_old", None), None)
+
+
+@receiver(pre_save, sender=FeedbackAttachment)
+def _remember_blob(sender, instance, raw=False, **kwargs):
+    instance._blob_old = None
+    if raw or instance.pk is None:
+        return
+    instance._blob_old = (
+        FeedbackAttachment.objects.filter(pk=instance.pk).values_list("file", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=FeedbackAttachment)
+def _count_blob_ref(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old, new = getattr(instance, "_blob_old", None), instance.file.name
+    if old == new:
+        return
+    blobs.acquire(new)
+    if old:
+        blobs.release(old)
+
+
+@receiver(post_delete, sender=FeedbackAttachment)
+def _drop_blob_ref(sender, instance, **kwargs):
+    blobs.release(instance.file.name)
+
+
+# o delete em cascata de um feedback também passa por aqui (um por comentário/anexo)
+@receiver(post_delete, sender=Feedback)
+@receiver(post_delete, sender=FeedbackComment)
+@receiver(post_delete, sender=FeedbackAttachment)
+def _record_tombstone(sender, instance, **kwargs):
+    if sender is Feedback:
+        Tombstone.objects.create(kind="feedback", object_id=instance.pk, feedback_id=instance.pk)
+    else:
+        kind = "comment" if sender is FeedbackComment else "attachment"
+        Tombstone.objects.create(kind=kind, object_id=instance.pk, feedback_id=instance.feedback_id)
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+def _membership_changed(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_support_cache()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def _group_changed(sender, **kwargs):
+    invalidate_support_cache()
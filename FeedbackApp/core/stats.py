@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# core/stats.py
+"""
+Agregações usadas pelo dashboard, pelos endpoints de stats e pelo PDF.
+Leem o rollup diário (FeedbackDailyStat), não a tabela Feedback.
+"""
+from django.db.models import Q, Sum
+
+from .filters import month_bounds
+from .models import FeedbackDailyStat
+
+# métrica → (dimensão, chave) no rollup; chave None = soma da dimensão (total)
+SUMMARY_METRICS = {
+    "elogios": ("type", "elogio"),
+    "reclamacoes": ("type", "reclamacao"),
+    "sugestoes": ("type", "sugestao"),
+    "resolvidos": ("status", "resolvido"),
+    "total": ("status", None),
+}
+MAX_MONTHS = 24  # ?months= do stats_summary: cada mês são mais SUMs na mesma query
+
+
+def month_days(ym):
+    """'YYYY-MM' → [primeiro dia, primeiro dia do mês seguinte) como datas locais."""
+    start, end = month_bounds(ym)
+    return start.date(), end.date()
+
+
+def month_summaries(months):
+    """
+    {'YYYY-MM': {elogios, reclamacoes, sugestoes, resolvidos, total, taxa_resolucao_pct}}
+    para todos os meses pedidos numa única query (SUM condicional, sem GROUP BY).
+    """
+    months = list(dict.fromkeys(months))
+    where = Q()
+    aggs = {}
+    for i, ym in enumerate(months):
+        start, end = month_days(ym)
+        in_month = Q(day__gte=start, day__lt=end)
+        where |= in_month
+        for metric, (dim, key) in SUMMARY_METRICS.items():
+            cond = in_month & Q(dimension=dim)
+            if key is not None:
+                cond &= Q(key=key)
+            aggs[f"m{i}_{metric}"] = Sum("count", filter=cond)
+
+    row = FeedbackDailyStat.objects.filter(where).aggregate(**aggs) if months else {}
+
+    out = {}
+    for i, ym in enumerate(months):
+        data = {metric: row[f"m{i}_{metric}"] or 0 for metric in SUMMARY_METRICS}
+        data["taxa_resolucao_pct"] = (
+            round(100 * data["resolvidos"] / data["total"], 1) if data["total"] else 0.0
+        )
+        out[ym] = data
+    return out
+
+
+def month_summary(ym):
+    return month_summaries([ym])[ym]
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# core/storage.py
+"""
+Storage endereçado por conteúdo para os anexos: o upload é gravado num
+arquivo temporário enquanto o SHA-256 é calculado, e termina em
+cas/ab/cd/<sha256>. Conteúdo repetido não é gravado de novo: o nome
+devolvido é o do blob que já existe. Arquivos antigos (feedbacks/%Y/%m/...)
+continuam sendo lidos normalmente do mesmo MEDIA_ROOT.
+
+O nome original do arquivo fica em FeedbackAttachment.original_name e as
+referências de cada blob em AttachmentBlob (core.blobs).
+"""
+import hashlib
+import os
+import re
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+
+CAS_DIR = "cas"
+CAS_NAME_RE = re.compile(rf"^{CAS_DIR}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/([0-9a-f]{{64}})$")
+
+
+def blob_name(sha256):
+    return f"{CAS_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def blob_sha(name):
+    """Hash do blob a partir do nome no storage; None para arquivos fora do CAS."""
+    m = CAS_NAME_RE.match(name or "")
+    return m.group(1) if m else None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # o nome final vem do conteúdo (_save); não precisa procurar um nome livre
+        return name
+
+    def _save(self, name, content):
+        tmp_dir = self.path(f"{CAS_DIR}/tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        tmp = os.path.join(tmp_dir, uuid.uuid4().hex)
+
+        digest = hashlib.sha256()
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    out.write(chunk)
+
+            final = blob_name(digest.hexdigest())
+            path = self.path(final)
+            if os.path.exists(path):
+                os.remove(tmp)
+                return final
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp, self.file_permissions_mode)
+            os.replace(tmp, path)  # atômico: nunca expõe um blob pela metade
+            return final
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
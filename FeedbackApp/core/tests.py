@@ -1,3 +1,1473 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import re
+import struct
+import tempfile
+import wave
+from contextlib import contextmanager
+from unittest import mock
+from datetime import timedelta
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+from PIL import Image
+
+from . import audio, benchmark, blobs, bulk, changes, export_cache, imports, log, media, rollups, search, seed, thumbnails
+from .checks import check_search_index
+from .db import immediate_atomic
+from .decorators import support_cache_stats
+from .exports import pdf_rows
+from .filters import filter_feedbacks
+from .jobs import claim_next, cleanup, run_job
+from .middleware import SESSION_TOUCH_KEY
+from .models import (
+    AttachmentBlob,
+    ExportJob,
+    Feedback,
+    FeedbackAttachment,
+    FeedbackComment,
+    FeedbackDailyStat,
+    FeedbackImport,
+    Tombstone,
+    export_storage,
+)
+from .pagination import seek
+from .stats import MAX_MONTHS, month_days, month_summaries
+
+
+# uploads dos testes nunca vão para o MEDIA_ROOT real
+TEST_MEDIA_ROOT = tempfile.mkdtemp(prefix="feedbackapp-tests-")
+
+# nem o log (erros esperados, requests lentos) para o LOG_DIR real, qualquer que seja o runner
+for _handler in logging.getLogger().handlers:
+    if isinstance(_handler, log.FileHandler):
+        _handler.close()
+        _handler.baseFilename = os.path.join(TEST_MEDIA_ROOT, "logs", os.path.basename(_handler.baseFilename))
+
+
+def png_bytes(size=(64, 32)):
+    buf = io.BytesIO()
+    Image.new("RGB", size, "teal").save(buf, "PNG")
+    return buf.getvalue()
+
+
+def wav_bytes(seconds=2, rate=8000):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"\0\0" * rate * seconds)
+    return buf.getvalue()
+
+
+def audio_samples():
+    """Cabeçalhos mínimos de cada container → (bytes, duração esperada, extras esperados)."""
+    # MPEG-1 Layer III, 128 kbps, 44.1 kHz, estéreo: frames de 417 bytes
+    frame = b"\xff\xfb\x90\x00" + b"\0" * 413
+    xing = bytearray(frame)
+    xing[36:48] = b"Xing" + struct.pack(">II", 1, 1000)
+
+    streaminfo = struct.pack(">HH3s3sQ16s", 4096, 4096, b"\0" * 3, b"\0" * 3,
+                             44100 << 44 | 1 << 41 | 15 << 36 | 441000, b"\0" * 16)
+
+    def ogg_page(granule, packet=b"", flags=0):
+        segs = bytes([len(packet)]) if packet else b""
+        return b"OggS\0" + bytes([flags]) + struct.pack("<q", granule) + b"abcd" + b"\0" * 8 + bytes([len(segs)]) + segs + packet
+
+    opus_head = b"OpusHead\x01\x01" + struct.pack("<HIhB", 312, 48000, 0, 0)
+
+    def box(kind, payload):
+        return struct.pack(">I", 8 + len(payload)) + kind + payload
+
+    mvhd = box(b"mvhd", b"\0" * 12 + struct.pack(">II", 1000, 12345) + b"\0" * 80)
+    mp4a = box(b"mp4a", b"\0" * 16 + struct.pack(">HHHHI", 1, 16, 0, 0, 44100 << 16))
+    stsd = box(b"stsd", b"\0" * 4 + struct.pack(">I", 1) + mp4a)
+    trak = box(b"trak", box(b"mdia", box(b"minf", box(b"stbl", stsd))))
+    mp4 = box(b"ftyp", b"M4A \0\0\0\0") + box(b"mdat", b"\0" * 100) + box(b"moov", mvhd + trak)
+
+    def el(eid, payload):
+        return eid + bytes([0x80 | len(payload)]) + payload
+
+    info = el(b"\x2a\xd7\xb1", b"\x0f\x42\x40") + el(b"\x44\x89", struct.pack(">d", 4500.0))
+    audio_el = el(b"\xb5", struct.pack(">d", 48000.0)) + el(b"\x9f", b"\x01")
+    tracks = el(b"\xae", el(b"\x86", b"A_OPUS") + el(b"\xe1", audio_el))
+    webm = (
+        el(b"\x1a\x45\xdf\xa3", el(b"\x42\x82", b"webm"))
+        + b"\x18\x53\x80\x67\x01\xff\xff\xff\xff\xff\xff\xff"
+        + el(b"\x15\x49\xa9\x66", info)
+        + el(b"\x16\x54\xae\x6b", tracks)
+    )
+    return {
+        "wav": (wav_bytes(), 2.0, {"sample_rate": 8000, "channels": 1}),
+        "mp3-cbr": (b"ID3\x03\0\0\0\0\0\x0a" + b"\0" * 10 + frame * 100, 2.606, {"bitrate": 128000}),
+        "mp3-xing": (bytes(xing) + frame * 20, 26.122, {"sample_rate": 44100}),
+        "flac": (b"fLaC\x80\0\0\x22" + streaminfo, 10.0, {"channels": 2}),
+        "ogg-opus": (ogg_page(0, opus_head, 2) + ogg_page(48000 * 3 + 312, flags=4), 3.0, {"codec": "opus"}),
+        "mp4": (mp4, 12.345, {"codec": "mp4a", "sample_rate": 44100, "channels": 1}),
+        "webm": (webm, 4.5, {"format": "webm", "codec": "opus", "sample_rate": 48000}),
+    }
+
+
+# cache "shared" (geração do grupo Suporte, contadores do cache de exports) fora do cache real
+TEST_CACHES = {**settings.CACHES, "shared": {**settings.CACHES["shared"], "LOCATION": TEST_MEDIA_ROOT + "/shared"}}
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, EXPORT_ROOT=TEST_MEDIA_ROOT + "/exports", CACHES=TEST_CACHES)
+class SupportTestCase(TestCase):
+    """Base: usuário logado no grupo 'Suporte'."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("operador", password="x")
+        cls.user.groups.add(Group.objects.get_or_create(name="Suporte")[0])
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    @staticmethod
+    def make_feedback(**kw):
+        data = {"student_name": "Aluno", "type": "elogio", "subject": "outros"}
+        data.update(kw)
+        return Feedback.objects.create(**data)
+
+
+class ExportCsvTests(SupportTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(5):
+            fb = self.make_feedback(student_name=f"Aluno {i}")
+            for _ in range(i):
+                FeedbackAttachment.objects.create(feedback=fb, file=ContentFile(b"x", name="a.txt"))
+
+    def _rows(self, content):
+        return list(csv.reader(io.StringIO(content.decode("utf-8")), delimiter=";"))
+
+    def test_streams_rows_with_attachment_counts(self):
+        resp = self.client.get(reverse("export_csv"))
+        self.assertTrue(resp.streaming)
+        self.assertEqual(resp["X-Export-Cache"], "miss")
+        with self.assertNumQueries(1):  # miss: as linhas saem enquanto a resposta é consumida
+            body = b"".join(resp.streaming_content)
+        rows = self._rows(body)
+        self.assertEqual(rows[0][-1], "anexos_qtd")
+        counts = {r[2]: int(r[-1]) for r in rows[1:]}
+        self.assertEqual(counts, {f"Aluno {i}": i for i in range(5)})
+
+        resp = self.client.get(reverse("export_csv"))
+        self.assertEqual(resp["X-Export-Cache"], "hit")
+        with self.assertNumQueries(0):
+            self.assertEqual(b"".join(resp.streaming_content), body)
+
+    def test_abandoned_stream_is_not_cached(self):
+        resp = self.client.get(reverse("export_csv"))
+        next(iter(resp.streaming_content))
+        resp.close()  # cliente desistiu no meio
+        self.assertEqual(self.client.get(reverse("export_csv"))["X-Export-Cache"], "miss")
+        cache_dir = export_storage().path(f"{export_cache.CACHE_DIR}/csv")
+        self.assertEqual([n for n in os.listdir(cache_dir) if n.endswith(".tmp")], [])
+
+    def test_gzip(self):
+        resp = self.client.get(reverse("export_csv"), {"gzip": "1", "aluno": "Aluno 3"})
+        self.assertEqual(resp["Content-Type"], "application/gzip")
+        rows = self._rows(gzip.decompress(b"".join(resp.streaming_content)))
+        self.assertEqual(len(rows), 2)
+
+
+class ExportExcelTests(SupportTestCase):
+    def test_no_row_cap(self):
+        Feedback.objects.bulk_create(
+            Feedback(student_name=f"Aluno {i}", type="sugestao", subject="plataforma")
+            for i in range(2100)
+        )
+        resp = self.client.get(reverse("export_excel"))
+        wb = load_workbook(io.BytesIO(b"".join(resp.streaming_content)), read_only=True)
+        rows = list(wb["Feedbacks"].values)
+        self.assertEqual(len(rows), 2101)
+        self.assertEqual(rows[0][0], "ID")
+
+
+class PdfReportTests(SupportTestCase):
+    def setUp(self):
+        super().setUp()
+        self.month = timezone.now().strftime("%Y-%m")
+        Feedback.objects.bulk_create(
+            Feedback(student_name=f"Aluno {i}", type="sugestao", subject="plataforma") for i in range(250)
+        )
+        old = self.make_feedback(student_name="Mes passado")
+        Feedback.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=62))
+
+    def _get(self, **params):
+        resp = self.client.get(reverse("export_pdf"), {"month": self.month, **params})
+        return resp, b"".join(resp.streaming_content) if resp.status_code == 200 else resp.content
+
+    def test_whole_month_on_several_pages(self):
+        resp, pdf = self._get()
+        self.assertEqual(resp["Content-Type"], "application/pdf")
+        self.assertIn("feedbacks.pdf", resp["Content-Disposition"])
+        self.assertGreater(int(re.search(rb"/Count (\d+)", pdf).group(1)), 3)
+        # o mês inteiro, sem o corte antigo de 200 linhas, e nada de outros meses
+        names = {row[2] for row in pdf_rows(self.month)}
+        self.assertEqual(len(names), 250)
+        self.assertNotIn("Mes passado", names)
+
+    def test_cached_until_month_changes(self):
+        with mock.patch("core.export_cache.write_pdf", wraps=export_cache.write_pdf) as render:
+            self._get()
+            self._get()
+            self.assertEqual(render.call_count, 1)
+
+            fb = Feedback.objects.filter(student_name="Aluno 7").get()
+            fb.status = "resolvido"
+            fb.save()
+            self._get()
+            self.assertEqual(render.call_count, 2)
+        # a versão antiga do mês sai do disco
+        cached = os.listdir(export_storage().path("cache/pdf"))
+        self.assertEqual(len([f for f in cached if f.startswith(self.month)]), 1)
+
+    def test_invalid_month(self):
+        resp, _ = self._get(month="2024-13")
+        self.assertEqual(resp.status_code, 400)
+
+
+class ExportCacheTests(SupportTestCase):
+    def setUp(self):
+        super().setUp()
+        self.fb = self.make_feedback(student_name="Aluno 1", status="pendente")
+        self.make_feedback(student_name="Aluno 2", status="resolvido")
+
+    def _get(self, name="export_csv", **params):
+        resp = self.client.get(reverse(name), params)
+        body = b"".join(resp.streaming_content)
+        return resp["X-Export-Cache"], body
+
+    def test_same_filters_served_from_cache(self):
+        before = export_cache.export_cache_stats()
+        state, first = self._get(status="pendente")
+        self.assertEqual(state, "miss")
+        # mesmos filtros normalizados (espaços, parâmetros desconhecidos)
+        state, again = self._get(status=" pendente ", page="2")
+        self.assertEqual((state, again), ("hit", first))
+        self.assertEqual(self._get(status="resolvido")[0], "miss")
+        self.assertEqual(self._get("export_excel", status="pendente")[0], "miss")
+
+        stats = export_cache.export_cache_stats()
+        self.assertEqual(stats["hits"] - before["hits"], 1)
+        self.assertEqual(stats["misses"] - before["misses"], 3)
+
+    def test_stats_command_reads_shared_counters(self):
+        self._get()
+        self._get()
+        out = io.StringIO()
+        call_command("export_cache_stats", json=True, reset=True, stdout=out)
+        stats = json.loads(out.getvalue())
+        self.assertGreaterEqual(stats["hits"], 1)
+        self.assertGreaterEqual(stats["misses"], 1)
+        self.assertGreaterEqual(stats["files"], 1)
+        # os contadores ficam no cache "shared", não no processo: zerados lá, zerados para todos
+        self.assertEqual(caches["shared"].get("export_cache:hits"), None)
+        self.assertEqual(export_cache.export_cache_stats()["hits"], 0)
+
+    def test_new_data_invalidates(self):
+        self._get()
+        FeedbackAttachment.objects.create(feedback=self.fb, file=ContentFile(b"x", name="a.txt"))
+        state, body = self._get()
+        self.assertEqual(state, "miss")
+        rows = list(csv.reader(io.StringIO(body.decode("utf-8")), delimiter=";"))
+        self.assertEqual({r[2]: r[-1] for r in rows[1:]}, {"Aluno 1": "1", "Aluno 2": "0"})
+
+        self.fb.delete()
+        self.assertEqual(self._get()[0], "miss")
+
+    def test_lru_eviction(self):
+        csv_dir = export_storage().path("cache/csv")
+        self._get(status="pendente")
+        (pendente,) = os.listdir(csv_dir)
+        self._get(status="resolvido")
+        (resolvido,) = set(os.listdir(csv_dir)) - {pendente}
+        old = os.stat(os.path.join(csv_dir, resolvido)).st_mtime - 60
+        os.utime(os.path.join(csv_dir, pendente), (old, old))
+
+        self.assertEqual(self._get(status="pendente")[0], "hit")  # passa a ser o mais recente
+        export_cache.evict(max_bytes=os.path.getsize(os.path.join(csv_dir, pendente)))
+        self.assertEqual(os.listdir(csv_dir), [pendente])
+
+
+class ExportJobTests(SupportTestCase):
+    def test_enqueue_run_download(self):
+        self.make_feedback(student_name="Maria")
+        self.make_feedback(student_name="José")
+        resp = self.client.post(reverse("export_job_create"), {"kind": "csv", "aluno": " Maria "})
+        self.assertEqual(resp.status_code, 202)
+        job_id = resp.json()["id"]
+        self.assertEqual(ExportJob.objects.get(pk=job_id).params, {"aluno": "Maria"})
+
+        job = claim_next()
+        self.assertEqual((job.pk, job.status), (job_id, "running"))
+        self.assertIsNone(claim_next())
+        run_job(job)
+
+        status = self.client.get(reverse("export_job_status", args=[job_id])).json()
+        self.assertEqual(status["status"], "done")
+        body = b"".join(self.client.get(status["download_url"]).streaming_content).decode()
+        self.assertIn("Maria", body)
+        self.assertNotIn("José", body)
+
+    def test_pdf_job_and_cleanup(self):
+        job = ExportJob.objects.create(kind="pdf", params={"month": "2025-09"})
+        run_job(claim_next())
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done")
+        path = job.file.path
+        with open(path, "rb") as fh:
+            self.assertEqual(fh.read(4), b"%PDF")
+
+        self.assertEqual(cleanup(now=job.finished_at + timedelta(days=2)), 1)
+        self.assertFalse(ExportJob.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_rejects_unknown_kind(self):
+        resp = self.client.post(reverse("export_job_create"), {"kind": "doc"})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_job_given_up_by_cleanup_stays_failed(self):
+        ExportJob.objects.create(kind="csv")
+        job = claim_next()
+        cleanup(now=timezone.now() + timedelta(seconds=settings.EXPORT_JOB_TIMEOUT + 1))  # "travado"
+        with self.assertLogs("core.jobs", "WARNING"):
+            job = run_job(job)
+        self.assertEqual((job.status, job.error), ("failed", "Tempo esgotado"))
+        self.assertFalse(job.file)
+
+    def test_header_uses_jobs_only_with_a_worker(self):
+        self.assertNotContains(self.client.get(reverse("feedback_list")), "data-export-job=")
+        with override_settings(EXPORT_JOBS_ENABLED=True):
+            self.assertContains(self.client.get(reverse("feedback_list")), 'data-export-job="xlsx"')
+
+
+class ImportTests(SupportTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.mkdtemp(dir=TEST_MEDIA_ROOT)
+
+    def _write(self, name, data):
+        path = os.path.join(self.tmp, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def _export_and_clear(self, fmt):
+        rows = [("elogio", "pendente"), ("reclamacao", "resolvido"), ("sugestao", "em_analise")]
+        for i, (tipo, status) in enumerate(rows):
+            fb = self.make_feedback(student_name=f"João {i}", type=tipo, status=status, course_name="RCA360")
+            Feedback.objects.filter(pk=fb.pk).update(created_at=timezone.now() - timedelta(days=400 + i))
+        rollups.rebuild()
+        expected = sorted(Feedback.objects.values_list("student_name", "type", "status", "course_name", "created_at"))
+        fh, _ = export_cache.open_export(fmt, {})
+        with fh:
+            path = self._write(f"export.{fmt}", fh.read())
+        Feedback.objects.all().delete()
+        return path, expected
+
+    def _imported(self):
+        rows = Feedback.objects.values_list("student_name", "type", "status", "course_name", "created_at")
+        return sorted((*r[:4], r[4].replace(second=0, microsecond=0)) for r in rows)
+
+    def test_round_trip_csv_and_xlsx(self):
+        for fmt in ("csv", "xlsx"):
+            with self.subTest(fmt=fmt):
+                path, expected = self._export_and_clear(fmt)
+                out = io.StringIO()
+                call_command("import_feedbacks", path, stdout=out)
+                self.assertIn("3 linhas importadas, 0 rejeitadas", out.getvalue())
+                self.assertEqual(self._imported(), [(*r[:4], r[4].replace(second=0, microsecond=0)) for r in expected])
+                # bulk_create não dispara signals: rollup e índice de busca acompanham mesmo assim
+                self.assertEqual(rollups.verify(), {})
+                self.assertEqual(filter_feedbacks({"q": "joao"}).count(), 3)
+                Feedback.objects.all().delete()
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        path = self._write("h.csv", (
+            "data;aluno;tipo;assunto;status\n"
+            "2020-01-02 10:00;Ana;elogio;outros;\n"
+            "2020-01-02;Bia;Reclamação;Financeiro;Resolvido\n"
+            "ontem;Caio;elogio;outros;\n"
+            "2020-01-03 08:00;Duda;bronca;outros;\n"
+            ";;;;\n"
+        ).encode())
+        err = io.StringIO()
+        call_command("import_feedbacks", path, stdout=io.StringIO(), stderr=err)
+        self.assertIn("linha 4: data inválida", err.getvalue())
+        self.assertIn("linha 5: tipo inválido", err.getvalue())
+        self.assertEqual(
+            sorted(Feedback.objects.values_list("student_name", "type", "subject", "status")),
+            [("Ana", "elogio", "outros", "pendente"), ("Bia", "reclamacao", "financeiro", "resolvido")],
+        )
+        run = FeedbackImport.objects.get()
+        self.assertEqual((run.status, run.rows_read, run.imported, run.rejected), ("done", 5, 2, 2))
+
+        with self.assertRaisesMessage(CommandError, "já importado"):
+            call_command("import_feedbacks", path, stdout=io.StringIO())
+
+    def test_resumes_after_failure(self):
+        lines = "".join(f"2021-05-{d:02d} 12:00;Aluno {d};elogio;outros\n" for d in range(1, 8))
+        path = self._write("r.csv", f"data;aluno;tipo;assunto\n{lines}".encode())
+        real_flush, calls = imports._flush, []
+
+        def flaky(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError("disco cheio")
+            real_flush(*args)
+
+        with mock.patch("core.imports._flush", side_effect=flaky):
+            with self.assertRaises(RuntimeError):
+                imports.import_file(path, batch_size=3)
+        run = FeedbackImport.objects.get()
+        self.assertEqual((run.status, run.rows_read, Feedback.objects.count()), ("failed", 3, 3))
+
+        run = imports.import_file(path, batch_size=3)
+        self.assertEqual((run.status, run.rows_read, run.imported), ("done", 7, 7))
+        self.assertEqual(Feedback.objects.count(), 7)
+        self.assertEqual(Feedback.objects.values("student_name").distinct().count(), 7)
+        self.assertEqual(rollups.verify(), {})
+
+
+class ApiTests(SupportTestCase):
+    def setUp(self):
+        super().setUp()
+        self.fbs = [self.make_feedback(student_name=f"Aluno {i}", course_name="RCA360") for i in range(5)]
+        self.make_feedback(student_name="Outro", course_name="POWERFISIO")
+        FeedbackAttachment.objects.create(
+            feedback=self.fbs[0], file=ContentFile(b"x", name="print.png"), original_name="print.png",
+            mime_type="image/png",
+        )
+        FeedbackComment.objects.create(feedback=self.fbs[0], author_name="Op", comment_text="oi")
+
+    def test_filters_sparse_fields_and_cursor(self):
+        url, params, seen = reverse("api_feedbacks"), {"curso": "rca360", "fields": "id,status", "limit": 2}, []
+        while url:
+            resp = self.client.get(url, params)
+            body = resp.json()
+            self.assertTrue(all(set(r) == {"id", "status"} for r in body["results"]))
+            seen += [r["id"] for r in body["results"]]
+            url, params = body["next"], None
+        self.assertEqual(seen, [fb.pk for fb in reversed(self.fbs)])
+
+    def test_relations_only_when_requested(self):
+        url = reverse("api_feedback", args=[self.fbs[0].pk])
+        self.assertNotIn("attachments", self.client.get(url).json())
+        with self.assertNumQueries(5):  # sessão, usuário, feedback, anexos, comentários
+            data = self.client.get(url, {"fields": "id,attachments,comments"}).json()
+        self.assertEqual(data["attachments"][0]["name"], "print.png")
+        self.assertEqual(data["comments"][0]["text"], "oi")
+
+    def test_bad_params(self):
+        self.assertEqual(self.client.get(reverse("api_feedbacks"), {"fields": "id,senha"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("api_feedbacks"), {"limit": "muitos"}).status_code, 400)
+        self.assertEqual(self.client.post(reverse("api_feedbacks")).status_code, 405)
+
+    def test_gzip_and_etag(self):
+        url = reverse("api_feedbacks")
+        resp = self.client.get(url, {"limit": 500}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(resp["Content-Encoding"], "gzip")
+        self.assertEqual(len(json.loads(gzip.decompress(resp.content))["results"]), 6)
+
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=resp["ETag"], HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(resp.status_code, 304)
+        self.fbs[1].status = "resolvido"
+        self.fbs[1].save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=resp["ETag"]).status_code, 200)
+
+
+@override_settings(CHANGE_FEED_SETTLE_SECONDS=0)
+class ChangeFeedTests(SupportTestCase):
+    def setUp(self):
+        super().setUp()
+        self.fb = self.make_feedback(student_name="Aluno")
+        self.comment = FeedbackComment.objects.create(feedback=self.fb, author_name="Op", comment_text="oi")
+        self.att = FeedbackAttachment.objects.create(
+            feedback=self.fb, file=ContentFile(b"x", name="print.png"), original_name="print.png"
+        )
+
+    def drain(self, token=None, limit=2):
+        seen = []
+        while True:
+            results, token, has_more = changes.page(token, limit)
+            seen += [(r["kind"], r["id"], r.get("deleted", False)) for r in results]
+            if not has_more:
+                return seen, token
+
+    def test_pages_in_order_and_resume(self):
+        seen, token = self.drain()
+        self.assertEqual(
+            seen, [("feedback", self.fb.pk, False), ("comment", self.comment.pk, False), ("attachment", self.att.pk, False)]
+        )
+        self.assertEqual(self.drain(token)[0], [])
+
+        self.comment.comment_text = "editado"
+        self.comment.save()
+        results, token, _ = changes.page(token)
+        self.assertEqual([(r["kind"], r["data"]["text"]) for r in results], [("comment", "editado")])
+
+        ids = self.fb.pk, self.comment.pk, self.att.pk
+        self.fb.delete()  # cascata: comentário e anexo também viram tombstone
+        seen, _ = self.drain(token)
+        self.assertEqual(
+            sorted(seen), [("attachment", ids[2], True), ("comment", ids[1], True), ("feedback", ids[0], True)]
+        )
+
+    @override_settings(CHANGE_FEED_SETTLE_SECONDS=60)
+    def test_late_commit_is_not_skipped(self):
+        now = timezone.now()
+        Feedback.objects.update(updated_at=now - timedelta(minutes=5))
+        FeedbackComment.objects.update(updated_at=now - timedelta(minutes=5))
+        FeedbackAttachment.objects.update(updated_at=now - timedelta(minutes=5))
+        results, token, _ = changes.page(None, now=now)
+        self.assertEqual(len(results), 3)
+
+        # transação que começou há 30s (updated_at de então) e só fez COMMIT depois da página acima
+        late = self.make_feedback(student_name="Atrasado")
+        Feedback.objects.filter(pk=late.pk).update(updated_at=now - timedelta(seconds=30))
+        self.assertEqual(changes.page(token, now=now + timedelta(seconds=10))[0], [])  # ainda na janela
+        results, _, _ = changes.page(token, now=now + timedelta(seconds=61))
+        self.assertEqual([(r["kind"], r["id"]) for r in results], [("feedback", late.pk)])
+
+    def test_view_errors_and_expired_token(self):
+        url = reverse("api_changes")
+        body = self.client.get(url, {"limit": 500}).json()
+        self.assertEqual(len(body["results"]), 3)
+        self.assertFalse(body["has_more"])
+        self.assertEqual(self.client.get(url, {"since": "lixo"}).status_code, 400)
+        old = changes.encode_token(timezone.now() - timedelta(days=settings.CHANGE_FEED_TOMBSTONE_DAYS + 1), 0, 0)
+        self.assertEqual(self.client.get(url, {"since": old}).status_code, 410)
+
+    def test_purge_keeps_recent_tombstones(self):
+        comment_id = self.comment.pk
+        self.comment.delete()
+        Tombstone.objects.create(kind="comment", object_id=999)
+        Tombstone.objects.filter(object_id=999).update(deleted_at=timezone.now() - timedelta(days=365))
+        self.assertEqual(changes.purge(), 1)
+        self.assertEqual(list(Tombstone.objects.values_list("object_id", flat=True)), [comment_id])
+
+    def test_command_saves_token_after_success(self):
+        tmp = tempfile.mkdtemp()
+        token_file, out = os.path.join(tmp, "token"), os.path.join(tmp, "changes.jsonl")
+        call_command("changes", token_file=token_file, out=out, limit=1, stderr=io.StringIO())
+        with open(out, encoding="utf-8") as f:
+            self.assertEqual([json.loads(line)["kind"] for line in f], ["feedback", "comment", "attachment"])
+
+        call_command("changes", token_file=token_file, out=out, stderr=io.StringIO())
+        with open(out, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "")
+
+
+class StatsSummaryTests(SupportTestCase):
+    def setUp(self):
+        super().setUp()
+        self.make_feedback(type="elogio", status="resolvido")
+        self.make_feedback(type="reclamacao")
+        self.make_feedback(type="sugestao")
+        old = self.make_feedback(type="elogio")
+        old.created_at -= timedelta(days=62)
+        old.save()
+        self.ym = timezone.localtime().strftime("%Y-%m")
+
+    def test_single_month_one_query(self):
+        with self.assertNumQueries(1):
+            data = month_summaries([self.ym])[self.ym]
+        self.assertEqual(
+            data,
+            {"elogios": 1, "reclamacoes": 1, "sugestoes": 1, "resolvidos": 1, "total": 3,
+             "taxa_resolucao_pct": 33.3},
+        )
+        self.assertEqual(self.client.get(reverse("stats_summary"), {"month": self.ym}).json(), data)
+
+    def test_several_months_one_round_trip(self):
+        months = [self.ym, "2000-01"]
+        with self.assertNumQueries(1):
+            data = month_summaries(months)
+        self.assertEqual(data["2000-01"]["total"], 0)
+        resp = self.client.get(reverse("stats_summary"), {"months": ",".join(months)})
+        self.assertEqual(resp.json()["months"][self.ym]["total"], 3)
+
+    def test_invalid_or_too_many_months_are_bad_requests(self):
+        url = reverse("stats_summary")
+        for params in ({"months": "2024-13"}, {"months": f"{self.ym},x"}, {"month": "abc"}):
+            with self.subTest(**params):
+                resp = self.client.get(url, params)
+                self.assertEqual(resp.status_code, 400)
+                self.assertIn("error", resp.json())
+        months = [f"{2000 + i // 12}-{i % 12 + 1:02d}" for i in range(MAX_MONTHS + 1)]
+        self.assertEqual(self.client.get(url, {"months": ",".join(months)}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"months": ",".join(months[:-1])}).status_code, 200)
+
+
+class RollupTests(SupportTestCase):
+    def test_tracks_create_status_change_and_delete(self):
+        fb = self.make_feedback(type="reclamacao", course_name="RCA360")
+        self.client.post(reverse("feedback_detail", args=[fb.pk]), {"action": "status", "status": "resolvido"})
+        self.make_feedback(type="elogio")
+        self.assertEqual(rollups.verify(), {})
+
+        brk = self.client.get(reverse("stats_breakdown")).json()
+        self.assertEqual(brk["status"], [{"label": "Pendente", "value": 1}, {"label": "Resolvido", "value": 1}])
+        self.assertEqual(brk["course"], [{"label": "—", "value": 1}, {"label": "RCA360", "value": 1}])
+
+        fb.delete()
+        self.assertEqual(rollups.verify(), {})
+        self.assertEqual(self.client.get(reverse("stats_breakdown")).json()["type"], [{"label": "Elogio", "value": 1}])
+
+    def test_command_verify_and_rebuild(self):
+        self.make_feedback()
+        Feedback.objects.update(status="resolvido")  # bypassa os signals
+        with self.assertRaises(CommandError):
+            call_command("rollups", "verify", stdout=io.StringIO())
+        call_command("rollups", "rebuild", stdout=io.StringIO())
+        call_command("rollups", "verify", stdout=io.StringIO())
+
+
+class BulkStatusTests(SupportTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("feedback_bulk_status")
+        self.old_resolved = timezone.now() - timedelta(days=3)
+        self.done = self.make_feedback(status="resolvido", resolved_at=self.old_resolved)
+        self.open = [self.make_feedback(course_name="RCA360") for _ in range(3)]
+        self.other = self.make_feedback(course_name="POWERFISIO")
+
+    def test_selected_rows_keep_resolved_at_semantics(self):
+        before = timezone.now()
+        ids = [self.done.pk, self.open[0].pk, self.open[1].pk]
+        resp = self.client.post(self.url, {"new_status": "resolvido", "scope": "selected", "ids": ids}, follow=True)
+        self.assertContains(resp, "2 feedbacks atualizados para Resolvido.")
+
+        self.done.refresh_from_db()
+        self.assertEqual(self.done.resolved_at, self.old_resolved)  # já estava resolvido: nada muda
+        for fb in self.open[:2]:
+            fb.refresh_from_db()
+            self.assertEqual(fb.status, "resolvido")
+            self.assertGreaterEqual(fb.resolved_at, before)
+            self.assertGreaterEqual(fb.updated_at, before)
+        self.assertEqual(Feedback.objects.get(pk=self.open[2].pk).status, "pendente")
+        self.assertEqual(rollups.verify(), {})
+
+        self.client.post(self.url, {"new_status": "em_analise", "scope": "selected", "ids": ids})
+        self.assertFalse(Feedback.objects.filter(pk__in=ids).exclude(resolved_at=None).exists())
+        self.assertEqual(rollups.verify(), {})
+
+    def test_all_matching_filters(self):
+        resp = self.client.post(self.url, {"new_status": "em_analise", "scope": "filtered", "curso": "rca360"})
+        self.assertRedirects(resp, reverse("feedback_list") + "?curso=rca360", fetch_redirect_response=False)
+        self.assertEqual(
+            set(Feedback.objects.filter(status="em_analise").values_list("pk", flat=True)),
+            {fb.pk for fb in self.open},
+        )
+        self.assertEqual(Feedback.objects.get(pk=self.other.pk).status, "pendente")
+        self.assertEqual(rollups.verify(), {})
+
+    def test_thousands_in_one_transaction(self):
+        Feedback.objects.bulk_create(
+            Feedback(student_name=f"A{i}", type="elogio", subject="outros") for i in range(1200)
+        )
+        rollups.rebuild()
+        ids = list(Feedback.objects.values_list("pk", flat=True))
+        self.assertEqual(bulk.set_status("resolvido", ids=ids), len(ids) - 1)
+        self.assertEqual(Feedback.objects.exclude(status="resolvido").count(), 0)
+        self.assertEqual(rollups.verify(), {})
+
+    def test_invalid_requests_change_nothing(self):
+        self.client.post(self.url, {"new_status": "arquivado", "scope": "filtered"})
+        self.client.post(self.url, {"new_status": "resolvido", "scope": "selected"})
+        self.assertEqual(Feedback.objects.filter(status="resolvido").count(), 1)
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+
+    def test_create_with_timestamps_keeps_given_dates(self):
+        old = timezone.now() - timedelta(days=400)
+        objs = [
+            Feedback(student_name="Antigo", type="elogio", subject="outros", created_at=old, updated_at=old),
+            Feedback(student_name="Sem data", type="elogio", subject="outros", created_at=old),
+        ]
+        with self.assertNumQueries(1):  # um INSERT, sem UPDATE depois
+            bulk.create_with_timestamps(Feedback, objs)
+        rows = {r[0]: r[1:] for r in Feedback.objects.values_list("student_name", "created_at", "updated_at")}
+        self.assertEqual(rows["Antigo"], (old, old))
+        self.assertEqual(rows["Sem data"][0], old)
+        self.assertGreater(rows["Sem data"][1], old)  # None: fica o agora do auto_now
+        # o modelo não é alterado (nada de desligar auto_now_add no processo inteiro)
+        self.assertTrue(Feedback._meta.get_field("created_at").auto_now_add)
+        self.assertTrue(Feedback._meta.get_field("updated_at").auto_now)
+
+
+class StatsDashboardTests(SupportTestCase):
+    def test_payload_and_conditional_get(self):
+        self.make_feedback(type="elogio")
+        url = reverse("stats_dashboard")
+        resp = self.client.get(url)
+        data = resp.json()
+        self.assertEqual(data["summary"]["elogios"], 1)
+        self.assertEqual(data["breakdown"]["type"], [{"label": "Elogio", "value": 1}])
+        etag = resp["ETag"]
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertFalse([q for q in ctx.captured_queries if "core_feedbackdailystat" in q["sql"]])
+
+        self.make_feedback(type="sugestao")
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["summary"]["total"], 2)
+
+    def test_etag_varies_with_month(self):
+        a = self.client.get(reverse("stats_dashboard"), {"month": "2025-01"})["ETag"]
+        b = self.client.get(reverse("stats_dashboard"), {"month": "2025-02"})["ETag"]
+        self.assertNotEqual(a, b)
+
+    def test_breakdown_invalid_month_is_bad_request(self):
+        for params in ({"month": "2025-13"}, {"month": "x"}, {"de": "ontem"}):
+            with self.subTest(**params):
+                self.assertEqual(self.client.get(reverse("stats_breakdown"), params).status_code, 400)
+
+    def test_invalid_month_is_bad_request(self):
+        url = reverse("stats_dashboard")
+        for month in ("abc", "2025-13", "2025-01-01", "0001-01"):
+            with self.subTest(month=month):
+                resp = self.client.get(url, {"month": month})
+                self.assertEqual(resp.status_code, 400)
+                self.assertIn("error", resp.json())
+                self.assertFalse(resp.has_header("ETag"))
+        resp = self.client.get(url, {"month": "2025-1"})  # normalizado: mesmo ETag de 2025-01
+        self.assertEqual(resp.json()["month"], "2025-01")
+        self.assertEqual(resp["ETag"], self.client.get(url, {"month": "2025-01"})["ETag"])
+
+
+class SearchTests(SupportTestCase):
+    def setUp(self):
+        super().setUp()
+        self.joao = self.make_feedback(student_name="João da Conceição", course_name="MOBILIZAÇÃO NEURAL")
+        self.maria = self.make_feedback(student_name="Maria", description="Reclamou do João na aula")
+
+    def ids(self, **params):
+        return set(filter_feedbacks(params).values_list("id", flat=True))
+
+    def test_accent_case_and_prefix(self):
+        self.assertEqual(self.ids(aluno="joao"), {self.joao.id})
+        self.assertEqual(self.ids(aluno="CONCEI"), {self.joao.id})
+        self.assertEqual(self.ids(curso="mobilizacao"), {self.joao.id})
+        self.assertEqual(self.ids(q="joão"), {self.joao.id, self.maria.id})
+        self.assertEqual(self.ids(q="aula jo"), {self.maria.id})
+        self.assertEqual(self.ids(aluno="!!"), {self.joao.id, self.maria.id})
+
+    def test_index_follows_updates_and_deletes(self):
+        Feedback.objects.filter(pk=self.maria.pk).update(student_name="Mariana Estêvão")
+        self.assertEqual(self.ids(aluno="estevao"), {self.maria.id})
+        self.assertEqual(self.ids(aluno="maria"), {self.maria.id})
+        self.joao.delete()
+        self.assertEqual(self.ids(q="conceicao"), set())
+
+    def test_list_view_uses_index(self):
+        resp = self.client.get(reverse("feedback_list"), {"q": "Joao"})
+        self.assertEqual({f.id for f in resp.context["items"]}, {self.joao.id, self.maria.id})
+
+    def test_check_flags_missing_triggers(self):
+        # o banco de teste vem das migrations: tabela e triggers têm de estar lá
+        self.assertEqual(search.missing(), [])
+        self.assertEqual(check_search_index(databases=["default"]), [])
+        with connection.cursor() as cur:
+            cur.execute(f"DROP TRIGGER {search.FTS_TABLE}_au")  # como num remake da tabela
+        errors = check_search_index(databases=["default"])
+        self.assertEqual([e.id for e in errors], ["core.E001"])
+        self.assertIn(f"{search.FTS_TABLE}_au", errors[0].msg)
+        self.assertEqual(check_search_index(), [])  # sem --database não consulta o banco
+
+        call_command("search_index", stdout=io.StringIO())
+        self.assertEqual(search.missing(), [])
+        Feedback.objects.filter(pk=self.maria.pk).update(student_name="Mariana Estêvão")
+        self.assertEqual(self.ids(aluno="estevao"), {self.maria.id})
+
+
+class QueryPlanTests(SupportTestCase):
+    """
+    EXPLAIN QUERY PLAN das queries quentes: nenhuma pode cair em varredura
+    completa de core_feedback / core_feedbackdailystat.
+    """
+
+    SCANNED_TABLES = ("core_feedback", "core_feedbackdailystat")
+
+    def plan(self, qs):
+        sql, params = qs.query.sql_with_params()
+        with connection.cursor() as cur:
+            cur.execute("EXPLAIN QUERY PLAN " + sql, params)
+            return [row[-1] for row in cur.fetchall()]
+
+    def assertUsesIndexes(self, qs, sorted_by_index=False):
+        plan = self.plan(qs)
+        for step in plan:
+            for table in self.SCANNED_TABLES:
+                full_scan = step == f"SCAN {table}" or (
+                    step.startswith(f"SCAN {table} ") and "INDEX" not in step
+                )
+                if full_scan:
+                    self.fail(f"full scan de {table}:\n" + "\n".join(plan))
+        if sorted_by_index:
+            self.assertFalse([s for s in plan if "TEMP B-TREE" in s], "\n".join(plan))
+
+    def list_qs(self, **params):
+        return filter_feedbacks(params).order_by("-created_at")[:25]
+
+    def test_keyset_pages(self):
+        cursor = (timezone.now(), 10)
+        for params in ({}, {"status": "pendente"}):
+            qs = filter_feedbacks(params)
+            self.assertUsesIndexes(seek(qs, cursor)[:26], sorted_by_index=True)
+            self.assertUsesIndexes(seek(qs, cursor, backwards=True)[:26], sorted_by_index=True)
+
+    def test_list_and_export_filters(self):
+        self.assertUsesIndexes(self.list_qs(), sorted_by_index=True)
+        self.assertUsesIndexes(self.list_qs(tipo="elogio"), sorted_by_index=True)
+        self.assertUsesIndexes(self.list_qs(assunto="financeiro"), sorted_by_index=True)
+        self.assertUsesIndexes(self.list_qs(status="pendente"), sorted_by_index=True)
+        self.assertUsesIndexes(self.list_qs(de="2025-01-01", ate="2025-01-31"), sorted_by_index=True)
+        self.assertUsesIndexes(self.list_qs(status="resolvido", de="2025-01-01", ate="2025-01-31"))
+        self.assertUsesIndexes(
+            self.list_qs(tipo="elogio", assunto="outros", status="pendente", de="2025-01-01", ate="2025-12-31")
+        )
+        self.assertUsesIndexes(self.list_qs(q="joao", aluno="silva", curso="rca"))
+
+    def test_export_attachment_count(self):
+        self.assertUsesIndexes(
+            filter_feedbacks({"status": "pendente"}).order_by("-created_at").with_attachment_count()
+        )
+
+    def test_dashboard_version(self):
+        self.assertUsesIndexes(Feedback.objects.order_by().filter(updated_at__gt=timezone.now()).values("id"))
+        with connection.cursor() as cur:
+            cur.execute("EXPLAIN QUERY PLAN SELECT MAX(updated_at) FROM core_feedback")
+            self.assertIn("feedback_updated_idx", cur.fetchall()[0][-1])
+
+    def test_stats_month_ranges(self):
+        start, end = month_days("2025-09")
+        self.assertUsesIndexes(FeedbackDailyStat.objects.filter(day__gte=start, day__lt=end))
+
+
+class KeysetPaginationTests(SupportTestCase):
+    def setUp(self):
+        super().setUp()
+        # timestamps repetidos de propósito: o desempate é pelo id
+        now = timezone.now()
+        Feedback.objects.bulk_create(
+            Feedback(student_name=f"Aluno {i}", type="elogio", subject="outros", created_at=now - timedelta(minutes=i // 3))
+            for i in range(80)
+        )
+        self.expected = list(Feedback.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+    def walk(self, params=None):
+        url, params, seen, pages = reverse("feedback_list"), dict(params or {}), [], []
+        while True:
+            resp = self.client.get(url, params)
+            page = resp.context["page"]
+            pages.append(page)
+            seen += [f.id for f in page]
+            if not page.has_next:
+                return seen, pages
+            params = {"after": page.next_cursor}
+
+    def test_forward_and_back(self):
+        seen, pages = self.walk()
+        self.assertEqual(seen, self.expected)
+        self.assertEqual([len(p) for p in pages], [25, 25, 25, 5])
+
+        resp = self.client.get(reverse("feedback_list"), {"before": pages[2].previous_cursor})
+        self.assertEqual([f.id for f in resp.context["page"]], self.expected[25:50])
+        self.assertTrue(resp.context["page"].has_previous)
+        self.assertEqual(resp.context["total"], 80)
+
+    def test_deep_page_costs_the_same(self):
+        _, pages = self.walk()
+        url = reverse("feedback_list")
+        with CaptureQueriesContext(connection) as first:
+            self.client.get(url, {"after": pages[0].next_cursor})
+        with CaptureQueriesContext(connection) as deep:
+            self.client.get(url, {"after": pages[1].next_cursor})
+        self.assertEqual(len(first), len(deep))
+        # total vem do cache; nada de COUNT/OFFSET em core_feedback
+        counts = [q for q in deep.captured_queries if q["sql"].startswith('SELECT COUNT(*) AS "__count" FROM "core_feedback" ')]
+        self.assertFalse(counts)
+        self.assertFalse([q for q in deep.captured_queries if "OFFSET" in q["sql"]])
+
+    def test_bad_cursor_falls_back_to_first_page(self):
+        resp = self.client.get(reverse("feedback_list"), {"after": "lixo"})
+        self.assertEqual([f.id for f in resp.context["page"]], self.expected[:25])
+
+
+class QueryBudgetMixin:
+    """Orçamento de queries: falha se o bloco (incluindo respostas em streaming) passar de `budget`."""
+
+    @contextmanager
+    def assertQueryBudget(self, budget, label=""):
+        with CaptureQueriesContext(connection) as ctx:
+            yield ctx
+        if len(ctx) > budget:
+            sql = "\n".join(q["sql"] for q in ctx.captured_queries)
+            self.fail(f"{label}: {len(ctx)} queries, orçamento {budget}\n{sql}")
+
+    def fetch(self, method, url, data=None):
+        resp = getattr(self.client, method)(url, data or {})
+        if resp.streaming:
+            b"".join(resp.streaming_content)
+        return resp
+
+
+class QueryBudgetTests(QueryBudgetMixin, SupportTestCase):
+    """
+    Cada view de core.views com um teto de queries, medido com volume realista
+    (60 feedbacks x 2 anexos x 3 comentários). Views novas precisam entrar em BUDGETS.
+    """
+
+    # nome da URL → teto. Inclui o custo fixo de cada request autenticado
+    # (leitura da sessão e do usuário; o grupo Suporte vem do cache e a
+    # sessão só é regravada a cada SESSION_TOUCH_INTERVAL).
+    BUDGETS = {
+        "home": 4,
+        "feedback_list": 4,
+        "feedback_create": 2,
+        # leitura + UPDATE + 2 linhas do rollup por dia afetado (savepoints contam)
+        "feedback_bulk_status": 13,
+        "feedback_detail": 5,
+        "attachment_download": 3,
+        "attachment_derivative": 3,
+        # exports: +1 da versão dos dados (core.export_cache); os números são de um miss
+        "export_csv": 4,
+        "export_excel": 5,
+        "export_pdf": 5,
+        "export_job_create": 3,
+        "export_job_status": 3,
+        "export_job_download": 3,
+        "api_feedbacks": 5,  # página + anexos + comentários
+        "api_feedback": 5,
+        "api_changes": 6,  # uma query por fonte (feedbacks, comentários, anexos, tombstones)
+        "stats_summary": 3,
+        "stats_breakdown": 3,
+        "stats_dashboard": 5,
+        "dashboard": 2,
+        "ping": 2,
+        "logout": 4,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for i in range(60):
+            fb = Feedback.objects.create(
+                student_name=f"Aluno {i}", type="reclamacao", subject="plataforma", course_name="RCA360"
+            )
+            for j in range(2):
+                FeedbackAttachment.objects.create(
+                    feedback=fb, file=ContentFile(b"x" * 64, name=f"a{j}.txt"), mime_type="text/plain"
+                )
+            for j in range(3):
+                FeedbackComment.objects.create(feedback=fb, author_name="Op", comment_text=f"c{j}")
+        cls.fb = fb
+        cls.att = fb.attachments.first()
+        cls.img = FeedbackAttachment.objects.create(
+            feedback=fb, file=ContentFile(png_bytes(), name="print.png"), mime_type="image/png"
+        )
+        cls.job = ExportJob.objects.create(kind="csv")
+        run_job(claim_next())
+
+    def requests(self):
+        """nome da URL → (método, url, dados)."""
+        return {
+            "home": ("get", reverse("home"), None),
+            "feedback_list": ("get", reverse("feedback_list"), {"status": "pendente"}),
+            "feedback_create": ("get", reverse("feedback_create"), None),
+            "feedback_bulk_status": (
+                "post",
+                reverse("feedback_bulk_status"),
+                {"new_status": "em_analise", "scope": "selected", "ids": [self.fb.pk]},
+            ),
+            "feedback_detail": ("get", reverse("feedback_detail", args=[self.fb.pk]), None),
+            "attachment_download": ("get", reverse("attachment_download", args=[self.att.pk]), None),
+            "attachment_derivative": ("get", reverse("attachment_derivative", args=[self.img.pk, "thumb"]), None),
+            "export_csv": ("get", reverse("export_csv"), None),
+            "export_excel": ("get", reverse("export_excel"), None),
+            "export_pdf": ("get", reverse("export_pdf"), None),
+            "export_job_create": ("post", reverse("export_job_create"), {"kind": "xlsx"}),
+            "export_job_status": ("get", reverse("export_job_status", args=[self.job.pk]), None),
+            "export_job_download": ("get", reverse("export_job_download", args=[self.job.pk]), None),
+            "api_feedbacks": ("get", reverse("api_feedbacks"), {"fields": "id,status,attachments,comments"}),
+            "api_feedback": ("get", reverse("api_feedback", args=[self.fb.pk]), {"fields": "id,attachments,comments"}),
+            "api_changes": ("get", reverse("api_changes"), None),
+            "stats_summary": ("get", reverse("stats_summary"), None),
+            "stats_breakdown": ("get", reverse("stats_breakdown"), None),
+            "stats_dashboard": ("get", reverse("stats_dashboard"), None),
+            "dashboard": ("get", reverse("dashboard"), None),
+            "ping": ("get", reverse("ping"), None),
+            "logout": ("get", reverse("logout"), None),
+        }
+
+    def test_every_core_view_has_a_budget(self):
+        names = {
+            p.name for p in get_resolver().url_patterns
+            if getattr(p, "callback", None) and p.callback.__module__ == "core.views"
+        }
+        self.assertEqual(names - set(self.BUDGETS), set())
+        self.assertEqual(set(self.requests()), set(self.BUDGETS))
+
+    def test_views_stay_within_budget(self):
+        self.fetch("get", reverse("ping"))  # aquece o cache de permissão
+        for name, (method, url, data) in self.requests().items():
+            with self.subTest(view=name):
+                self.client.force_login(self.user)
+                with self.assertQueryBudget(self.BUDGETS[name], name):
+                    resp = self.fetch(method, url, data)
+                self.assertLess(resp.status_code, 400)
+
+
+class SupportCacheTests(SupportTestCase):
+    def test_membership_is_cached_and_invalidated(self):
+        url = reverse("ping")
+        self.client.get(url)
+        before = support_cache_stats()
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertFalse([q for q in ctx.captured_queries if "auth_group" in q["sql"]])
+        self.assertEqual(support_cache_stats()["hits"], before["hits"] + 1)
+
+        self.user.groups.clear()
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.user.groups.add(Group.objects.get(name="Suporte"))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_revoke_reaches_other_workers(self):
+        url = reverse("ping")
+        other_worker = LocMemCache("other-worker", {})  # cache local de outro processo
+        with mock.patch("core.decorators.cache", other_worker):
+            self.assertEqual(self.client.get(url).status_code, 200)  # pertinência em cache lá
+
+        self.user.groups.clear()  # revogado neste processo
+
+        with mock.patch("core.decorators.cache", other_worker):
+            self.assertEqual(self.client.get(url).status_code, 302)
+
+
+class AttachmentDeliveryTests(SupportTestCase):
+    def setUp(self):
+        super().setUp()
+        fb = self.make_feedback()
+        self.att = FeedbackAttachment.objects.create(
+            feedback=fb, file=ContentFile(b"0123456789", name="audio.mp3"), mime_type="audio/mpeg"
+        )
+        self.url = reverse("attachment_download", args=[self.att.pk])
+
+    def test_full_download_has_validators(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(b"".join(resp.streaming_content), b"0123456789")
+        self.assertEqual(resp["Accept-Ranges"], "bytes")
+        self.assertEqual(resp["Content-Type"], "audio/mpeg")
+        self.assertTrue(resp["ETag"] and resp["Last-Modified"])
+
+    def test_byte_ranges(self):
+        for header, body, content_range in [
+            ("bytes=2-5", b"2345", "bytes 2-5/10"),
+            ("bytes=7-", b"789", "bytes 7-9/10"),
+            ("bytes=-3", b"789", "bytes 7-9/10"),
+            ("bytes=8-99", b"89", "bytes 8-9/10"),
+        ]:
+            resp = self.client.get(self.url, HTTP_RANGE=header)
+            self.assertEqual(resp.status_code, 206, header)
+            self.assertEqual(b"".join(resp.streaming_content), body)
+            self.assertEqual(resp["Content-Range"], content_range)
+            self.assertEqual(resp["Content-Length"], str(len(body)))
+
+    def test_unsatisfiable_and_ignored_ranges(self):
+        resp = self.client.get(self.url, HTTP_RANGE="bytes=10-")
+        self.assertEqual(resp.status_code, 416)
+        self.assertEqual(resp["Content-Range"], "bytes */10")
+        self.assertEqual(resp["Content-Type"], "text/plain")
+        # vários intervalos ou If-Range desatualizado → arquivo inteiro
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE="bytes=0-1,4-5").status_code, 200)
+        resp = self.client.get(self.url, HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE='"outro"')
+        self.assertEqual(resp.status_code, 200)
+
+    def test_conditional_get(self):
+        first = self.client.get(self.url)
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp["ETag"], first["ETag"])
+        resp = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(resp.status_code, 304)
+        resp = self.client.get(self.url, HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE=first["ETag"])
+        self.assertEqual(resp.status_code, 206)
+
+    def test_offload_headers(self):
+        with override_settings(ATTACHMENT_OFFLOAD="sendfile"):
+            resp = self.client.get(self.url)
+        self.assertEqual(resp["X-Sendfile"], self.att.file.path)
+        self.assertEqual(resp.content, b"")
+        with override_settings(ATTACHMENT_OFFLOAD="accel"):
+            resp = self.client.get(self.url)
+        self.assertEqual(resp["X-Accel-Redirect"], "/protected-media/" + self.att.file.name)
+        self.assertEqual(resp["Content-Type"], "audio/mpeg")
+
+    def test_requires_support_group(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+
+class AttachmentStorageTests(SupportTestCase):
+    def attach(self, fb, data=b"mesmo print", name="print.png"):
+        return FeedbackAttachment.objects.create(feedback=fb, file=ContentFile(data, name=name))
+
+    def test_identical_uploads_share_one_blob(self):
+        a = self.attach(self.make_feedback())
+        b = self.attach(self.make_feedback(), name="outro-nome.png")
+        c = self.attach(self.make_feedback(), data=b"outro conteudo")
+        self.assertEqual(a.file.name, b.file.name)
+        self.assertNotEqual(a.file.name, c.file.name)
+        self.assertRegex(a.file.name, r"^cas/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}$")
+        self.assertEqual(AttachmentBlob.objects.get(sha256=a.file.name[-64:]).refs, 2)
+        self.assertEqual(a.file.read(), b"mesmo print")
+
+    def test_refcount_and_gc(self):
+        a = self.attach(self.make_feedback())
+        fb = self.make_feedback()
+        self.attach(fb)
+        path = a.file.path
+        blob = AttachmentBlob.objects.get()
+
+        fb.delete()  # cascata também conta
+        a.delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.refs, 0)
+
+        self.assertEqual(blobs.gc(), (0, 0))  # ainda dentro da carência
+        self.assertEqual(blobs.gc(timezone.now() + timedelta(hours=2)), (1, blob.size))
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(AttachmentBlob.objects.exists())
+
+    def test_dedupe_command_adopts_legacy_files(self):
+        legacy = FileSystemStorage(location=settings.MEDIA_ROOT)
+        rows = []
+        for name in ("feedbacks/2025/09/a.png", "feedbacks/2025/09/b.png"):
+            name = legacy.save(name, ContentFile(b"mesmo print"))
+            rows.append(FeedbackAttachment.objects.create(feedback=self.make_feedback(), file=name))
+        rows.append(FeedbackAttachment.objects.create(feedback=self.make_feedback(), file=rows[0].file.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("dedupe_attachments", stdout=io.StringIO())
+
+        names = {a.file.name for a in FeedbackAttachment.objects.all()}
+        self.assertEqual(len(names), 1)
+        self.assertEqual(AttachmentBlob.objects.get().refs, 3)
+        self.assertFalse(legacy.exists("feedbacks/2025/09/a.png"))
+        self.assertEqual(
+            sorted(FeedbackAttachment.objects.values_list("original_name", flat=True)),
+            ["a.png", "a.png", "b.png"],
+        )
+
+
+class MediaPipelineTests(SupportTestCase):
+    def attach(self, data, mime="image/png", name="print.png"):
+        return FeedbackAttachment.objects.create(
+            feedback=self.make_feedback(), file=ContentFile(data, name=name), mime_type=mime
+        )
+
+    def test_worker_builds_derivatives(self):
+        img = self.attach(png_bytes((2400, 1200)))
+        txt = self.attach(b"texto", mime="text/plain", name="a.txt")
+        bad = self.attach(b"not a png")
+        self.assertEqual(img.media_status, "pending")
+
+        media.work(once=True)
+
+        statuses = dict(FeedbackAttachment.objects.values_list("pk", "media_status"))
+        self.assertEqual(statuses, {img.pk: "done", txt.pk: "done", bad.pk: "failed"})
+        for kind, side in (("thumb", 320), ("preview", 1600)):
+            with default_storage.open(thumbnails.derivative_name(img.file.name, kind)) as f:
+                self.assertEqual(Image.open(f).size, (side, side // 2))
+
+    def test_derivative_endpoint(self):
+        img = self.attach(png_bytes())
+        media.process(img)
+        url = reverse("attachment_derivative", args=[img.pk, "thumb"])
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Type"], "image/webp")
+
+        # fora do cache em disco → regera na hora
+        thumbnails.delete(img.file.name)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.assertEqual(self.client.get(reverse("attachment_derivative", args=[img.pk, "big"])).status_code, 404)
+        txt = self.attach(b"texto", mime="text/plain", name="a.txt")
+        self.assertEqual(self.client.get(reverse("attachment_derivative", args=[txt.pk, "thumb"])).status_code, 404)
+
+    def test_backfill_command(self):
+        img = self.attach(png_bytes())
+        before = img.updated_at
+        call_command("media_backfill", stdout=io.StringIO())
+        img.refresh_from_db()
+        self.assertEqual(img.media_status, "done")
+        self.assertGreater(img.updated_at, before)  # o feed de mudanças vê o novo status
+        self.assertTrue(default_storage.exists(thumbnails.derivative_name(img.file.name, "preview")))
+
+
+class AudioMetadataTests(SupportTestCase):
+    def test_probe_reads_container_headers(self):
+        for name, (data, duration, extra) in audio_samples().items():
+            with self.subTest(container=name):
+                info = audio.probe(io.BytesIO(data))
+                self.assertAlmostEqual(info["duration"], duration, places=2)
+                for key, value in extra.items():
+                    self.assertEqual(info[key], value)
+
+    def test_probe_rejects_other_files(self):
+        for data in (png_bytes((400, 400)), b"texto qualquer", b""):
+            with self.assertRaises(ValueError):
+                audio.probe(io.BytesIO(data))
+
+    def test_worker_fills_duration(self):
+        att = FeedbackAttachment.objects.create(
+            feedback=self.make_feedback(), file=ContentFile(wav_bytes(3), name="nota.wav"), mime_type="audio/wav"
+        )
+        media.work(once=True)
+        att.refresh_from_db()
+        self.assertEqual((att.media_status, att.duration_seconds), ("done", 3))
+        self.assertEqual(att.media_info["format"], "wav")
+
+    def test_backfill_audio_stage(self):
+        att = FeedbackAttachment.objects.create(
+            feedback=self.make_feedback(), file=ContentFile(wav_bytes(2), name="nota.wav"),
+            mime_type="audio/wav", media_status="done",
+        )
+        call_command("media_backfill", "--stage", "audio", stdout=io.StringIO())
+        att.refresh_from_db()
+        self.assertEqual(att.duration_seconds, 2)
+
+
+class SlidingSessionTests(SupportTestCase):
+    def session_writes(self, ctx):
+        return [
+            q for q in ctx.captured_queries
+            if "django_session" in q["sql"] and q["sql"].split()[0] in ("INSERT", "UPDATE", "DELETE")
+        ]
+
+    def test_read_only_requests_do_not_write_session(self):
+        url = reverse("ping")
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(3):
+                self.client.get(url)
+        self.assertEqual(self.session_writes(ctx), [])
+
+    def test_session_is_touched_after_interval(self):
+        url = reverse("ping")
+        self.client.get(url)
+        touched = self.client.session[SESSION_TOUCH_KEY]
+        with mock.patch("core.middleware.time.time", return_value=touched + 5 * 60 + 1):
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.get(url)
+        self.assertTrue(self.session_writes(ctx))
+        self.assertIn(settings.SESSION_COOKIE_NAME, resp.cookies)
+        self.assertEqual(self.client.session[SESSION_TOUCH_KEY], touched + 5 * 60 + 1)
+
+
+class RequestProfilingTests(SupportTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user.is_staff = True
+        self.user.save()
+
+    def metrics(self, resp):
+        return {m.split(";")[0].strip(): m for m in resp["Server-Timing"].split(",")}
+
+    def test_server_timing_is_staff_only(self):
+        self.user.is_staff = False
+        self.user.save()
+        self.assertFalse(self.client.get(reverse("feedback_list")).has_header("Server-Timing"))
+        self.client.logout()
+        self.assertFalse(self.client.get(reverse("ping")).has_header("Server-Timing"))
+        with override_settings(DEBUG=True):
+            self.assertIn("total", self.metrics(self.client.get(reverse("ping"))))
+
+    def test_server_timing_splits_sql_render_and_exports(self):
+        self.make_feedback()
+        metrics = self.metrics(self.client.get(reverse("feedback_list")))
+        self.assertTrue({"sql", "render", "view", "total"} <= set(metrics))
+        self.assertRegex(metrics["sql"], r'desc="[1-9]\d* queries"')
+
+        self.assertIn("xlsx", self.metrics(self.client.get(reverse("export_excel"))))  # miss: gera o arquivo
+
+    def test_streamed_responses_are_marked(self):
+        self.assertNotIn("stream", self.metrics(self.client.get(reverse("feedback_list"))))
+        resp = self.client.get(reverse("export_csv"))  # miss: as linhas saem depois dos headers
+        self.assertIn("stream", self.metrics(resp))
+        with override_settings(PROFILING_SLOW_MS=0), self.assertLogs("core.profiling", "WARNING") as logs:
+            self.client.get(reverse("export_csv"))
+        self.assertIs(json.loads(logs.output[0].split("slow request: ", 1)[1])["streaming"], True)
+
+    @override_settings(PROFILING_SLOW_MS=0)
+    def test_slow_requests_are_logged_with_top_queries(self):
+        with self.assertLogs("core.profiling", "WARNING") as logs:
+            self.client.get(reverse("feedback_list"))
+        record = json.loads(logs.output[0].split("slow request: ", 1)[1])
+        self.assertEqual((record["path"], record["status"]), (reverse("feedback_list"), 200))
+        self.assertTrue(record["top_queries"])
+        self.assertLessEqual(len(record["top_queries"]), 5)
+
+    def test_cprofile_dump_is_staff_only(self):
+        self.user.is_staff = False
+        self.user.save()
+        with override_settings(PROFILING_DUMP_DIR=tempfile.mkdtemp()):
+            resp = self.client.get(reverse("feedback_list"), {"_profile": "1"})
+            self.assertNotIn("X-Profile-Dump", resp)
+
+            self.user.is_staff = True
+            self.user.save()
+            resp = self.client.get(reverse("feedback_list"), {"_profile": "1"})
+            self.assertEqual(resp.status_code, 200)
+            self.assertTrue(os.path.exists(os.path.join(settings.PROFILING_DUMP_DIR, resp["X-Profile-Dump"])))
+
+
+class SeedTests(SupportTestCase):
+    def test_generates_consistent_data(self):
+        totals = seed.generate(300, comments=2, attachments=0.5, days=400, seed=7, batch_size=120)
+        self.assertEqual(totals["feedbacks"], Feedback.objects.count())
+        self.assertEqual(totals["comments"], FeedbackComment.objects.count())
+        self.assertEqual(totals["attachments"], FeedbackAttachment.objects.count())
+        self.assertGreater(totals["attachments"], 0)
+
+        self.assertEqual(rollups.verify(), {})  # bulk_create não passa pelos signals
+        self.assertEqual(blobs.recount(), 0)
+        courses = set(Feedback.objects.values_list("course_name", flat=True))
+        self.assertTrue(courses <= set(seed.COURSES))
+        self.assertFalse(Feedback.objects.filter(created_at__gt=timezone.now()).exists())
+        self.assertFalse(Feedback.objects.filter(status="resolvido", resolved_at__isnull=True).exists())
+
+    def test_same_seed_same_data(self):
+        seed.generate(20, comments=0, attachments=0, seed=3)
+        seed.generate(20, comments=0, attachments=0, seed=3)
+        names = list(Feedback.objects.order_by("id").values_list("student_name", "created_at"))
+        self.assertEqual(names[:20], names[20:])
+
+
+class BenchmarkTests(SupportTestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(export_cache.evict, 0)  # o cache de exports é compartilhado entre os testes
+
+    def test_report_covers_every_view(self):
+        seed.generate(30, comments=1, attachments=1, seed=1)
+        ExportJob.objects.create(kind="csv")
+        run_job(claim_next())
+
+        report = benchmark.run(repeats=2)
+        names = {r["url"] for r in report["results"]}
+        self.assertEqual(set(report["skipped"]), set(benchmark.SKIPPED))
+        self.assertEqual({c[1] for c in benchmark.cases()} | set(report["skipped"]), benchmark.view_names())
+        self.assertTrue(all(r["status"] < 400 for r in report["results"]), report["results"])
+        self.assertIn(reverse("export_pdf"), names)
+        self.assertTrue(all(r["queries"] for r in report["results"]))
+        self.assertEqual(report["data"]["feedbacks"], 30)
+
+    def test_command_writes_json_report(self):
+        out = os.path.join(tempfile.mkdtemp(), "bench.json")
+        call_command("benchmark", repeats=1, only=["ping", "stats_summary"], out=out, stdout=io.StringIO())
+        with open(out, encoding="utf-8") as f:
+            report = json.load(f)
+        self.assertEqual(sorted(r["name"] for r in report["results"]), ["ping", "stats_summary"])
+        self.assertEqual(benchmark.compare(report, report)[0][3], 0.0)
+
+
+class ImmediateAtomicTests(TransactionTestCase):
+    def begins(self, block):
+        with CaptureQueriesContext(connection) as ctx:
+            block()
+        return [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("BEGIN")]
+
+    def test_only_the_wrapped_transaction_is_immediate(self):
+        def write():
+            with immediate_atomic():
+                Feedback.objects.create(student_name="Ana", type="elogio", subject="outros")
+
+        def read():
+            with transaction.atomic():
+                Feedback.objects.count()
+
+        self.assertEqual(self.begins(write), ["BEGIN IMMEDIATE"])
+        self.assertEqual(self.begins(read), ["BEGIN"])
+        self.assertIsNone(connection.transaction_mode)
+
+    def test_rollback_restores_mode(self):
+        with self.assertRaises(RuntimeError), immediate_atomic():
+            Feedback.objects.create(student_name="Ana", type="elogio", subject="outros")
+            raise RuntimeError
+        self.assertFalse(Feedback.objects.exists())
+        self.assertIsNone(connection.transaction_mode)
+
+
+class SqliteProfileTests(SupportTestCase):
+    def test_connection_pragmas(self):
+        with connection.cursor() as cur:
+            self.assertEqual(cur.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+            self.assertEqual(cur.execute("PRAGMA cache_size").fetchone()[0], -20000)
+        self.assertIsNone(connection.transaction_mode)  # IMMEDIATE só em core.db.immediate_atomic
+
+    def post_feedback(self):
+        return self.client.post(
+            reverse("feedback_create"),
+            {
+                "student_name": "Ana",
+                "type": "elogio",
+                "subject": "outros",
+                "course_name": "RCA360",
+                "attachments": ContentFile(b"audio", name="nota.mp3"),
+            },
+        )
+
+    def test_create_with_attachment(self):
+        self.assertEqual(self.post_feedback().status_code, 302)
+        att = FeedbackAttachment.objects.get()
+        self.assertTrue(att.file.name.startswith("cas/"))
+        self.assertEqual(att.original_name, "nota.mp3")
+        self.assertTrue(att.file.storage.exists(att.file.name))
+        self.assertEqual(att.file_size, 5)
+
+    def test_failed_create_discards_uploaded_files(self):
+        storage = FeedbackAttachment._meta.get_field("file").storage
+        saved = []
+        real_save = storage.save
+
+        def spy(name, content, **kw):
+            saved.append(real_save(name, content, **kw))
+            return saved[-1]
+
+        with mock.patch.object(storage, "save", spy), mock.patch.object(
+            FeedbackAttachment.objects, "create", side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                self.post_feedback()
+        self.assertEqual(len(saved), 1)
+        self.assertFalse(storage.exists(saved[0]))
+        self.assertFalse(Feedback.objects.exists())
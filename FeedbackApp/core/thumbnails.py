@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# core/thumbnails.py
+"""
+Derivados de anexos de imagem (Pillow): miniatura para a lista de anexos e
+prévia leve para abrir no navegador no lugar do original de vários MB.
+Ficam em MEDIA_ROOT/derivatives/, indexados pelo hash do blob (core.storage):
+anexos com o mesmo conteúdo compartilham os mesmos derivados.
+"""
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .storage import blob_sha
+
+DERIVATIVE_DIR = "derivatives"
+# tipo → (lado máximo em px, qualidade WebP)
+SIZES = {
+    "thumb": (320, 70),
+    "preview": (1600, 80),
+}
+CONTENT_TYPE = "image/webp"
+
+
+def is_image(att):
+    return (att.mime_type or "").startswith("image/")
+
+
+def derivative_name(name, kind):
+    """Nome do derivado `kind` do arquivo `name` (nome do anexo no storage)."""
+    key = blob_sha(name) or hashlib.sha256(name.encode()).hexdigest()
+    return f"{DERIVATIVE_DIR}/{key[:2]}/{key}/{kind}.webp"
+
+
+def _write(name, im, quality):
+    """Grava via arquivo temporário + rename: nunca serve um derivado pela metade."""
+    path = default_storage.path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        im.save(tmp, "WEBP", quality=quality, method=4)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def generate(att, force=False):
+    """
+    Grava os derivados que faltam; retorna os nomes gravados.
+    ValueError se o arquivo não for uma imagem que o Pillow consiga abrir.
+    """
+    names = {kind: derivative_name(att.file.name, kind) for kind in SIZES}
+    todo = {kind for kind, name in names.items() if force or not default_storage.exists(name)}
+    if not todo:
+        return []
+
+    with att.file.open("rb") as f:
+        try:
+            im = Image.open(f)
+            # JPEG: decodifica já reduzido (bem mais rápido para fotos de celular)
+            im.draft("RGB", (max(size for size, _ in SIZES.values()),) * 2)
+            im = ImageOps.exif_transpose(im)
+            im.load()
+        except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as exc:
+            raise ValueError(f"Imagem inválida: {exc}") from exc
+
+    if im.mode not in ("RGB", "RGBA"):
+        im = im.convert("RGBA" if "transparency" in im.info or im.mode in ("LA", "PA") else "RGB")
+
+    written = []
+    # da maior para a menor, reduzindo a mesma imagem: a miniatura sai da prévia
+    for kind in sorted(SIZES, key=lambda k: -SIZES[k][0]):
+        size, quality = SIZES[kind]
+        im.thumbnail((size, size), Image.Resampling.LANCZOS)
+        if kind in todo:
+            _write(names[kind], im, quality)
+            written.append(names[kind])
+    return written
+
+
+def delete(name):
+    """Apaga os derivados de um arquivo (quando o blob deixa de existir)."""
+    for kind in SIZES:
+        default_storage.delete(derivative_name(name, kind))
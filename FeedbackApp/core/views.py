@@ -1,109 +1,50 @@
 ﻿# -*- coding: utf-8 -*-
-import csv
-from datetime import datetime
-from io import BytesIO
+import hashlib
+from datetime import datetime, timedelta
 from pathlib import Path
+from urllib.parse import urlencode
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import logout
-from django.contrib.auth.decorators import login_required, user_passes_test
-from django.core.paginator import Paginator
-from django.db.models import Count
+from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.middleware.http import ConditionalGetMiddleware
+from django.db.models import Count, Max, Prefetch, prefetch_related_objects
 from django.http import (
     Http404,
     FileResponse,
     HttpResponse,
+    HttpResponseBadRequest,
     JsonResponse,
+    StreamingHttpResponse,
 )
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
-
-from .forms import FeedbackForm, StatusForm
-from .models import Feedback, FeedbackAttachment, FeedbackComment
-
-# ---- Excel (openpyxl) ----
-from openpyxl import Workbook
-from openpyxl.styles import Font
-from openpyxl.utils import get_column_letter
-
-# ---- PDF (ReportLab) ----
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
-
-
-# ============ Access control ============
-def _in_support(user):
-    """Usuário ativo E (superuser OU no grupo 'Suporte')."""
-    return user.is_authenticated and (
-        user.is_superuser or user.groups.filter(name="Suporte").exists()
-    )
-
-
-support_required = user_passes_test(_in_support, login_url="login")
-# =======================================
+from django.utils.decorators import decorator_from_middleware
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition, require_POST, require_safe
+
+from . import api, blobs, bulk, changes, rollups, thumbnails
+from .db import immediate_atomic
+from .decorators import support_required
+from .delivery import serve_file
+from .export_cache import open_export, open_pdf, stream_export
+from .exports import XLSX_CONTENT_TYPE
+from .filters import filter_feedbacks, normalize_filters
+from .forms import BulkStatusForm, FeedbackForm, StatusForm
+from .jobs import enqueue
+from .models import ExportJob, Feedback, FeedbackAttachment, FeedbackComment
+from .pagination import keyset_page
+from .stats import MAX_MONTHS, month_days, month_summaries, month_summary
 
 
 # ============ Helpers ============
-def _month_bounds(ym: str):
-    """ym: 'YYYY-MM' → timezone-aware [start, end) do mês."""
-    y, m = map(int, ym.split("-"))
-    start_naive = datetime(y, m, 1)
-    end_naive = datetime(y + 1, 1, 1) if m == 12 else datetime(y, m + 1, 1)
-    start = timezone.make_aware(start_naive)
-    end = timezone.make_aware(end_naive)
-    return start, end
-
-
 def _filtered_queryset(request):
-    """
-    Filtros via querystring:
-      aluno, operador, curso, tipo, assunto, status, de (YYYY-MM-DD), ate (YYYY-MM-DD)
-    """
-    qs = Feedback.objects.all()
-    g = request.GET
-
-    aluno = (g.get("aluno") or "").strip()
-    operador = (g.get("operador") or "").strip()
-    curso = (g.get("curso") or "").strip()
-    tipo = (g.get("tipo") or "").strip()
-    assunto = (g.get("assunto") or "").strip()
-    status = (g.get("status") or "").strip()
-    de = (g.get("de") or "").strip()
-    ate = (g.get("ate") or "").strip()
-
-    if aluno:
-        qs = qs.filter(student_name__icontains=aluno)
-    if operador:
-        qs = qs.filter(operator_name__icontains=operador)
-    if curso:
-        qs = qs.filter(course_name__icontains=curso)
-    if tipo:
-        qs = qs.filter(type=tipo)
-    if assunto:
-        qs = qs.filter(subject=assunto)
-    if status:
-        qs = qs.filter(status=status)
-
-    fmt = "%Y-%m-%d"
-    if de:
-        try:
-            start_naive = datetime.strptime(de, fmt)
-            start = timezone.make_aware(start_naive)
-            qs = qs.filter(created_at__gte=start)
-        except ValueError:
-            pass
-    if ate:
-        try:
-            d = datetime.strptime(ate, fmt)
-            end = timezone.make_aware(datetime(d.year, d.month, d.day, 23, 59, 59, 999999))
-            qs = qs.filter(created_at__lte=end)
-        except ValueError:
-            pass
-
-    return qs
+    """Aplica os filtros da querystring (ver core.filters.filter_feedbacks)."""
+    return filter_feedbacks(request.GET)
 # =======================================
 
 
@@ -121,6 +62,18 @@ def logout_view(request):
 
 
 # ---- Create ----
+def _store_uploads(files):
+    """Salva os uploads no storage do FileField; [(nome gravado, arquivo)]."""
+    field = FeedbackAttachment._meta.get_field("file")
+    return [(field.storage.save(field.generate_filename(None, f.name), f), f) for f in files]
+
+
+def _discard_uploads(stored):
+    # o blob pode ser compartilhado com outros anexos (storage deduplicado)
+    for name, _ in stored:
+        blobs.discard(name)
+
+
 @login_required
 @support_required
 def feedback_create(request):
@@ -131,16 +84,24 @@ def feedback_create(request):
             fb = form.save(commit=False)
             op = (request.user.get_full_name() or request.user.username or "").strip()
             fb.operator_name = op or fb.operator_name
-            fb.save()
 
-            # anexos (campo Multiple)
-            for f in request.FILES.getlist("attachments"):
-                FeedbackAttachment.objects.create(
-                    feedback=fb,
-                    file=f,
-                    mime_type=getattr(f, "content_type", None),
-                    file_size=getattr(f, "size", None),
-                )
+            # anexos (campo Multiple): grava os arquivos antes de abrir a transação,
+            # para não segurar o lock de escrita do SQLite durante o I/O do upload
+            stored = _store_uploads(request.FILES.getlist("attachments"))
+            try:
+                with immediate_atomic():
+                    fb.save()
+                    for name, f in stored:
+                        FeedbackAttachment.objects.create(
+                            feedback=fb,
+                            file=name,
+                            original_name=f.name[:255],
+                            mime_type=getattr(f, "content_type", None),
+                            file_size=getattr(f, "size", None),
+                        )
+            except Exception:
+                _discard_uploads(stored)
+                raise
             messages.success(request, f"Feedback #{fb.id} criado com sucesso.")
             # PRG
             return redirect(f"{reverse('feedback_create')}?created_id={fb.id}")
@@ -158,24 +119,41 @@ def feedback_create(request):
     )
 
 
-# ---- List (filters + pagination) ----
+# ---- List (filters + keyset pagination) ----
+LIST_PER_PAGE = 25
+
+
+def _cached_count(request, qs):
+    """Total do filtro, em cache por alguns segundos (não roda COUNT a cada página)."""
+    filters = urlencode(sorted(normalize_filters(request.GET).items()))
+    key = "feedback_list_count:" + hashlib.md5(filters.encode()).hexdigest()
+    return cache.get_or_set(key, qs.count, settings.FEEDBACK_LIST_COUNT_TTL)
+
+
 @login_required
 @support_required
 def feedback_list(request):
-    qs = _filtered_queryset(request).order_by("-created_at")
+    qs = _filtered_queryset(request)
 
-    paginator = Paginator(qs, 25)
-    page_obj = paginator.get_page(request.GET.get("page"))
+    page = keyset_page(
+        qs.with_attachment_count(),
+        LIST_PER_PAGE,
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+    )
 
     q = request.GET.copy()
-    q.pop("page", None)
+    for key in ("page", "after", "before"):
+        q.pop(key, None)
     querystring = q.urlencode()
 
     context = {
-        "items": page_obj.object_list,
-        "page_obj": page_obj,
-        "paginator": paginator,
+        "items": page.object_list,
+        "page": page,
+        "total": _cached_count(request, qs),
         "querystring": querystring,
+        "filters": normalize_filters(request.GET).items(),  # vão junto na ação em massa
+        "q": (request.GET.get("q") or "").strip(),
         "aluno": (request.GET.get("aluno") or "").strip(),
         "operador": (request.GET.get("operador") or "").strip(),
         "curso": (request.GET.get("curso") or "").strip(),
@@ -191,6 +169,34 @@ def feedback_list(request):
     return render(request, "core/feedback_list.html", context)
 
 
+# ---- Bulk status (selected cards or everything matching the filters) ----
+@login_required
+@support_required
+@require_POST
+def feedback_bulk_status(request):
+    filters = normalize_filters(request.POST)
+    back = reverse("feedback_list") + (f"?{urlencode(filters)}" if filters else "")
+
+    form = BulkStatusForm(request.POST)
+    if not form.is_valid():
+        messages.error(request, "Escolha um status válido.")
+        return redirect(back)
+    status = form.cleaned_data["new_status"]
+
+    if form.cleaned_data["scope"] == "filtered":
+        n = bulk.set_status(status, qs=filter_feedbacks(filters))
+    else:
+        ids = [int(v) for v in request.POST.getlist("ids") if v.isdigit()]
+        if not ids:
+            messages.warning(request, "Selecione ao menos um feedback.")
+            return redirect(back)
+        n = bulk.set_status(status, ids=ids)
+
+    label = dict(Feedback.STATUS_CHOICES)[status]
+    messages.success(request, f"{n} feedback{'s' if n != 1 else ''} atualizado{'s' if n != 1 else ''} para {label}.")
+    return redirect(back)
+
+
 # ---- Detail (status + comments) ----
 @login_required
 @support_required
@@ -208,7 +214,9 @@ def feedback_detail(request, pk):
                 fb.resolved_at = (
                     fb.resolved_at or timezone.now() if new_status == "resolvido" else None
                 )
-                fb.save()
+                # feedback + rollup numa única transação de escrita (BEGIN IMMEDIATE, core.db)
+                with immediate_atomic():
+                    fb.save()
                 messages.success(request, f"Status atualizado para {fb.get_status_display()}.")
             return redirect("feedback_detail", pk=fb.pk)
 
@@ -230,11 +238,13 @@ def feedback_detail(request, pk):
                 messages.warning(request, "Escreva um comentário.")
             return redirect("feedback_detail", pk=fb.pk)
 
-    # GET: monta queryset de comentários de forma à prova de related_name
-    if hasattr(fb, "comments"):
-        comments_qs = fb.comments.all().order_by("created_at")
-    else:
-        comments_qs = fb.feedbackcomment_set.all().order_by("created_at")
+    # GET: anexos e comentários em 1 query cada (nada de query extra no template)
+    prefetch_related_objects(
+        [fb],
+        "attachments",
+        Prefetch("comments", queryset=FeedbackComment.objects.order_by("created_at")),
+    )
+    comments_qs = fb.comments.all()
 
     form_status = StatusForm(initial={"status": fb.status})
     return render(
@@ -248,275 +258,329 @@ def feedback_detail(request, pk):
     )
 
 
-# ---- Attachment gated download ----
+# ---- Attachment gated download (offload ou Range/ETag, ver core.delivery) ----
 @login_required
 @support_required
 def attachment_download(request, pk):
     att = get_object_or_404(FeedbackAttachment, pk=pk)
     try:
-        return FileResponse(
-            open(att.file.path, "rb"),
-            as_attachment=False,
-            content_type=att.mime_type or "application/octet-stream",
-            filename=Path(att.file.name).name,
+        return serve_file(
+            request, att.file.storage, att.file.name,
+            content_type=att.mime_type, filename=att.original_name or None,
         )
     except FileNotFoundError:
         raise Http404("Arquivo não encontrado")
 
 
-# ---- CSV export (respects filters) ----
 @login_required
 @support_required
-def export_csv(request):
-    qs = _filtered_queryset(request).order_by("-created_at")
-
-    response = HttpResponse(content_type="text/csv; charset=utf-8")
-    response["Content-Disposition"] = "attachment; filename=feedbacks.csv"
-    w = csv.writer(response, delimiter=";")
-
-    w.writerow(
-        [
-            "id",
-            "data",
-            "aluno",
-            "operador",
-            "tipo",
-            "assunto",
-            "curso",
-            "turma",
-            "status",
-            "descricao",
-            "anexos_qtd",
-        ]
+def attachment_derivative(request, pk, kind):
+    """Miniatura/prévia (core.thumbnails); regera na hora se saiu do cache em disco."""
+    att = get_object_or_404(FeedbackAttachment, pk=pk)
+    if kind not in thumbnails.SIZES or not thumbnails.is_image(att):
+        raise Http404("Derivado inexistente")
+
+    name = thumbnails.derivative_name(att.file.name, kind)
+    if not default_storage.exists(name):
+        try:
+            thumbnails.generate(att)
+        except (ValueError, FileNotFoundError):
+            raise Http404("Derivado indisponível")
+    stem = Path(att.original_name or att.file.name).stem
+    return serve_file(
+        request, default_storage, name,
+        content_type=thumbnails.CONTENT_TYPE, filename=f"{stem}-{kind}.webp",
     )
 
-    for f in qs:
-        w.writerow(
-            [
-                f.id,
-                f.created_at.strftime("%Y-%m-%d %H:%M"),
-                f.student_name or "",
-                f.operator_name or "",
-                f.type,
-                f.subject,
-                f.course_name or "",
-                f.class_name or "",
-                f.status,
-                (f.description or "").replace("\n", " ").strip()[:500],
-                f.attachments.count(),
-            ]
-        )
 
-    return response
+# ---- CSV export (respects filters; cached per filters + data version, ?gzip=1 → .csv.gz) ----
+def _cached_file_response(opened, filename, content_type):
+    body, hit = opened
+    if hit or hasattr(body, "read"):
+        resp = FileResponse(body, as_attachment=True, filename=filename, content_type=content_type)
+    else:
+        # miss do CSV: gerado enquanto é enviado (core.export_cache.stream_export)
+        resp = StreamingHttpResponse(body, content_type=content_type)
+        resp["Content-Disposition"] = f'attachment; filename="{filename}"'
+    resp["X-Export-Cache"] = "hit" if hit else "miss"
+    return resp
 
 
-# ---- Excel export (respects filters) ----
 @login_required
 @support_required
-def export_excel(request):
-    qs = _filtered_queryset(request).order_by("-created_at")[:2000]  # safety cap
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Feedbacks"
-
-    headers = [
-        "ID",
-        "Data",
-        "Aluno",
-        "Operador",
-        "Tipo",
-        "Assunto",
-        "Curso",
-        "Turma",
-        "Status",
-        "Descrição",
-        "Anexos (qtd)",
-    ]
-    ws.append(headers)
-    for c in range(1, len(headers) + 1):
-        ws.cell(row=1, column=c).font = Font(bold=True)
-
-    tipo_map = dict(Feedback.TIPO_CHOICES)
-    assunto_map = dict(Feedback.ASSUNTO_CHOICES)
-    status_map = dict(Feedback.STATUS_CHOICES)
-
-    for f in qs:
-        ws.append(
-            [
-                f.id,
-                f.created_at.strftime("%Y-%m-%d %H:%M"),
-                f.student_name or "",
-                f.operator_name or "",
-                tipo_map.get(f.type, f.type),
-                assunto_map.get(f.subject, f.subject),
-                f.course_name or "",
-                f.class_name or "",
-                status_map.get(f.status, f.status),
-                (f.description or "").replace("\n", " ").strip(),
-                f.attachments.count(),
-            ]
-        )
+def export_csv(request):
+    if request.GET.get("gzip") == "1":
+        return _cached_file_response(stream_export("csv.gz", request.GET), "feedbacks.csv.gz", "application/gzip")
+    return _cached_file_response(stream_export("csv", request.GET), "feedbacks.csv", "text/csv; charset=utf-8")
 
-    # auto width
-    for col_idx in range(1, len(headers) + 1):
-        col = get_column_letter(col_idx)
-        max_len = 0
-        for cell in ws[col]:
-            max_len = max(max_len, len(str(cell.value)) if cell.value else 0)
-        ws.column_dimensions[col].width = min(max_len + 2, 60)
-
-    buf = BytesIO()
-    wb.save(buf)
-    buf.seek(0)
-    resp = HttpResponse(
-        buf.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
-    resp["Content-Disposition"] = "attachment; filename=feedbacks.xlsx"
-    return resp
+
+# ---- Excel export (respects filters; no row cap, cached like the CSV) ----
+@login_required
+@support_required
+def export_excel(request):
+    return _cached_file_response(open_export("xlsx", request.GET), "feedbacks.xlsx", XLSX_CONTENT_TYPE)
 
 
 # ---- PDF export (monthly summary) ----
 @login_required
 @support_required
 def export_pdf(request):
-    month = request.GET.get("month") or timezone.now().strftime("%Y-%m")
-    start, end = _month_bounds(month)
-    q_month = Feedback.objects.filter(created_at__gte=start, created_at__lt=end)
-    qs = Feedback.objects.order_by("-created_at")[:200]
-
-    resumo = {
-        "Total": q_month.count(),
-        "Elogios": q_month.filter(type="elogio").count(),
-        "Reclamações": q_month.filter(type="reclamacao").count(),
-        "Sugestões": q_month.filter(type="sugestao").count(),
-        "Resolvidos": q_month.filter(status="resolvido").count(),
+    month = (request.GET.get("month") or timezone.now().strftime("%Y-%m")).strip()
+    try:
+        # em cache por (mês, versão dos dados): mês fechado não é renderizado de novo
+        opened = open_pdf(month)
+    except ValueError:
+        return HttpResponseBadRequest("Mês inválido (use YYYY-MM).")
+    return _cached_file_response(opened, "feedbacks.pdf", "application/pdf")
+
+
+# ---- Background export jobs ----
+def _job_payload(job):
+    data = {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "status_url": reverse("export_job_status", args=[job.id]),
     }
+    if job.status == "done":
+        data["download_url"] = reverse("export_job_download", args=[job.id])
+    return data
 
-    buf = BytesIO()
-    doc = SimpleDocTemplate(
-        buf, pagesize=A4, rightMargin=24, leftMargin=24, topMargin=24, bottomMargin=24
-    )
-    styles = getSampleStyleSheet()
-    story = []
-
-    story.append(Paragraph("Relatório de Feedbacks", styles["Title"]))
-    story.append(Paragraph(f"Mês: {month}", styles["Normal"]))
-    story.append(Spacer(1, 10))
-
-    data_resumo = [["Métrica", "Valor"]] + [[k, v] for k, v in resumo.items()]
-    t1 = Table(data_resumo, colWidths=[220, 120])
-    t1.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
-                ("ALIGN", (1, 1), (-1, -1), "RIGHT"),
-                ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-            ]
+
+@login_required
+@support_required
+@require_POST
+def export_job_create(request):
+    """POST kind=csv|xlsx|pdf + filtros (ou month) → job na fila (202)."""
+    kind = request.POST.get("kind")
+    if kind not in dict(ExportJob.KIND_CHOICES):
+        return JsonResponse({"error": "Formato inválido"}, status=400)
+    job = enqueue(kind, request.POST, user=request.user)
+    return JsonResponse(_job_payload(job), status=202)
+
+
+@login_required
+@support_required
+def export_job_status(request, pk):
+    job = get_object_or_404(ExportJob, pk=pk)
+    return JsonResponse(_job_payload(job))
+
+
+@login_required
+@support_required
+def export_job_download(request, pk):
+    job = get_object_or_404(ExportJob, pk=pk, status="done")
+    content_types = {
+        "csv": "text/csv; charset=utf-8",
+        "xlsx": XLSX_CONTENT_TYPE,
+        "pdf": "application/pdf",
+    }
+    try:
+        return FileResponse(
+            job.file.open("rb"),
+            as_attachment=True,
+            content_type=content_types[job.kind],
+            filename=f"feedbacks.{job.kind}",
         )
+    except FileNotFoundError:
+        raise Http404("Arquivo não encontrado")
+
+
+# ---- Read-only JSON API (filtros da lista, ?fields=, cursor, gzip, ETag) ----
+# ETag do corpo (304 se o cliente já tem a página); o gzip é aplicado depois e enfraquece o ETag
+_conditional_page = decorator_from_middleware(ConditionalGetMiddleware)
+_API_JSON = {"separators": (",", ":"), "ensure_ascii": False}
+
+
+@login_required
+@support_required
+@gzip_page
+@_conditional_page
+@require_safe
+def api_feedbacks(request):
+    """
+    GET ?<filtros da lista>&fields=id,status,comments&limit=100&cursor=...
+    → {"results": [...], "next": url da próxima página ou null}
+    """
+    try:
+        fields = api.parse_fields(request.GET.get("fields"))
+        limit = api.parse_limit(request.GET.get("limit"))
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    qs = api.select(_filtered_queryset(request), fields)
+    page = keyset_page(qs, limit, after=request.GET.get("cursor"))
+
+    next_url = None
+    if page.has_next:
+        q = request.GET.copy()
+        q["cursor"] = page.next_cursor
+        next_url = f"{request.path}?{q.urlencode()}"
+    return JsonResponse(
+        {"results": [api.serialize(fb, fields) for fb in page], "next": next_url},
+        json_dumps_params=_API_JSON,
     )
-    story.append(t1)
-    story.append(Spacer(1, 12))
-
-    headers = ["ID", "Data", "Aluno", "Tipo", "Assunto", "Curso", "Turma", "Status"]
-    rows = []
-    tipo_map = dict(Feedback.TIPO_CHOICES)
-    assunto_map = dict(Feedback.ASSUNTO_CHOICES)
-    status_map = dict(Feedback.STATUS_CHOICES)
-
-    for f in qs:
-        rows.append(
-            [
-                f.id,
-                f.created_at.strftime("%Y-%m-%d %H:%M"),
-                f.student_name or "",
-                tipo_map.get(f.type, f.type),
-                assunto_map.get(f.subject, f.subject),
-                f.course_name or "",
-                f.class_name or "",
-                status_map.get(f.status, f.status),
-            ]
-        )
 
-    t2 = Table([headers] + rows, repeatRows=1)
-    t2.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
-                ("FONTSIZE", (0, 0), (-1, -1), 8),
-                ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.whitesmoke, colors.white]),
-            ]
-        )
+
+@login_required
+@support_required
+@gzip_page
+@_conditional_page
+@require_safe
+def api_feedback(request, pk):
+    """GET ?fields=... → um feedback."""
+    try:
+        fields = api.parse_fields(request.GET.get("fields"))
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    fb = get_object_or_404(api.select(Feedback.objects.all(), fields), pk=pk)
+    return JsonResponse(api.serialize(fb, fields), json_dumps_params=_API_JSON)
+
+
+@login_required
+@support_required
+@gzip_page
+@require_safe
+def api_changes(request):
+    """
+    GET ?since=<token>&limit=500 → {"results": [...], "next": token, "has_more": bool}
+    Mudanças de feedbacks/comentários/anexos e exclusões depois de `since`
+    (core.changes). 410 se o token for mais velho que a retenção dos tombstones.
+    """
+    try:
+        limit = changes.parse_limit(request.GET.get("limit"))
+        results, token, has_more = changes.page(request.GET.get("since"), limit)
+    except changes.TokenExpired as exc:
+        return JsonResponse({"error": str(exc)}, status=410)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    return JsonResponse(
+        {"results": results, "next": token, "has_more": has_more}, json_dumps_params=_API_JSON
     )
-    story.append(Paragraph("Detalhes (últimos 200)", styles["Heading3"]))
-    story.append(t2)
-
-    doc.build(story)
-    pdf = buf.getvalue()
-    buf.close()
-    resp = HttpResponse(pdf, content_type="application/pdf")
-    resp["Content-Disposition"] = 'attachment; filename="feedbacks.pdf"'
-    return resp
 
 
 # ---- Monthly stats (JSON) ----
 @login_required
 @support_required
 def stats_summary(request):
-    month = request.GET.get("month") or timezone.now().strftime("%Y-%m")
-    start, end = _month_bounds(month)
-    qs = Feedback.objects.filter(created_at__gte=start, created_at__lt=end)
+    """?month=YYYY-MM → resumo do mês; ?months=YYYY-MM,YYYY-MM → {"months": {ym: resumo}}."""
+    months = [m.strip() for m in (request.GET.get("months") or "").split(",") if m.strip()]
+    if len(months) > MAX_MONTHS:
+        return JsonResponse({"error": f"No máximo {MAX_MONTHS} meses por consulta"}, status=400)
+    month = (request.GET.get("month") or timezone.now().strftime("%Y-%m")).strip()
+    try:
+        for ym in months or [month]:
+            month_days(ym)
+    except (ValueError, OverflowError):
+        return JsonResponse({"error": "Mês inválido (use YYYY-MM)"}, status=400)
 
-    data = {
-        "elogios": qs.filter(type="elogio").count(),
-        "reclamacoes": qs.filter(type="reclamacao").count(),
-        "sugestoes": qs.filter(type="sugestao").count(),
-        "resolvidos": qs.filter(status="resolvido").count(),
-        "total": qs.count(),
-    }
-    data["taxa_resolucao_pct"] = (
-        round(100 * data["resolvidos"] / data["total"], 1) if data["total"] else 0.0
-    )
-    return JsonResponse(data)
+    if months:
+        return JsonResponse({"months": month_summaries(months)})
+    return JsonResponse(month_summary(month))
 
 
 @login_required
 @support_required
 def stats_breakdown(request):
-    month = request.GET.get("month") or timezone.now().strftime("%Y-%m")
-    start, end = _month_bounds(month)
-    qs = Feedback.objects.filter(created_at__gte=start, created_at__lt=end)
+    """?month=YYYY-MM (padrão: mês atual) ou ?de=YYYY-MM-DD&ate=YYYY-MM-DD (inclusive)."""
+    month = (request.GET.get("month") or timezone.now().strftime("%Y-%m")).strip()
+    try:
+        start, end = month_days(month)
+        if request.GET.get("de"):
+            start = datetime.strptime(request.GET["de"], "%Y-%m-%d").date()
+        if request.GET.get("ate"):
+            end = datetime.strptime(request.GET["ate"], "%Y-%m-%d").date() + timedelta(days=1)
+    except (ValueError, OverflowError):
+        return JsonResponse({"error": "Data inválida"}, status=400)
+
+    return JsonResponse(_breakdown_payload(start, end))
 
-    by_type = list(qs.values("type").annotate(n=Count("id")))
-    by_subject = list(qs.values("subject").annotate(n=Count("id")))
-    by_course = list(qs.values("course_name").annotate(n=Count("id")))
-    by_status = list(qs.values("status").annotate(n=Count("id")))
+
+def _breakdown_payload(start, end):
+    rows = rollups.breakdown(start, end)
 
     label_type = dict(Feedback.TIPO_CHOICES)
     label_subject = dict(Feedback.ASSUNTO_CHOICES)
     label_status = dict(Feedback.STATUS_CHOICES)
 
-    def map_labels(rows, label_map, field):
+    def map_labels(pairs, label_map):
         out = []
-        for r in rows:
-            key = r[field]
+        for key, n in pairs:
             label = label_map.get(key, key if key else "—")
-            out.append({"label": label, "value": r["n"]})
+            out.append({"label": label, "value": n})
         return out
 
-    return JsonResponse(
+    return {
+        "type": map_labels(rows["type"], label_type),
+        "subject": map_labels(rows["subject"], label_subject),
+        "status": map_labels(rows["status"], label_status),
+        "course": map_labels(rows["course"], {}),
+    }
+
+
+def _data_version(request):
+    """(último updated_at, qtd) dos feedbacks — uma query, memorizada no request."""
+    if not hasattr(request, "_data_version"):
+        request._data_version = Feedback.objects.order_by().aggregate(
+            last=Max("updated_at"), n=Count("id")
+        )
+    return request._data_version
+
+
+def _dashboard_months(request):
+    """(mês, mês anterior) normalizados ('YYYY-MM') do ?month=, ou None se inválido (memoizado no request)."""
+    if not hasattr(request, "_dashboard_months"):
+        month = (request.GET.get("month") or timezone.now().strftime("%Y-%m")).strip()
+        try:
+            start, _ = month_days(month)
+            prev_start, _ = month_days(f"{(start - timedelta(days=1)):%Y-%m}")
+        except (ValueError, OverflowError):
+            request._dashboard_months = None
+        else:
+            request._dashboard_months = (f"{start:%Y-%m}", f"{prev_start:%Y-%m}")
+    return request._dashboard_months
+
+
+def _dashboard_etag(request):
+    months = _dashboard_months(request)
+    if months is None:
+        return None  # sem ETag: a view responde 400
+    v = _data_version(request)
+    month = months[0]
+    last = v["last"].timestamp() if v["last"] else 0
+    return f"dash-{month}-{last:.6f}-{v['n']}"
+
+
+def _dashboard_last_modified(request):
+    return _data_version(request)["last"]
+
+
+@login_required
+@support_required
+@condition(etag_func=_dashboard_etag, last_modified_func=_dashboard_last_modified)
+def stats_dashboard(request):
+    """Tudo o que o dashboard precisa (resumo do mês e do anterior + breakdown) numa resposta."""
+    months = _dashboard_months(request)
+    if months is None:
+        return JsonResponse({"error": "Mês inválido (use YYYY-MM)"}, status=400)
+    month, prev_month = months
+
+    summaries = month_summaries([month, prev_month])
+    resp = JsonResponse(
         {
-            "type": map_labels(by_type, label_type, "type"),
-            "subject": map_labels(by_subject, label_subject, "subject"),
-            "status": map_labels(by_status, label_status, "status"),
-            "course": [{"label": r["course_name"] or "—", "value": r["n"]} for r in by_course],
+            "month": month,
+            "prev_month": prev_month,
+            "summary": summaries[month],
+            "summary_prev": summaries[prev_month],
+            "breakdown": _breakdown_payload(*month_days(month)),
         }
     )
+    # o navegador sempre revalida (If-None-Match) e recebe 304 se nada mudou
+    resp["Cache-Control"] = "private, no-cache"
+    return resp
 
 
 @login_required